@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Grouped, stacked and dual-axis charts draw one trace per series (claim status,
+# product, outlier level...) of an aggregate. The traces are cut from the aggregate in
+# one pass, instead of filtering the aggregate once per series, and text labels are
+# formatted for a whole series at a time.
+
+
+# Function to format numbers as labels, e.g. 1.2e6 as "1M" with scale=1e6 and
+# suffix='M', or as they print with decimals=None; values at or below
+# hide_at_or_below get an empty label
+def text_labels(values, scale=1, decimals=0, prefix='', suffix='', hide_at_or_below=None):
+    values = np.asarray(values)
+    numbers = values.astype(str) if decimals is None else np.char.mod(f'%.{decimals}f', values / scale)
+    labels = np.char.add(np.char.add(prefix, numbers), suffix)
+    if hide_at_or_below is not None:
+        labels = np.where(values > hide_at_or_below, labels, '')
+    # A list, as plotly writes dates in full precision beside arrays of strings
+    return labels.tolist()
+
+
+# Function to cut the rows of each series out of a tidy aggregate, series in order of
+# first appearance as Series.unique() gives them; rows with no series are left out
+def _series_rows(column):
+    codes, names = pd.factorize(column)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    return [(name, order[start:end]) for name, start, end in zip(names, bounds[:-1], bounds[1:])]
+
+
+# Function to build one trace per series of an aggregate, for fig.add_traces. The
+# aggregate is either tidy, one row per (x, series) with columns x, y and series, or
+# pivoted, indexed by x with one column per series (series=None), where missing cells
+# are left out. trace is the trace type and style the settings all traces share. Series
+# take colors in turn, set on each of color_props (e.g. 'line_color' and 'fillcolor' for
+# an area). text is a column of labels, or a function turning the y values of a series
+# into labels, such as text_labels. With sort, each series is ordered by y, largest first.
+def series_traces(data, x=None, y=None, series=None, trace=go.Bar, colors=None,
+                  color_props=('marker_color',), text=None, sort=False, **style):
+    if series is None:
+        xs = data.index
+        columns = [(name, column.to_numpy(), np.flatnonzero(column.notna().to_numpy())) for name, column in data.items()]
+    else:
+        xs = data[x]
+        ys = data[y].to_numpy()
+        columns = [(name, ys, rows) for name, rows in _series_rows(data[series])]
+    if isinstance(text, str):
+        text = data[text].to_numpy()
+
+    traces = []
+    for idx, (name, ys, rows) in enumerate(columns):
+        if sort:
+            rows = rows[np.argsort(-ys[rows], kind='stable')]
+        settings = dict(style, x=xs[rows] if series is None else xs.iloc[rows], y=ys[rows], name=name)
+        if colors:
+            settings.update({prop: colors[idx % len(colors)] for prop in color_props})
+        if callable(text):
+            settings['text'] = text(ys[rows])
+        elif text is not None:
+            settings['text'] = text[rows].tolist()
+        traces.append(trace(**settings))
+    return traces
@@ -10,6 +10,38 @@ from itertools import chain
 from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 
+import charts
+import icd10
+import ranking
+import timeseries
+from data_loader import CLAIMS_DATASET, claims_version, compact_categories, load_claims, load_cube, load_icd_rollups
+from facets import Facet, state_keys
+from filter_cache import FilterChain
+from kpis import ClaimKPIs
+
+
+# The filter widgets of the view, in the order their filters are applied (see facets.Facet)
+FACETS = [
+    Facet("analysis_claim_type_multiselect", 'Claim Type', cascade=False),
+    Facet("analysis_claim_status_multiselect", 'Claim Status', cascade=False),
+    Facet("analysis_source_multiselect", 'Source', cascade=False),
+    Facet("analysis_diagnosis_multiselect", 'Diagnosis', cascade=False),
+    Facet("analysis_employer_name_multiselect", 'Employer Name', cascade=False),
+    Facet("analysis_provider_name_multiselect", 'Provider Name', cascade=False),
+    Facet("year_selector_multiselect", 'Year', default=lambda years: years[-1:]),
+    Facet("month_selector_multiselect", 'Month', cascade=False),
+    Facet("filter_quarter_multiselect", 'Quarter'),
+    Facet("filter_business_line_multiselect", 'Product'),
+    Facet("employer_selector_multiselect", 'Employer Name'),
+    Facet("Provider_selector_multiselect", 'Provider Name'),
+    Facet("status_multiselect", 'Claim Status'),
+    Facet("type_selec_multiselect", 'Claim Type'),
+]
+
+# Keys of the filter widgets whose values are kept while the view is hidden
+FILTER_KEYS = state_keys(FACETS) + ["analysis_icd_chapter_selectbox", "analysis_icd_block_selectbox"]
+
+
 def display_analysis():
     # Centered and styled main title using inline styles
     st.markdown('''
@@ -31,22 +63,8 @@ def display_analysis():
     st.markdown('<h1 class="main-title">CLAIMS ANALYSIS</h1>', unsafe_allow_html=True)
 
 
-    # File paths and sheet names
-    filepath_visits = "Claims.xlsx"
-    sheet_name1 = "2023 claims"
-    sheet_name2 = "2024 claims"
-
-    # Read the Claims data
-    dfc_2023 = pd.read_excel(filepath_visits, sheet_name=sheet_name1)
-    dfc_2024 = pd.read_excel(filepath_visits, sheet_name=sheet_name2)
-
-    # Concatenate the dataframes
-    df = pd.concat([dfc_2023, dfc_2024])
-
-    # Data preprocessing
-    df['Claim Created Date'] = pd.to_datetime(df['Claim Created Date'], errors='coerce')
-    df["Employer Name"] = df["Employer Name"].str.upper()
-    df["Provider Name"] = df["Provider Name"].str.upper()
+    # Load the shared, normalized claims data
+    df = load_claims()
 
     # Sidebar styling and logo
     st.markdown("""
@@ -94,12 +112,6 @@ def display_analysis():
         </style>
         """, unsafe_allow_html=True)
 
-    # Dictionary to map month names to their order
-    month_order = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6, "July": 7, "August": 8,
-        "September": 9, "October": 10, "November": 11, "December": 12
-    }
     # Define the mapping of months to quarters
     month_to_quarter = {
         "January": "Q1", "February": "Q1", "March": "Q1",
@@ -107,39 +119,48 @@ def display_analysis():
         "July": "Q3", "August": "Q3", "September": "Q3",
         "October": "Q4", "November": "Q4", "December": "Q4"
     }
-    # Filter DataFrame by months in `month_order`
-    df = df[df['Month'].isin(month_order)]
+    # Filters below are applied through a cached chain: repeating a selection
+    # reuses the rows it produced before instead of filtering again. The chain
+    # filters the daily cube alongside, so totals and averages by period, type,
+    # status or product are summed from cube cells rather than from every claim.
+    filters = FilterChain(df, "Claims Analysis", claims_version(), cube=load_cube(), rollups=load_icd_rollups(), path=CLAIMS_DATASET)
+
+    # Keep rows whose month is a calendar month ('Month' is ordered at load)
+    filters.notna('Month')
+
+    # Options for every filter widget below, each from the rows the filters before it
+    # leave, resolved up front from the selections in session state
+    options = filters.options(FACETS, st.session_state)
+
 
-    # Sort months based on their order
-    sorted_months = sorted(df['Month'].dropna().unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
-    df['Source'] = df['Source'].astype(str)
-    df['Quarter'] = "Q" + df['Claim Created Date'].dt.quarter.astype(str)
+    # Months present, in calendar order
+    sorted_months = list(options["month_selector_multiselect"].index)
 
 
     # Sidebar for filters
     st.sidebar.header("Filters")
 
-    type = st.sidebar.multiselect("Select Claim Type", options=sorted(df['Claim Type'].unique()))
-    status = st.sidebar.multiselect("Select Claim Status", options=df['Claim Status'].unique())
-    source = st.sidebar.multiselect("Select Claim Provider Type", options=sorted(df['Source'].unique()))
-    code = st.sidebar.multiselect("Select Diagnosis", options=df['Diagnosis'].unique())
-    client_name = st.sidebar.multiselect("Select Employer Name", options=sorted(df['Employer Name'].dropna().unique()))
-    prov_name = st.sidebar.multiselect("Select Provider Name", options=sorted(df['Provider Name'].dropna().unique()))
+    type = st.sidebar.multiselect("Select Claim Type", options=list(options["analysis_claim_type_multiselect"].index), key="analysis_claim_type_multiselect")
+    status = st.sidebar.multiselect("Select Claim Status", options=list(options["analysis_claim_status_multiselect"].index), key="analysis_claim_status_multiselect")
+    source = st.sidebar.multiselect("Select Claim Provider Type", options=list(options["analysis_source_multiselect"].index), key="analysis_source_multiselect")
+    code = st.sidebar.multiselect("Select Diagnosis", options=list(options["analysis_diagnosis_multiselect"].index), key="analysis_diagnosis_multiselect")
+    client_name = st.sidebar.multiselect("Select Employer Name", options=list(options["analysis_employer_name_multiselect"].index), key="analysis_employer_name_multiselect")
+    prov_name = st.sidebar.multiselect("Select Provider Name", options=list(options["analysis_provider_name_multiselect"].index), key="analysis_provider_name_multiselect")
 
     # Apply filters to the DataFrame
 
     if 'Claim Type' in df.columns and type:
-        df = df[df['Claim Type'].isin(type)]
+        filters.isin('Claim Type', type)
     if 'Claim Status' in df.columns and status:
-        df = df[df['Claim Status'].isin(status)]
+        filters.isin('Claim Status', status)
     if 'Source' in df.columns and source:
-        df = df[df['Source'].isin(source)]
+        filters.isin('Source', source)
     if 'Diagnosis' in df.columns and code:
-        df = df[df['Diagnosis'].isin(code)]
+        filters.isin('Diagnosis', code)
     if 'Employer Name' in df.columns and client_name:
-        df = df[df['Employer Name'].isin(client_name)]
+        filters.isin('Employer Name', client_name)
     if 'Provider Name' in df.columns and prov_name:
-        df = df[df['Provider Name'].isin(prov_name)]
+        filters.isin('Provider Name', prov_name)
 
 
 
@@ -148,7 +169,7 @@ def display_analysis():
 
     # Year selector (allow multiple selections)
     with col1:
-        years = sorted(df['Year'].dropna().unique())
+        years = list(options["year_selector_multiselect"].index)
         selected_years = st.multiselect(
             "Select Years",
             options=years,
@@ -156,7 +177,7 @@ def display_analysis():
             key="year_selector_multiselect"
         )
         if selected_years:
-            df = df[df['Year'].isin(selected_years)]
+            filters.isin('Year', selected_years)
 
     # Month selector (allow multiple selections)
     with col2:
@@ -166,35 +187,35 @@ def display_analysis():
             key="month_selector_multiselect"
         )
         if selected_months:
-            df = df[df['Month'].isin(selected_months)]
+            filters.isin('Month', selected_months)
 
         # Dynamically calculate the quarters based on selected months
         if selected_months:
             suggested_quarters = list(set(month_to_quarter[month] for month in selected_months))
         else:
-            suggested_quarters = sorted(df['Quarter'].dropna().unique())  # Default to all quarters
+            suggested_quarters = list(options["filter_quarter_multiselect"].index)  # Default to all quarters
 
     # Quarter selector (allow manual selection, with dynamic suggestions)
     with col3:
-        quarters = sorted(df['Quarter'].dropna().unique())
+        quarters = list(options["filter_quarter_multiselect"].index)
         selected_quarters = st.multiselect(
             "Select Quarters",
             options=quarters,
             key="filter_quarter_multiselect"
         )
         if selected_quarters:
-            df = df[df['Quarter'].isin(selected_quarters)]
+            filters.isin('Quarter', selected_quarters)
 
     # Business Line selector (pre-select all options by default)
     with col4:
-        business_lines = sorted(df['Product'].dropna().unique()) if 'Product' in df.columns else []
+        business_lines = list(options["filter_business_line_multiselect"].index)
         selected_business_lines = st.multiselect(
             "Select Business Lines",
             options=business_lines,
             key="filter_business_line_multiselect"
         )
         if selected_business_lines:
-            df = df[df['Product'].isin(selected_business_lines)]
+            filters.isin('Product', selected_business_lines)
 
 
     # Create a three-column layout
@@ -202,30 +223,30 @@ def display_analysis():
 
     # Year selector (allow multiple selections)
     with col4:
-        years = sorted(df['Employer Name'].dropna().unique())
+        years = list(options["employer_selector_multiselect"].index)
         selected_years = st.multiselect(
             "Select Employer Group",
             options=years,
             key="employer_selector_multiselect"
         )
         if selected_years:
-            df = df[df['Employer Name'].isin(selected_years)]
+            filters.isin('Employer Name', selected_years)
 
     # Year selector (allow multiple selections)
     with col3:
-        years = sorted(df['Provider Name'].dropna().unique())
+        years = list(options["Provider_selector_multiselect"].index)
         selected_years = st.multiselect(
             "Select Service Provider",
             options=years,
             key="Provider_selector_multiselect"
         )
         if selected_years:
-            df = df[df['Provider Name'].isin(selected_years)]
+            filters.isin('Provider Name', selected_years)
 
 
         # Claim Status selector (pre-select one status by default)
         with col2:
-            business_lines = sorted(df['Claim Status'].dropna().unique()) if 'Claim Status' in df.columns else []
+            business_lines = list(options["status_multiselect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -236,11 +257,11 @@ def display_analysis():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Status'].isin(selected_business_lines)]
+                filters.isin('Claim Status', selected_business_lines)
 
         # Claim Status selector (pre-select one status by default)
         with col1:
-            business_lines = sorted(df['Claim Type'].dropna().unique()) if 'Claim Type' in df.columns else []
+            business_lines = list(options["type_selec_multiselect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -251,18 +272,10 @@ def display_analysis():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Type'].isin(selected_business_lines)]
+                filters.isin('Claim Type', selected_business_lines)
 
-    # Dynamically calculate the date range based on selected filters
-    if selected_months:
-        # Filter DataFrame by selected months
-        df_filtered = df[df['Month'].isin(selected_months)]
-    else:
-        df_filtered = df
-
-    # Get the minimum and maximum dates from the filtered DataFrame
-    startDate = df_filtered["Claim Created Date"].min()
-    endDate = df_filtered["Claim Created Date"].max()
+    # Date range of the rows the filters above keep (selected months included)
+    startDate, endDate = filters.bounds("Claim Created Date")
 
 
     # Define CSS for the styled date input boxes
@@ -313,39 +326,36 @@ def display_analysis():
 
     # Filter the DataFrame based on the selected date range
     if date1 and date2:
-        df = df[(df["Claim Created Date"] >= date1) & (df["Claim Created Date"] <= date2)]
-
+        filters.between("Claim Created Date", date1, date2)
 
+    # Drop categories the filters removed so charts only show what is left
+    df = filters.memo("compact", compact_categories)
 
 
-    df_app = df[df['Claim Status'] == 'Approved']
-    df_dec = df[df['Claim Status'] == 'Declined']
-
     if not df.empty:
         scale = 1_000_000  # For millions
         scaling = 1000  # For thousands
 
-        # Calculate key metrics
-        total_claim_amount = (df["Claim Amount"].sum()) / scale
-        average_amount = (df["Claim Amount"].mean()) / scaling
-        average_app_amount = (df["Approved Claim Amount"].mean()) / scaling
-
-        total_app_claim_amount = (df_app["Approved Claim Amount"].sum()) / scale
-        total_dec_claim_amount = (df_dec["Claim Amount"].sum()) / scaling
+        # Calculate key metrics, all from one pass over the filtered claims
+        kpis = filters.memo("kpis", ClaimKPIs)
+        total_claim_amount = kpis.claim_amount / scale
+        average_amount = kpis.average_amount / scaling
+        average_app_amount = kpis.average_approved_amount / scaling
 
-        total_app = df_app["Claim ID"].nunique()
-        total_dec = df_dec["Claim ID"].nunique()
+        total_app_claim_amount = kpis.status('Approved', 'approved_amount') / scale
+        total_dec_claim_amount = kpis.status('Declined', 'claim_amount') / scaling
 
+        total_app = kpis.status('Approved')
+        total_dec = kpis.status('Declined')
 
-
-        total_clients = df["Employer Name"].nunique()
-        total_claims = df["Claim ID"].nunique()
+        total_clients = kpis.clients
+        total_claims = kpis.claims
 
         # Approval Rate (Claims Approved / Total Claims)
-        approval_rate = (total_app / total_claims) * 100 if total_claims > 0 else 0
+        approval_rate = kpis.rate('Approved')
 
         # Denial Rate (Claims Declined / Total Claims)
-        denial_rate = (total_dec / total_claims) * 100 if total_claims > 0 else 0
+        denial_rate = kpis.rate('Declined')
 
 
         # Create 4-column layout for metric cards# Define CSS for the styled boxes and tooltips
@@ -420,91 +430,100 @@ def display_analysis():
         cols1, cols2 = st.columns(2)
 
     
-        # Group by day and count the occurrences
-        area_chart_count = df.groupby(df["Claim Created Date"].dt.strftime("%Y-%m-%d")).size().reset_index(name='Count')
-        area_chart_amount = df.groupby(df["Claim Created Date"].dt.strftime("%Y-%m-%d"))['Claim Amount'].sum().reset_index(name='Claim Amount')
-
-        # Merge the count and amount data
-        area_chart = pd.merge(area_chart_count, area_chart_amount, on='Claim Created Date')
-
-        # Sort by the PreAuth Created Date
-        area_chart = area_chart.sort_values("Claim Created Date")
-
         with cols1:
             # Create the dual-axis area chart
-            fig2 = make_subplots(specs=[[{"secondary_y": True}]])
+            def build_fig2():
+                # Count claims and sum their amount per period of the selected range, re-summing
+                # the cube's date cells
+                daily = pd.DataFrame({
+                    'Count': filters.rollup("Claim Created Date", how='size'),
+                    'Claim Amount': filters.rollup("Claim Created Date", 'Claim Amount'),
+                })
+                area_chart = timeseries.resample(daily.index, timeseries.pick_grain(date1, date2), daily).reset_index()
+
+                fig2 = make_subplots(specs=[[{"secondary_y": True}]])
+
+                # Add traces
+                fig2.add_trace(
+                    go.Scatter(x=area_chart['Claim Created Date'], y=area_chart['Count'], name="Number of Claims", fill='tozeroy', line=dict(color='#e66c37')),
+                    secondary_y=False,
+                )
 
-            # Add traces
-            fig2.add_trace(
-                go.Scatter(x=area_chart['Claim Created Date'], y=area_chart['Count'], name="Number of Claims", fill='tozeroy', line=dict(color='#e66c37')),
-                secondary_y=False,
-            )
+                fig2.add_trace(
+                    go.Scatter(x=area_chart['Claim Created Date'], y=area_chart['Claim Amount'], name="Claim Amount", fill='tozeroy', line=dict(color='#009DAE')),
+                    secondary_y=True,
+                )
 
-            fig2.add_trace(
-                go.Scatter(x=area_chart['Claim Created Date'], y=area_chart['Claim Amount'], name="Claim Amount", fill='tozeroy', line=dict(color='#009DAE')),
-                secondary_y=True,
-            )
 
 
+                # Set x-axis title
+                fig2.update_xaxes(title_text="Claim Created Date", tickangle=45)  # Rotate x-axis labels to 45 degrees for better readability
 
-            # Set x-axis title
-            fig2.update_xaxes(title_text="Claim Created Date", tickangle=45)  # Rotate x-axis labels to 45 degrees for better readability
+                # Set y-axes titles
+                fig2.update_yaxes(title_text="<b>Number Of Claims</b>", secondary_y=False)
+                fig2.update_yaxes(title_text="<b>Claim Amount</b>", secondary_y=True)
+                return fig2
 
-            # Set y-axes titles
-            fig2.update_yaxes(title_text="<b>Number Of Claims</b>", secondary_y=False)
-            fig2.update_yaxes(title_text="<b>Claim Amount</b>", secondary_y=True)
+            fig2 = filters.figure("Number of Claims and Claim Amount Over Time", build_fig2)
 
             st.markdown('<h3 class="custom-subheader">Number of Claims and Claim Amount Over Time</h3>', unsafe_allow_html=True)
 
             st.plotly_chart(fig2, use_container_width=True)
 
-        # Group data by "Year" and "Month" to calculate total claims and average claim amount
-        yearly_claim_data = df.groupby(['Year'])['Claim Amount'].agg(['mean', 'size']).reset_index()
-
-        # Format numbers with commas and rounding
-        yearly_claim_data['size_formatted'] = yearly_claim_data['size'].apply(lambda x: f'{x:,.0f}')  
-
         # Yearly Chart: Total Claims and Average Claim Amount by Year
         with cols2:
             # Create the grouped bar chart for yearly data
-            fig_yearly_claims = go.Figure()
-
-            # Add trace for Total Claims (Count)
-            fig_yearly_claims.add_trace(go.Bar(
-                x=yearly_claim_data['Year'],
-                y=yearly_claim_data['size'],
-                name='Total Claims',
-                text=yearly_claim_data['size_formatted'],  # Use formatted text
-                textposition='inside',
-                textfont=dict(color='white'),
-                hoverinfo='x+y+name',
-                marker_color=custom_colors[0]
-            ))
+            def build_fig_yearly_claims():
+                # Group data by "Year" to calculate total claims and average claim amount
+                yearly_claim_data = pd.DataFrame({
+                    'mean': filters.rollup(['Year'], 'Claim Amount', 'mean'),
+                    'size': filters.rollup(['Year'], how='size'),
+                }).reset_index()
+
+                # Format numbers with commas and rounding
+                yearly_claim_data['size_formatted'] = yearly_claim_data['size'].apply(lambda x: f'{x:,.0f}')
+
+                fig_yearly_claims = go.Figure()
+
+                # Add trace for Total Claims (Count)
+                fig_yearly_claims.add_trace(go.Bar(
+                    x=yearly_claim_data['Year'],
+                    y=yearly_claim_data['size'],
+                    name='Total Claims',
+                    text=yearly_claim_data['size_formatted'],  # Use formatted text
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                    marker_color=custom_colors[0]
+                ))
 
-            # Add trace for Average Claim Amount
-            fig_yearly_claims.add_trace(go.Bar(
-                x=yearly_claim_data['Year'],
-                y=yearly_claim_data['mean'],  # Correct column name
-                name='Average Claim Amount',
-                text=[f'{value/1e3:.2f}K' for value in yearly_claim_data['mean']],  # Format as millions with 2 decimal places
-                textposition='inside',
-                textfont=dict(color='white'),
-                hoverinfo='x+y+name',
-                marker_color=custom_colors[1]
-            ))
+                # Add trace for Average Claim Amount
+                fig_yearly_claims.add_trace(go.Bar(
+                    x=yearly_claim_data['Year'],
+                    y=yearly_claim_data['mean'],  # Correct column name
+                    name='Average Claim Amount',
+                    text=charts.text_labels(yearly_claim_data['mean'], 1e3, 2, suffix='K'),  # Format as millions with 2 decimal places
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                    marker_color=custom_colors[1]
+                ))
 
-            # Set layout for the yearly chart
-            fig_yearly_claims.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Value",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450,
-                legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
-            )
+                # Set layout for the yearly chart
+                fig_yearly_claims.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Value",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450,
+                    legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
+                )
+                return fig_yearly_claims
+
+            fig_yearly_claims = filters.figure("Yearly Total Claims and Average Claim Amount", build_fig_yearly_claims)
 
             # Display the yearly chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Yearly Total Claims and Average Claim Amount</h3>', unsafe_allow_html=True)
@@ -512,36 +531,35 @@ def display_analysis():
 
         cls1, cls2 = st.columns(2)
 
-        # Group data by "Start Month Year" and "Claim Type" and calculate the average Approved Claim Amount
-        yearly_avg_premium = df.groupby(['Year', 'Claim Status'])['Claim Amount'].mean().unstack().fillna(0)
-
-        # Define custom colors
-
         with cls1:
             # Create the grouped bar chart
-            fig_yearly_avg_premium = go.Figure()
+            def build_fig_yearly_avg_premium():
+                # Group data by "Year" and "Claim Status" and calculate the average Claim Amount
+                yearly_avg_premium = filters.rollup(['Year', 'Claim Status'], 'Claim Amount', 'mean').unstack().fillna(0)
+
+                fig_yearly_avg_premium = go.Figure()
 
-            for idx, Client_Segment in enumerate(yearly_avg_premium.columns):
-                fig_yearly_avg_premium.add_trace(go.Bar(
-                    x=yearly_avg_premium.index,
-                    y=yearly_avg_premium[Client_Segment],
-                    name=Client_Segment,
+                fig_yearly_avg_premium.add_traces(charts.series_traces(
+                    yearly_avg_premium,
+                    colors=custom_colors,  # Cycle through custom colors
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            fig_yearly_avg_premium.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height= 450
-            )
+                fig_yearly_avg_premium.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height= 450
+                )
+                return fig_yearly_avg_premium
+
+            fig_yearly_avg_premium = filters.figure("Average Yearly Claim Amount by Claim Status", build_fig_yearly_avg_premium)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Yearly Claim Amount by Claim Status </h3>', unsafe_allow_html=True)
@@ -550,154 +568,155 @@ def display_analysis():
     
         with cls2:
 
-            # Group the data by Claim Type and calculate the number of claims and total claim amount
-            df_claims_grouped = df.groupby('Claim Type').agg(
-                Total_Claims=pd.NamedAgg(column='Claim ID', aggfunc='count'),  # Count the number of claims per Claim Type
-                Total_Claim_Amount=pd.NamedAgg(column='Claim Amount', aggfunc='mean')  # Sum the claim amounts per Claim Type
-            ).reset_index()
-
             # Create a scatter plot for Number of Claims vs Claim Amount by Claim Type
-            fig_claims_vs_amount = go.Figure()
-
-            # Loop over the grouped data to add scatter points for each claim type with custom colors
-            for idx, claim_type in enumerate(df_claims_grouped['Claim Type']):
-                fig_claims_vs_amount.add_trace(go.Scatter(
-                    x=[df_claims_grouped.iloc[idx]['Total_Claims']],  # x-axis will be the Number of Claims for this claim type
-                    y=[df_claims_grouped.iloc[idx]['Total_Claim_Amount']],  # y-axis will be the Claim Amount for this claim type
-                    mode='markers',
-                    name=claim_type,  # Label the point with the claim type
-                    marker=dict(
-                        color=custom_colors[idx % len(custom_colors)],  # Cycle through custom colors based on the index
-                        size=10
-                    ),
-                    text=f"Claim Type: {claim_type}",  # Text shown on hover
-                    hoverinfo='text+x+y'  # Show claim type and data when hovering
-                ))
+            def build_fig_claims_vs_amount():
+                # Group the data by Claim Type and calculate the number of claims and average claim amount
+                df_claims_grouped = df.groupby('Claim Type', observed=True).agg(
+                    Total_Claims=pd.NamedAgg(column='Claim ID', aggfunc='count'),  # Count the number of claims per Claim Type
+                    Total_Claim_Amount=pd.NamedAgg(column='Claim Amount', aggfunc='mean')  # Average the claim amounts per Claim Type
+                ).reset_index()
+
+                fig_claims_vs_amount = go.Figure()
+
+                # Loop over the grouped data to add scatter points for each claim type with custom colors
+                for idx, claim_type in enumerate(df_claims_grouped['Claim Type']):
+                    fig_claims_vs_amount.add_trace(go.Scatter(
+                        x=[df_claims_grouped.iloc[idx]['Total_Claims']],  # x-axis will be the Number of Claims for this claim type
+                        y=[df_claims_grouped.iloc[idx]['Total_Claim_Amount']],  # y-axis will be the Claim Amount for this claim type
+                        mode='markers',
+                        name=claim_type,  # Label the point with the claim type
+                        marker=dict(
+                            color=custom_colors[idx % len(custom_colors)],  # Cycle through custom colors based on the index
+                            size=10
+                        ),
+                        text=f"Claim Type: {claim_type}",  # Text shown on hover
+                        hoverinfo='text+x+y'  # Show claim type and data when hovering
+                    ))
 
-            # Update layout
-            fig_claims_vs_amount.update_layout(
-                yaxis_title="Claim Amount (M)",  # Label for the y-axis
-                xaxis_title="Number of Claims",  # Label for the x-axis
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-            )
+                # Update layout
+                fig_claims_vs_amount.update_layout(
+                    yaxis_title="Claim Amount (M)",  # Label for the y-axis
+                    xaxis_title="Number of Claims",  # Label for the x-axis
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                )
+                return fig_claims_vs_amount
+
+            fig_claims_vs_amount = filters.figure("Number of Claims vs Claim Amount by Claim Type", build_fig_claims_vs_amount)
 
             st.markdown('<h3 class="custom-subheader">Number of Claims vs Claim Amount by Claim Type</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_claims_vs_amount, use_container_width=True)
 
 
-        # Group data by "Start Month" and "Channel" and sum the Approved Claim Amount sum
-        monthly_premium = df.groupby(['Month', 'Claim Status'])['Claim Amount'].mean().unstack().fillna(0)
+        with cls2:
 
-        # Group data by "Start Month" to count the number of sales
-        monthly_sales_count = df.groupby(['Month']).size()
+            def build_fig_monthly_premium():
+                # Group data by "Month" and "Claim Status" and average the Claim Amount
+                monthly_premium = filters.rollup(['Month', 'Claim Status'], 'Claim Amount', 'mean').unstack().fillna(0)
 
-        # Create the layout columns
+                fig_monthly_premium = go.Figure()
 
-        with cls2:
+                fig_monthly_premium.add_traces(charts.series_traces(
+                    monthly_premium,
+                    colors=custom_colors,  # Cycle through custom colors
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                ))
 
-            fig_monthly_premium = go.Figure()
-
-            for idx, Client_Segment in enumerate(monthly_premium.columns):
-                    fig_monthly_premium.add_trace(go.Bar(
-                        x=monthly_premium.index,
-                        y=monthly_premium[Client_Segment],
-                        name=Client_Segment,
-                        textposition='inside',
-                        textfont=dict(color='white'),
-                        hoverinfo='x+y+name',
-                        marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
-                    ))
 
+                    # Set layout for the Approved Claim Amount sum chart
+                fig_monthly_premium.update_layout(
+                        barmode='group',  # Grouped bar chart
+                        xaxis_title="Month",
+                        yaxis_title="Average Claim Amount",
+                        font=dict(color='Black'),
+                        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                        margin=dict(l=0, r=0, t=30, b=50),
+                    )
+                return fig_monthly_premium
 
-                # Set layout for the Approved Claim Amount sum chart
-            fig_monthly_premium.update_layout(
-                    barmode='group',  # Grouped bar chart
-                    xaxis_title="Month",
-                    yaxis_title="Average Claim Amount",
-                    font=dict(color='Black'),
-                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                    margin=dict(l=0, r=0, t=30, b=50),
-                )
+            fig_monthly_premium = filters.figure("Average Monthly Claim Amount by Claim Status", build_fig_monthly_premium)
 
                 # Display the Approved Claim Amount sum chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Avearge Monthly Claim Amount by Claim Status</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_premium, use_container_width=True)
 
 
-        # Group by Source and calculate the total number of claims and total claim amount
-        df_source_grouped = df.groupby('Month').agg(
-            Total_Claims=pd.NamedAgg(column='Claim ID', aggfunc='count'),
-            Total_Claim_Amount=pd.NamedAgg(column='Claim Amount', aggfunc='sum')
-        ).reset_index()
-
-        # Sort the df_source_grouped by Total_Claims in descending order to find the most popular provider type
-        df_source_grouped = df_source_grouped.sort_values(by='Total_Claims', ascending=False)
-
-        # Get the most popular provider type
-        most_popular_provider = df_source_grouped.iloc[0]['Month'] if not df_source_grouped.empty else "No Data"
-
-        # Format Claim Amount with millions
-        df_source_grouped['Claim_Amount_Formatted'] = df_source_grouped['Total_Claim_Amount'].apply(lambda x: f'{x/1e6:.0f}M')
-
         # Create the dual-axis chart (bar for claim amount, line for number of claims)
         with cls1:
-            fig1 = go.Figure()
-
-            # Add line for Number of Claims (using the left y-axis)
-            fig1.add_trace(go.Scatter(
-                x=df_source_grouped['Month'],
-                y=df_source_grouped['Total_Claims'],
-                name='Number of Claims',
-                mode='lines+markers',  
-                text=df_source_grouped['Total_Claims'],  # Display number of claims as text
-                textposition='top center',
-                textfont=dict(color='black', size=12),
-                line=dict(color="#e66c37", width=2),
-                marker=dict(size=8, color="#e66c37"),
-                yaxis='y1'  # Assigning to the first y-axis
-            ))
+            def build_fig1():
+                # Group by Month and calculate the total number of claims and total claim amount
+                df_source_grouped = df.groupby('Month', observed=True).agg(
+                    Total_Claims=pd.NamedAgg(column='Claim ID', aggfunc='count'),
+                    Total_Claim_Amount=pd.NamedAgg(column='Claim Amount', aggfunc='sum')
+                ).reset_index()
+
+                # Sort the df_source_grouped by Total_Claims in descending order
+                df_source_grouped = df_source_grouped.sort_values(by='Total_Claims', ascending=False)
+
+                # Format Claim Amount with millions
+                df_source_grouped['Claim_Amount_Formatted'] = charts.text_labels(df_source_grouped['Total_Claim_Amount'], 1e6, suffix='M')
+
+                fig1 = go.Figure()
+
+                # Add line for Number of Claims (using the left y-axis)
+                fig1.add_trace(go.Scatter(
+                    x=df_source_grouped['Month'],
+                    y=df_source_grouped['Total_Claims'],
+                    name='Number of Claims',
+                    mode='lines+markers',  
+                    text=df_source_grouped['Total_Claims'],  # Display number of claims as text
+                    textposition='top center',
+                    textfont=dict(color='black', size=12),
+                    line=dict(color="#e66c37", width=2),
+                    marker=dict(size=8, color="#e66c37"),
+                    yaxis='y1'  # Assigning to the first y-axis
+                ))
 
-            # Add bars for Total Claim Amount (using the right y-axis)
-            fig1.add_trace(go.Bar(
-                x=df_source_grouped['Month'],
-                y=df_source_grouped['Total_Claim_Amount'],
-                name='Claim Amount',
-                text=df_source_grouped['Claim_Amount_Formatted'],  # Use formatted text
-                textposition='inside',
-                textfont=dict(color='white'),
-                marker_color="#009DAE",
-                yaxis='y2'  # Assigning to the second y-axis
-            ))
+                # Add bars for Total Claim Amount (using the right y-axis)
+                fig1.add_trace(go.Bar(
+                    x=df_source_grouped['Month'],
+                    y=df_source_grouped['Total_Claim_Amount'],
+                    name='Claim Amount',
+                    text=df_source_grouped['Claim_Amount_Formatted'],  # Use formatted text
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    marker_color="#009DAE",
+                    yaxis='y2'  # Assigning to the second y-axis
+                ))
 
-            # Update layout for the dual-axis chart
-            fig1.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Month",
-                yaxis=dict(
-                    title="Number of Claims",
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12),
-                    side='left'  # Position the first y-axis on the left
-                ),
-                yaxis2=dict(
-                    title="Claim Amount",
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12),
-                    showline=False,  # Hides the axis line
-                    overlaying='y',  # Overlay the second y-axis over the first
-                    side='right',  # Position the second y-axis on the right
-                    showgrid=False  # Disable gridlines on the right y-axis
-                ),
-                font=dict(color='Black'),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=500,
-                legend=dict(title="Metrics", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
+                # Update layout for the dual-axis chart
+                fig1.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Month",
+                    yaxis=dict(
+                        title="Number of Claims",
+                        title_font=dict(size=14),
+                        tickfont=dict(size=12),
+                        side='left'  # Position the first y-axis on the left
+                    ),
+                    yaxis2=dict(
+                        title="Claim Amount",
+                        title_font=dict(size=14),
+                        tickfont=dict(size=12),
+                        showline=False,  # Hides the axis line
+                        overlaying='y',  # Overlay the second y-axis over the first
+                        side='right',  # Position the second y-axis on the right
+                        showgrid=False  # Disable gridlines on the right y-axis
+                    ),
+                    font=dict(color='Black'),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=500,
+                    legend=dict(title="Metrics", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                return fig1
+
+            fig1 = filters.figure("Monthly Claims & Total Claim Amount Distribution", build_fig1)
 
             st.markdown('<h3 class="custom-subheader">Monthly Claims & Total Claim Amount Distribution</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig1, use_container_width=True)
@@ -709,36 +728,44 @@ def display_analysis():
         # Create the layout columns
         cls1, cls2 = st.columns(2)
         
-        # Calculate the Approved Claim Amount by Client Segment
-        int_owner = df.groupby("Claim Type")["Claim Amount"].sum().reset_index()
-        int_owner.columns = ["Claim Type", "Claim Amount"]    
-
         with cls1:
             # Display the header
             st.markdown('<h3 class="custom-subheader">Total Claim Amount by Claim Type</h3>', unsafe_allow_html=True)
 
 
             # Create a donut chart
-            fig = px.pie(int_owner, names="Claim Type", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
-            fig.update_traces(textposition='inside', textinfo='value+percent')
-            fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+            def build_fig():
+                # Total the Claim Amount by Claim Type
+                int_owner = filters.rollup("Claim Type", "Claim Amount").reset_index()
+                int_owner.columns = ["Claim Type", "Claim Amount"]
+
+                fig = px.pie(int_owner, names="Claim Type", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
+                fig.update_traces(textposition='inside', textinfo='value+percent')
+                fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+                return fig
+
+            fig = filters.figure("Total Claim Amount by Claim Type", build_fig)
 
             # Display the chart in Streamlit
             st.plotly_chart(fig, use_container_width=True)
 
-    # Calculate the Approved Claim Amount by Client Segment
-        int_owner = df.groupby("Product")["Claim Amount"].sum().reset_index()
-        int_owner.columns = ["Product", "Claim Amount"]    
-
         with cls2:
             # Display the header
             st.markdown('<h3 class="custom-subheader">Total Claim Amount by Product</h3>', unsafe_allow_html=True)
 
 
             # Create a donut chart
-            fig = px.pie(int_owner, names="Product", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
-            fig.update_traces(textposition='inside', textinfo='value+percent')
-            fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+            def build_fig():
+                # Total the Claim Amount by Product
+                int_owner = filters.rollup("Product", "Claim Amount").reset_index()
+                int_owner.columns = ["Product", "Claim Amount"]
+
+                fig = px.pie(int_owner, names="Product", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
+                fig.update_traces(textposition='inside', textinfo='value+percent')
+                fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+                return fig
+
+            fig = filters.figure("Total Claim Amount by Product", build_fig)
 
             # Display the chart in Streamlit
             st.plotly_chart(fig, use_container_width=True)
@@ -747,14 +774,6 @@ def display_analysis():
         # Create the layout columns
         cls1, cls2 = st.columns(2)
 
-        # Group by Diagnosis: Sum Claim Amount & Count Claims
-        df_grouped_diag = df.groupby('Diagnosis').agg({'Claim Amount': 'sum', 'ICD-10 Code': 'count'}).nlargest(10, 'Claim Amount').reset_index()
-        df_grouped_diag.rename(columns={'ICD-10 Code': 'Number of Claims'}, inplace=True)
-
-        # Group by ICD-10 Code: Sum Claim Amount & Count Claims
-        df_grouped_icd = df.groupby('ICD-10 Code').agg({'Claim Amount': 'sum', 'Diagnosis': 'count'}).nlargest(10, 'Claim Amount').reset_index()
-        df_grouped_icd.rename(columns={'Diagnosis': 'Number of Claims'}, inplace=True)
-
         # Function to create a dual-axis chart
         def create_dual_axis_chart(df, x_col, y1_col, y2_col, x_title):
             fig = go.Figure()
@@ -763,7 +782,7 @@ def display_analysis():
             fig.add_trace(go.Bar(
                 x=df[x_col],
                 y=df[y1_col],
-                text=[f'{value/1e6:.0f}M' for value in df[y1_col]],
+                text=charts.text_labels(df[y1_col], 1e6, suffix='M'),
                 textposition='auto',
                 marker_color="#009DAE",
                 name="Claim Amount",
@@ -793,160 +812,171 @@ def display_analysis():
 
         # Diagnosis Chart
         with cls1:
+            def build_fig_diagnoses():
+                # Group by Diagnosis: Sum Claim Amount & Count Claims with an ICD-10 Code
+                df_grouped_diag = df.groupby('Diagnosis', observed=True).agg({'Claim Amount': 'sum', 'ICD-10 Code': 'count'}).nlargest(10, 'Claim Amount').reset_index()
+                df_grouped_diag.rename(columns={'ICD-10 Code': 'Number of Claims'}, inplace=True)
+                return create_dual_axis_chart(df_grouped_diag, "Diagnosis", "Claim Amount", "Number of Claims", "Diagnosis")
+
             st.markdown('<h3 class="custom-subheader">Top 10 Diagnoses by Claim Amount</h3>', unsafe_allow_html=True)
-            st.plotly_chart(create_dual_axis_chart(df_grouped_diag, "Diagnosis", "Claim Amount", "Number of Claims", "Diagnosis"), use_container_width=True)
+            st.plotly_chart(filters.figure("Top 10 Diagnoses by Claim Amount and Claims", build_fig_diagnoses), use_container_width=True)
 
         # ICD-10 Chart
         with cls2:
+            def build_fig_icd_codes():
+                # Group by ICD-10 Code: Sum Claim Amount & Count Claims with a Diagnosis
+                df_grouped_icd = df.groupby('ICD-10 Code', observed=True).agg({'Claim Amount': 'sum', 'Diagnosis': 'count'}).nlargest(10, 'Claim Amount').reset_index()
+                df_grouped_icd.rename(columns={'Diagnosis': 'Number of Claims'}, inplace=True)
+                return create_dual_axis_chart(df_grouped_icd, "ICD-10 Code", "Claim Amount", "Number of Claims", "ICD-10 Code")
+
             st.markdown('<h3 class="custom-subheader">Top 10 ICD-10 Codes by Claim Amount</h3>', unsafe_allow_html=True)
-            st.plotly_chart(create_dual_axis_chart(df_grouped_icd, "ICD-10 Code", "Claim Amount", "Number of Claims", "ICD-10 Code"), use_container_width=True)
+            st.plotly_chart(filters.figure("Top 10 ICD-10 Codes by Claim Amount and Claims", build_fig_icd_codes), use_container_width=True)
 
 
 
 
-        # Group by Source and calculate the total number of claims and total claim amount
-        df_source_grouped = df.groupby('Source').agg(
+        # Group by Source and calculate the total number of claims and total claim amount,
+        # sorted by Total_Claims in descending order to find the most popular provider type
+        df_source_grouped = filters.memo("Most Popular Provider Type", lambda frame: frame.groupby('Source', observed=True).agg(
             Total_Claims=pd.NamedAgg(column='Claim ID', aggfunc='count'),
             Total_Claim_Amount=pd.NamedAgg(column='Claim Amount', aggfunc='sum')
-        ).reset_index()
-
-        # Sort the df_source_grouped by Total_Claims in descending order to find the most popular provider type
-        df_source_grouped = df_source_grouped.sort_values(by='Total_Claims', ascending=False)
+        ).reset_index().sort_values(by='Total_Claims', ascending=False))
 
         # Get the most popular provider type
         most_popular_provider = df_source_grouped.iloc[0]['Source'] if not df_source_grouped.empty else "No Data"
 
-        # Format Claim Amount with millions
-        df_source_grouped['Claim_Amount_Formatted'] = df_source_grouped['Total_Claim_Amount'].apply(lambda x: f'{x/1e6:.0f}M')
-
         # Create the dual-axis chart (bar for claim amount, line for number of claims)
         with cls1:
-            fig1 = go.Figure()
-
-            # Add line for Number of Claims (using the left y-axis)
-            fig1.add_trace(go.Scatter(
-                x=df_source_grouped['Source'],
-                y=df_source_grouped['Total_Claims'],
-                name='Number of Claims',
-                mode='lines+markers',  # Show lines, markers, and text
-                text=df_source_grouped['Total_Claims'],  # Display number of claims as text
-                textposition='top center',
-                textfont=dict(color='black', size=12),
-                line=dict(color="#e66c37", width=2),
-                marker=dict(size=8, color="#e66c37"),
-                yaxis='y1'  # Assigning to the first y-axis
-            ))
+            def build_fig1():
+                # Format Claim Amount with millions
+                claim_amount_formatted = charts.text_labels(df_source_grouped['Total_Claim_Amount'], 1e6, suffix='M')
+
+                fig1 = go.Figure()
+
+                # Add line for Number of Claims (using the left y-axis)
+                fig1.add_trace(go.Scatter(
+                    x=df_source_grouped['Source'],
+                    y=df_source_grouped['Total_Claims'],
+                    name='Number of Claims',
+                    mode='lines+markers',  # Show lines, markers, and text
+                    text=df_source_grouped['Total_Claims'],  # Display number of claims as text
+                    textposition='top center',
+                    textfont=dict(color='black', size=12),
+                    line=dict(color="#e66c37", width=2),
+                    marker=dict(size=8, color="#e66c37"),
+                    yaxis='y1'  # Assigning to the first y-axis
+                ))
 
-            # Add bars for Total Claim Amount (using the right y-axis)
-            fig1.add_trace(go.Bar(
-                x=df_source_grouped['Source'],
-                y=df_source_grouped['Total_Claim_Amount'],
-                name='Claim Amount',
-                text=df_source_grouped['Claim_Amount_Formatted'],  # Use formatted text
-                textposition='inside',
-                textfont=dict(color='white'),
-                marker_color="#009DAE",
-                yaxis='y2'  # Assigning to the second y-axis
-            ))
+                # Add bars for Total Claim Amount (using the right y-axis)
+                fig1.add_trace(go.Bar(
+                    x=df_source_grouped['Source'],
+                    y=df_source_grouped['Total_Claim_Amount'],
+                    name='Claim Amount',
+                    text=claim_amount_formatted,  # Use formatted text
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    marker_color="#009DAE",
+                    yaxis='y2'  # Assigning to the second y-axis
+                ))
 
-            # Update layout for the dual-axis chart
-            fig1.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Provider Type",
-                yaxis=dict(
-                    title="Number of Claims",
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12),
-                    side='left'  # Position the first y-axis on the left
-                ),
-                yaxis2=dict(
-                    title="Claim Amount",
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12),
-                    overlaying='y',  # Overlay the second y-axis over the first
-                    side='right',  # Position the second y-axis on the right
-                    showgrid=False  # Disable gridlines on the right y-axis
-                ),
-                font=dict(color='Black'),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=500,
-                legend=dict(title="Metrics", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
+                # Update layout for the dual-axis chart
+                fig1.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Provider Type",
+                    yaxis=dict(
+                        title="Number of Claims",
+                        title_font=dict(size=14),
+                        tickfont=dict(size=12),
+                        side='left'  # Position the first y-axis on the left
+                    ),
+                    yaxis2=dict(
+                        title="Claim Amount",
+                        title_font=dict(size=14),
+                        tickfont=dict(size=12),
+                        overlaying='y',  # Overlay the second y-axis over the first
+                        side='right',  # Position the second y-axis on the right
+                        showgrid=False  # Disable gridlines on the right y-axis
+                    ),
+                    font=dict(color='Black'),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=500,
+                    legend=dict(title="Metrics", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                return fig1
+
+            fig1 = filters.figure("Most Popular Provider Type", build_fig1)
 
             # Display the chart in Streamlit
             st.markdown(f'<h3 class="custom-subheader">Most Popular Provider Type: {most_popular_provider}</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig1, use_container_width=True)
 
 
-        # Group by Employer Name and Claim Status, then sum the Claim Amount
-        df_grouped = df.groupby(['Employer Name', 'Claim Status'])['Claim Amount'].sum().reset_index()
-
-        # Get the top 15 employers by total Claim Amount
-        top_15_clients = df_grouped.groupby('Employer Name')['Claim Amount'].sum().nlargest(15).reset_index()
-
-        # Filter the original DataFrame to include only the top 15 employers
-        client_df = df_grouped[df_grouped['Employer Name'].isin(top_15_clients['Employer Name'])]
-
-        # Sort the client_df by Claim Amount in descending order
-        client_df = client_df.sort_values(by='Claim Amount', ascending=False)
-
         with cls2:
             # Create the stacked bar chart
-            fig = go.Figure()
+            def build_fig():
+                # Get the top 15 employers by total Claim Amount, broken down by Claim Status
+                cells = filters.rollup(['Employer Name', 'Claim Status'], 'Claim Amount')
+                client_matrix = ranking.top_k_breakdown(cells.index.get_level_values(0), cells.index.get_level_values(1), cells, 15)
 
-            # Add bars for each Claim Status
-            for idx, claim_status in enumerate(client_df['Claim Status'].unique()):
-                claim_status_data = client_df[client_df['Claim Status'] == claim_status]
-                fig.add_trace(go.Bar(
-                    x=claim_status_data['Employer Name'],
-                    y=claim_status_data['Claim Amount'],
-                    name=claim_status,
-                    text=[f'{value/1e6:.0f}M' for value in claim_status_data['Claim Amount']],
+                fig = go.Figure()
+
+                # Add bars for each Claim Status, largest amounts first
+                fig.add_traces(charts.series_traces(
+                    client_matrix,
+                    sort=True,
+                    colors=custom_colors,  # Cycle through colors
+                    text=lambda values: charts.text_labels(values, 1e6, suffix='M'),
                     textposition='auto',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through colors
                 ))
 
-            fig.update_layout(
-                barmode='stack',
-                yaxis_title="Claim Amount",
-                xaxis_title="Employer Name",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50)
-            )
+                fig.update_layout(
+                    barmode='stack',
+                    yaxis_title="Claim Amount",
+                    xaxis_title="Employer Name",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50)
+                )
+                return fig
+
+            fig = filters.figure("Top 15 Clients by Claim Amount and Claim Status", build_fig)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 15 Clients by Claim Amount and Claim Status</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig, use_container_width=True)
 
-        # Group by ICD-10 Code and sum the Claim Amount
-        df_icd_grouped = df.groupby('ICD-10 Code')['Claim Amount'].sum().nlargest(10).reset_index()
-
-        # Sort the df_icd_grouped by Claim Amount in descending order
-        df_icd_grouped = df_icd_grouped.sort_values(by='Claim Amount', ascending=False)
-
         with cls1:
             # Create the bar chart
-            fig1 = go.Figure()
+            def build_fig1():
+                # Group by ICD-10 Code and sum the Claim Amount, from the code rollup
+                df_icd_grouped = filters.rollup('ICD-10 Code', 'Claim Amount').nlargest(10).reset_index()
 
-            # Add bars for each ICD-10 Code
-            fig1.add_trace(go.Bar(
-                x=df_icd_grouped['ICD-10 Code'],
-                y=df_icd_grouped['Claim Amount'],
-                text=[f'{value/1e6:.0f}M' for value in df_icd_grouped['Claim Amount']],
-                textposition='auto',
-                marker_color="#009DAE"
-            ))
+                # Sort the df_icd_grouped by Claim Amount in descending order
+                df_icd_grouped = df_icd_grouped.sort_values(by='Claim Amount', ascending=False)
 
-            fig1.update_layout(
-                yaxis_title="Claim Amount",
-                xaxis_title="ICD-10 Code",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50)
-            )
+                fig1 = go.Figure()
+
+                # Add bars for each ICD-10 Code
+                fig1.add_trace(go.Bar(
+                    x=df_icd_grouped['ICD-10 Code'],
+                    y=df_icd_grouped['Claim Amount'],
+                    text=charts.text_labels(df_icd_grouped['Claim Amount'], 1e6, suffix='M'),
+                    textposition='auto',
+                    marker_color="#009DAE"
+                ))
+
+                fig1.update_layout(
+                    yaxis_title="Claim Amount",
+                    xaxis_title="ICD-10 Code",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50)
+                )
+                return fig1
+
+            fig1 = filters.figure("Top 10 ICD-10 Codes by Claim Amount", build_fig1)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 ICD-10 Codes by Claim Amount</h3>', unsafe_allow_html=True)
@@ -955,110 +985,167 @@ def display_analysis():
 
 
 
-        # Group by Provider Name and Source, then sum the Claim Amount
-        df_grouped = df.groupby(['Provider Name', 'Source'])['Claim Amount'].sum().reset_index()
+        with cls2:
+            # Create the stacked bar chart
+            def build_fig():
+                # Get the top 15 providers by total Claim Amount, broken down by Source
+                cells = filters.rollup(['Provider Name', 'Source'], 'Claim Amount')
+                provider_matrix = ranking.top_k_breakdown(cells.index.get_level_values(0), cells.index.get_level_values(1), cells, 15)
 
-        # Get the top 15 providers by total Claim Amount
-        top_15_providers = df_grouped.groupby('Provider Name')['Claim Amount'].sum().nlargest(15).reset_index()
+                fig = go.Figure()
 
-        # Filter the original DataFrame to include only the top 15 providers
-        client_df = df_grouped[df_grouped['Provider Name'].isin(top_15_providers['Provider Name'])]
+                # Add bars for each Source, largest amounts first
+                fig.add_traces(charts.series_traces(
+                    provider_matrix,
+                    sort=True,
+                    colors=custom_colors,  # Cycle through colors
+                    text=lambda values: charts.text_labels(values, 1e6, suffix='M'),
+                    textposition='auto',
+                ))
 
-        # Sort the client_df by Claim Amount in descending order
-        client_df = client_df.sort_values(by='Claim Amount', ascending=False)
+                fig.update_layout(
+                    barmode='stack',
+                    yaxis_title="Claim Amount",
+                    xaxis_title="Provider Name",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50)
+                )
+                return fig
 
-        with cls2:
-            # Create the stacked bar chart
-            fig = go.Figure()
+            fig = filters.figure("Top 15 Providers by Claim Amount and Source", build_fig)
+
+            # Display the chart in Streamlit
+            st.markdown('<h3 class="custom-subheader">Top 15 Providers by Claim Amount and Source</h3>', unsafe_allow_html=True)
+            st.plotly_chart(fig, use_container_width=True)
+
+        with cls1:
+            # Create the bar chart
+            def build_fig():
+                # Group by Employer Name and sum the Claim Amount
+                df_grouped = filters.rollup('Employer Name', 'Claim Amount').nlargest(10).reset_index()
 
-            # Add bars for each Source
-            for idx, source in enumerate(client_df['Source'].unique()):
-                source_data = client_df[client_df['Source'] == source]
+                # Sort the df_grouped by Claim Amount in descending order
+                df_grouped = df_grouped.sort_values(by='Claim Amount', ascending=False)
+
+                fig = go.Figure()
+
+                # Add bars for each Employer
                 fig.add_trace(go.Bar(
-                    x=source_data['Provider Name'],
-                    y=source_data['Claim Amount'],
-                    name=source,
-                    text=[f'{value/1e6:.0f}M' for value in source_data['Claim Amount']],
+                    x=df_grouped['Employer Name'],
+                    y=df_grouped['Claim Amount'],
+                    text=charts.text_labels(df_grouped['Claim Amount'], 1e6, suffix='M'),
                     textposition='auto',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through colors
+                    marker_color="#009DAE"  # Use custom colors
                 ))
 
-            fig.update_layout(
-                barmode='stack',
-                yaxis_title="Claim Amount",
-                xaxis_title="Provider Name",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50)
-            )
+                fig.update_layout(
+                    yaxis_title="Claim Amount",
+                    xaxis_title="Employer Name",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50)
+                )
+                return fig
+
+            fig = filters.figure("Top 10 Employer Groups by Claim Amount", build_fig)
 
             # Display the chart in Streamlit
-            st.markdown('<h3 class="custom-subheader">Top 15 Providers by Claim Amount and Source</h3>', unsafe_allow_html=True)
+            st.markdown('<h3 class="custom-subheader">Top 10 Employer Groups by Claim Amount</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig, use_container_width=True)
 
-        # Group by Employer Name and sum the Claim Amount
-        df_grouped = df.groupby('Employer Name')['Claim Amount'].sum().nlargest(10).reset_index()
 
-        # Sort the df_grouped by Claim Amount in descending order
-        df_grouped = df_grouped.sort_values(by='Claim Amount', ascending=False)
+        with cls2:
+                # Create the bar chart
+                def build_fig():
+                    # Group by Client Name and sum the Total Amount
+                    df_grouped = filters.rollup('Provider Name', 'Claim Amount').nlargest(10).reset_index()
+
+                    # Sort the client_df by Total Amount in descending order
+                    client_df = df_grouped.sort_values(by='Claim Amount', ascending=False)
+
+                    fig = go.Figure()
+
+                    # Add bars for each Client
+                    fig.add_trace(go.Bar(
+                        x=client_df['Provider Name'],
+                        y=client_df['Claim Amount'],
+                        text=charts.text_labels(client_df['Claim Amount'], 1e6, suffix='M'),
+                        textposition='auto',
+                        marker_color="#009DAE"
+                    ))
+
+                    fig.update_layout(
+                        yaxis_title="Claim Amount",
+                        xaxis_title="Provider Name",
+                        font=dict(color='Black'),
+                        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                        margin=dict(l=0, r=0, t=30, b=50)
+                    )
+                    return fig
+
+                fig = filters.figure("Top 10 Popular Service Providers by Claim Amount", build_fig)
+
+
+                # Display the chart in Streamlit
+                st.markdown('<h3 class="custom-subheader">Top 10 Popular Service Providers by Claim Amount</h3>', unsafe_allow_html=True)
+                st.plotly_chart(fig, use_container_width=True)
+
+        # ICD-10 drill-down: claim amount by chapter, by block within a chosen chapter and
+        # by code within a chosen block. Each choice narrows the filter chain, which keeps
+        # the ICD-10 rollups in step, so every chart is summed from the rollup of its level.
+        st.markdown('<h3 class="custom-subheader">ICD-10 Drill-down</h3>', unsafe_allow_html=True)
+
+        # Function to create a bar chart of the 10 values of an ICD-10 level with the largest Claim Amount
+        def create_icd_level_chart(level):
+            df_level = filters.rollup(level, 'Claim Amount').nlargest(10).reset_index()
 
-        with cls1:
-            # Create the bar chart
             fig = go.Figure()
 
-            # Add bars for each Employer
             fig.add_trace(go.Bar(
-                x=df_grouped['Employer Name'],
-                y=df_grouped['Claim Amount'],
-                text=[f'{value/1e6:.0f}M' for value in df_grouped['Claim Amount']],
+                x=df_level[level],
+                y=df_level['Claim Amount'],
+                text=charts.text_labels(df_level['Claim Amount'], 1e6, suffix='M'),
                 textposition='auto',
-                marker_color="#009DAE"  # Use custom colors
+                marker_color="#009DAE"
             ))
 
             fig.update_layout(
                 yaxis_title="Claim Amount",
-                xaxis_title="Employer Name",
+                xaxis_title=level,
                 font=dict(color='Black'),
                 xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
                 yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
                 margin=dict(l=0, r=0, t=30, b=50)
             )
+            return fig
 
-            # Display the chart in Streamlit
-            st.markdown('<h3 class="custom-subheader">Top 10 Employer Groups by Claim Amount</h3>', unsafe_allow_html=True)
-            st.plotly_chart(fig, use_container_width=True)
-
-
-        # Group by Client Name and sum the Total Amount
-        df_grouped = df.groupby('Provider Name')['Claim Amount'].sum().nlargest(10).reset_index()
+        cls1, cls2, cls3 = st.columns(3)
 
-        # Sort the client_df by Total Amount in descending order
-        client_df = df_grouped.sort_values(by='Claim Amount', ascending=False)
+        with cls1:
+            st.markdown('<h3 class="custom-subheader">Top 10 ICD-10 Chapters by Claim Amount</h3>', unsafe_allow_html=True)
+            st.plotly_chart(filters.figure("Top 10 ICD-10 Chapters by Claim Amount", lambda: create_icd_level_chart('ICD-10 Chapter')), use_container_width=True, key="analysis_icd_chapters_chart")
 
         with cls2:
-                # Create the bar chart
-                fig = go.Figure()
+            chapter = st.selectbox("Select ICD-10 Chapter", options=icd10.CHAPTER_LABELS, index=None, key="analysis_icd_chapter_selectbox")
+            if chapter:
+                filters.isin('ICD-10 Chapter', [chapter])
 
-                # Add bars for each Client
-                fig.add_trace(go.Bar(
-                    x=client_df['Provider Name'],
-                    y=client_df['Claim Amount'],
-                    text=[f'{value/1e6:.0f}M' for value in client_df['Claim Amount']],
-                    textposition='auto',
-                    marker_color="#009DAE"
-                ))
+            st.markdown('<h3 class="custom-subheader">Top 10 ICD-10 Blocks by Claim Amount</h3>', unsafe_allow_html=True)
+            st.plotly_chart(filters.figure("Top 10 ICD-10 Blocks by Claim Amount", lambda: create_icd_level_chart('ICD-10 Block')), use_container_width=True, key="analysis_icd_blocks_chart")
 
-                fig.update_layout(
-                    yaxis_title="Claim Amount",
-                    xaxis_title="Provider Name",
-                    font=dict(color='Black'),
-                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                    margin=dict(l=0, r=0, t=30, b=50)
-                )
+        with cls3:
+            blocks = icd10.chapter_blocks(chapter) if chapter else icd10.BLOCK_LABELS
 
+            # A block chosen under another chapter no longer applies
+            if st.session_state.get("analysis_icd_block_selectbox") not in blocks:
+                st.session_state.pop("analysis_icd_block_selectbox", None)
+            block = st.selectbox("Select ICD-10 Block", options=blocks, index=None, key="analysis_icd_block_selectbox")
+            if block:
+                filters.isin('ICD-10 Block', [block])
 
-                # Display the chart in Streamlit
-                st.markdown('<h3 class="custom-subheader">Top 10 Popular Service Providers by Claim Amount</h3>', unsafe_allow_html=True)
-                st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+            st.markdown('<h3 class="custom-subheader">Top 10 ICD-10 Codes of the Block by Claim Amount</h3>', unsafe_allow_html=True)
+            st.plotly_chart(filters.figure("Top 10 ICD-10 Codes of the Block by Claim Amount", lambda: create_icd_level_chart('ICD-10 Code')), use_container_width=True, key="analysis_icd_codes_chart")
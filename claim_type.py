@@ -10,6 +10,34 @@ from itertools import chain
 from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 
+import charts
+import timeseries
+from data_loader import CLAIMS_DATASET, claims_version, compact_categories, load_claims, load_cube
+from facets import Facet, state_keys
+from filter_cache import FilterChain
+from kpis import ClaimKPIs
+
+
+# The filter widgets of the view, in the order their filters are applied (see facets.Facet)
+FACETS = [
+    Facet("filter_source_2025", 'Source', cascade=False),
+    Facet("filter_diag_code_2025", 'ICD-10 Code', cascade=False),
+    Facet("filter_employer_2025", 'Employer Name', cascade=False),
+    Facet("filter_provider_2025", 'Provider Name', cascade=False),
+    Facet("year_selector_multiselector", 'Year', default=lambda years: years[-1:]),
+    Facet("month_selector_multiselector", 'Month', cascade=False),
+    Facet("filter_quarter_multi", 'Quarter'),
+    Facet("filter_business_line_multi", 'Product'),
+    Facet("employer_selector_multi", 'Employer Name'),
+    Facet("Provider_selector_multi", 'Provider Name'),
+    Facet("status_select_multiselect", 'Claim Status'),
+    Facet("type_sele_multiselect", 'Claim Type'),
+]
+
+# Keys of the filter widgets whose values are kept while the view is hidden
+FILTER_KEYS = state_keys(FACETS)
+
+
 def display_claim_type():
 
     # Centered and styled main title using inline styles
@@ -32,22 +60,8 @@ def display_claim_type():
     st.markdown('<h1 class="main-title">CLAIM TYPE ANALYSIS</h1>', unsafe_allow_html=True)
 
 
-    # File paths and sheet names
-    filepath_visits = "Claims.xlsx"
-    sheet_name1 = "2023 claims"
-    sheet_name2 = "2024 claims"
-
-    # Read the Claims data
-    dfc_2023 = pd.read_excel(filepath_visits, sheet_name=sheet_name1)
-    dfc_2024 = pd.read_excel(filepath_visits, sheet_name=sheet_name2)
-
-    # Concatenate the dataframes
-    df = pd.concat([dfc_2023, dfc_2024])
-
-    df['Claim Created Date'] = pd.to_datetime(df['Claim Created Date'], errors='coerce')
-
-    df["Employer Name"] = df["Employer Name"].str.upper()
-    df["Provider Name"] = df["Provider Name"].str.upper()
+    # Load the shared, normalized claims data
+    df = load_claims()
 
 
     # Sidebar styling and logo
@@ -96,12 +110,6 @@ def display_claim_type():
         </style>
         """, unsafe_allow_html=True)
 
-    # Dictionary to map month names to their order
-    month_order = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6, "July": 7, "August": 8,
-        "September": 9, "October": 10, "November": 11, "December": 12
-    }
     # Define the mapping of months to quarters
     month_to_quarter = {
         "January": "Q1", "February": "Q1", "March": "Q1",
@@ -109,50 +117,59 @@ def display_claim_type():
         "July": "Q3", "August": "Q3", "September": "Q3",
         "October": "Q4", "November": "Q4", "December": "Q4"
     }
-    # Filter DataFrame by months in `month_order`
-    df = df[df['Month'].isin(month_order)]
+    # Filters below are applied through a cached chain: repeating a selection
+    # reuses the rows it produced before instead of filtering again. The chain
+    # filters the daily cube alongside, so totals and averages by period, type,
+    # status or product are summed from cube cells rather than from every claim.
+    filters = FilterChain(df, "Claim Type View", claims_version(), cube=load_cube(), path=CLAIMS_DATASET)
+
+    # Keep rows whose month is a calendar month ('Month' is ordered at load)
+    filters.notna('Month')
+
+    # Options for every filter widget below, each from the rows the filters before it
+    # leave, resolved up front from the selections in session state
+    options = filters.options(FACETS, st.session_state)
+
 
-    # Sort months based on their order
-    sorted_months = sorted(df['Month'].dropna().unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
-    df['Source'] = df['Source'].astype(str)
-    df['Quarter'] = "Q" + df['Claim Created Date'].dt.quarter.astype(str)
+    # Months present, in calendar order
+    sorted_months = list(options["month_selector_multiselector"].index)
 
     # Sidebar for filters
     st.sidebar.header("Filters")
 
     source = st.sidebar.multiselect(
         "Select Claim Provider Type", 
-        options=sorted(df['Source'].unique()), 
+        options=list(options["filter_source_2025"].index), 
         key="filter_source_2025"
     )
 
     code = st.sidebar.multiselect(
         "Select Diagnosis Code", 
-        options=df['ICD-10 Code'].unique(), 
+        options=list(options["filter_diag_code_2025"].index), 
         key="filter_diag_code_2025"
     )
 
     client_name = st.sidebar.multiselect(
         "Select Employer Name", 
-        options=sorted(df['Employer Name'].dropna().unique()), 
+        options=list(options["filter_employer_2025"].index), 
         key="filter_employer_2025"
     )
 
     prov_name = st.sidebar.multiselect(
         "Select Provider Name", 
-        options=sorted(df['Provider Name'].dropna().unique()), 
+        options=list(options["filter_provider_2025"].index), 
         key="filter_provider_2025"
     )
 
     # Apply filters to the DataFrame
     if 'Source' in df.columns and source:
-        df = df[df['Source'].isin(source)]
+        filters.isin('Source', source)
     if 'ICD-10 Code' in df.columns and code:
-        df = df[df['ICD-10 Code'].isin(code)]
+        filters.isin('ICD-10 Code', code)
     if 'Employer Name' in df.columns and client_name:
-        df = df[df['Employer Name'].isin(client_name)]
+        filters.isin('Employer Name', client_name)
     if 'Provider Name' in df.columns and prov_name:
-        df = df[df['Provider Name'].isin(prov_name)]
+        filters.isin('Provider Name', prov_name)
 
 
     # Create a three-column layout
@@ -160,7 +177,7 @@ def display_claim_type():
 
     # Year selector (allow multiple selections)
     with col1:
-        years = sorted(df['Year'].dropna().unique())
+        years = list(options["year_selector_multiselector"].index)
         selected_years = st.multiselect(
             "Select Years",
             options=years,
@@ -168,7 +185,7 @@ def display_claim_type():
             key="year_selector_multiselector"
         )
         if selected_years:
-            df = df[df['Year'].isin(selected_years)]
+            filters.isin('Year', selected_years)
 
     # Month selector (allow multiple selections)
     with col2:
@@ -178,35 +195,35 @@ def display_claim_type():
             key="month_selector_multiselector"
         )
         if selected_months:
-            df = df[df['Month'].isin(selected_months)]
+            filters.isin('Month', selected_months)
 
         # Dynamically calculate the quarters based on selected months
         if selected_months:
             suggested_quarters = list(set(month_to_quarter[month] for month in selected_months))
         else:
-            suggested_quarters = sorted(df['Quarter'].dropna().unique())  # Default to all quarters
+            suggested_quarters = list(options["filter_quarter_multi"].index)  # Default to all quarters
 
     # Quarter selector (allow manual selection, with dynamic suggestions)
     with col3:
-        quarters = sorted(df['Quarter'].dropna().unique())
+        quarters = list(options["filter_quarter_multi"].index)
         selected_quarters = st.multiselect(
             "Select Quarters",
             options=quarters,
             key="filter_quarter_multi"
         )
         if selected_quarters:
-            df = df[df['Quarter'].isin(selected_quarters)]
+            filters.isin('Quarter', selected_quarters)
 
     # Business Line selector (pre-select all options by default)
     with col4:
-        business_lines = sorted(df['Product'].dropna().unique()) if 'Product' in df.columns else []
+        business_lines = list(options["filter_business_line_multi"].index)
         selected_business_lines = st.multiselect(
             "Select Business Lines",
             options=business_lines,
             key="filter_business_line_multi"
         )
         if selected_business_lines:
-            df = df[df['Product'].isin(selected_business_lines)]
+            filters.isin('Product', selected_business_lines)
 
 
     # Create a three-column layout
@@ -214,30 +231,30 @@ def display_claim_type():
 
     # Year selector (allow multiple selections)
     with col3:
-        years = sorted(df['Employer Name'].dropna().unique())
+        years = list(options["employer_selector_multi"].index)
         selected_years = st.multiselect(
             "Select Employer Group",
             options=years,
             key="employer_selector_multi"
         )
         if selected_years:
-            df = df[df['Employer Name'].isin(selected_years)]
+            filters.isin('Employer Name', selected_years)
 
     # Year selector (allow multiple selections)
     with col4:
-        years = sorted(df['Provider Name'].dropna().unique())
+        years = list(options["Provider_selector_multi"].index)
         selected_years = st.multiselect(
             "Select Service Provider",
             options=years,
             key="Provider_selector_multi"
         )
         if selected_years:
-            df = df[df['Provider Name'].isin(selected_years)]
+            filters.isin('Provider Name', selected_years)
 
 
         # Claim Status selector (pre-select one status by default)
         with col2:
-            business_lines = sorted(df['Claim Status'].dropna().unique()) if 'Claim Status' in df.columns else []
+            business_lines = list(options["status_select_multiselect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -248,12 +265,12 @@ def display_claim_type():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Status'].isin(selected_business_lines)]
+                filters.isin('Claim Status', selected_business_lines)
 
 
         # Claim Status selector (pre-select one status by default)
         with col1:
-            business_lines = sorted(df['Claim Type'].dropna().unique()) if 'Claim Type' in df.columns else []
+            business_lines = list(options["type_sele_multiselect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -264,18 +281,10 @@ def display_claim_type():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Type'].isin(selected_business_lines)]
+                filters.isin('Claim Type', selected_business_lines)
 
-    # Dynamically calculate the date range based on selected filters
-    if selected_months:
-        # Filter DataFrame by selected months
-        df_filtered = df[df['Month'].isin(selected_months)]
-    else:
-        df_filtered = df
-
-    # Get the minimum and maximum dates from the filtered DataFrame
-    startDate = df_filtered["Claim Created Date"].min()
-    endDate = df_filtered["Claim Created Date"].max()
+    # Date range of the rows the filters above keep (selected months included)
+    startDate, endDate = filters.bounds("Claim Created Date")
 
 
     # Define CSS for the styled date input boxes
@@ -326,43 +335,36 @@ def display_claim_type():
 
     # Filter the DataFrame based on the selected date range
     if date1 and date2:
-        df = df[(df["Claim Created Date"] >= date1) & (df["Claim Created Date"] <= date2)]
-
-
-
-
+        filters.between("Claim Created Date", date1, date2)
 
+    # Drop categories the filters removed so charts only show what is left
+    df = filters.memo("compact", compact_categories)
 
-    df_app = df[df['Claim Status'] == 'Approved']
-    df_dec = df[df['Claim Status'] == 'Declined']
 
     if not df.empty:
         scale = 1_000_000  # For millions
         scaling = 1000  # For thousands
 
-        # Calculate key metrics
-        total_claim_amount = (df["Claim Amount"].sum()) / scale
-        average_amount = (df["Claim Amount"].mean()) / scaling
-        average_app_amount = (df["Approved Claim Amount"].mean()) / scaling
-
-        total_app_claim_amount = (df_app["Approved Claim Amount"].sum()) / scale
-        total_dec_claim_amount = (df_dec["Claim Amount"].sum()) / scaling
-
-        total_app = df_app["Claim ID"].nunique()
-        total_dec = df_dec["Claim ID"].nunique()
-
-
+        # Calculate key metrics, all from one pass over the filtered claims
+        kpis = filters.memo("kpis", ClaimKPIs)
+        total_claim_amount = kpis.claim_amount / scale
+        average_amount = kpis.average_amount / scaling
+        average_app_amount = kpis.average_approved_amount / scaling
 
-        total_clients = df["Employer Name"].nunique()
-        total_claims = df["Claim ID"].nunique()
+        total_app_claim_amount = kpis.status('Approved', 'approved_amount') / scale
+        total_dec_claim_amount = kpis.status('Declined', 'claim_amount') / scaling
 
+        total_app = kpis.status('Approved')
+        total_dec = kpis.status('Declined')
 
+        total_clients = kpis.clients
+        total_claims = kpis.claims
 
         # Approval Rate (Claims Approved / Total Claims)
-        approval_rate = (total_app / total_claims) * 100 if total_claims > 0 else 0
+        approval_rate = kpis.rate('Approved')
 
         # Denial Rate (Claims Declined / Total Claims)
-        denial_rate = (total_dec / total_claims) * 100 if total_claims > 0 else 0
+        denial_rate = kpis.rate('Declined')
 
 
 
@@ -439,235 +441,227 @@ def display_claim_type():
 
         cols1, cols2 = st.columns(2)
 
-        # Group by Claim Created Date and Claim Type, and count the occurrences
-        claim_type_count = (
-            df.groupby([df["Claim Created Date"].dt.strftime("%Y-%m-%d"), "Claim Type"])
-            .size()
-            .reset_index(name="Count")
-        )
-
-        # Pivot the data for plotting (Claim Type as columns)
-        pivot_claim_type = claim_type_count.pivot(
-            index="Claim Created Date", columns="Claim Type", values="Count"
-        ).fillna(0)
-
-        # Sort the data by date
-        pivot_claim_type = pivot_claim_type.sort_index()
-
         # Create the stacked area chart
         with cols1:
-            fig2 = go.Figure()
-
-            # Add traces for each Claim Type
-            for i, claim_type in enumerate(pivot_claim_type.columns):
-                fig2.add_trace(
-                    go.Scatter(
-                        x=pivot_claim_type.index,
-                        y=pivot_claim_type[claim_type],
-                        mode="lines",
-                        stackgroup="one",  # This creates a stacked area chart
-                        name=claim_type,
-                        line=dict(width=0.5, color=custom_colors[i % len(custom_colors)]),
-                        hoverinfo="x+y+name",
-                        fillcolor=custom_colors[i % len(custom_colors)],
-                    )
+            def build_fig2():
+                # Count claims per period of the selected range and Claim Type (Claim Type as columns)
+                daily_type_count = filters.rollup(["Claim Created Date", "Claim Type"], how='size')
+                pivot_claim_type = timeseries.resample(
+                    daily_type_count.index.get_level_values(0), timeseries.pick_grain(date1, date2),
+                    daily_type_count, by=daily_type_count.index.get_level_values(1),
                 )
 
-            # Update layout
-            fig2.update_layout(
-                xaxis_title="Claim Created Date",
-                yaxis_title="Number of Claims",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
-                height=450,
-            )
+                fig2 = go.Figure()
+
+                # Add traces for each Claim Type
+                fig2.add_traces(charts.series_traces(
+                    pivot_claim_type,
+                    trace=go.Scatter,
+                    colors=custom_colors,
+                    color_props=("line_color", "fillcolor"),
+                    mode="lines",
+                    stackgroup="one",  # This creates a stacked area chart
+                    line=dict(width=0.5),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Update layout
+                fig2.update_layout(
+                    xaxis_title="Claim Created Date",
+                    yaxis_title="Number of Claims",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
+                    height=450,
+                )
+                return fig2
+
+            fig2 = filters.figure("Number of Claims by Claim Type Over Time", build_fig2)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Claims by Claim Type Over Time</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig2, use_container_width=True)
 
 
-        # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
-        monthly_claim_type_avg = df.groupby(['Claim Type', 'Year'])['Claim Amount'].mean().reset_index()
-
-
         with cols2:
             # Create the bar chart for average monthly claim amount by claim type
-            fig_monthly_claim_type_avg = go.Figure()
-
-            # Add trace for Average Monthly Claim Amount
-            for idx, claim_type in enumerate(monthly_claim_type_avg['Claim Type'].unique()):
-                filtered_data = monthly_claim_type_avg[monthly_claim_type_avg['Claim Type'] == claim_type]
-                fig_monthly_claim_type_avg.add_trace(go.Bar(
-                    x=filtered_data['Year'],
-                    y=filtered_data['Claim Amount'],
-                    name=claim_type,
-                    text=[f'{value/1e3:.0f}K' for value in filtered_data['Claim Amount']],
+            def build_fig_monthly_claim_type_avg():
+                # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
+                monthly_claim_type_avg = filters.rollup(['Claim Type', 'Year'], 'Claim Amount', 'mean').reset_index()
+
+                fig_monthly_claim_type_avg = go.Figure()
+
+                # Add trace for Average Monthly Claim Amount
+                fig_monthly_claim_type_avg.add_traces(charts.series_traces(
+                    monthly_claim_type_avg, 'Year', 'Claim Amount', 'Claim Type',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e3, suffix='K'),
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Set layout for the chart
-            fig_monthly_claim_type_avg.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Claim Type")
-            )
+                # Set layout for the chart
+                fig_monthly_claim_type_avg.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Claim Type")
+                )
+                return fig_monthly_claim_type_avg
+
+            fig_monthly_claim_type_avg = filters.figure("Average Yearly Claim Amount by Claim Type", build_fig_monthly_claim_type_avg)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Yearly Claim Amount by Claim Type</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_claim_type_avg, use_container_width=True)
 
 
-        # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
-        monthly_claim_type_avg = df.groupby(['Claim Type', 'Month'])['Claim Amount'].mean().reset_index()
-
-        monthly_claim_type_avg['Month_Order'] = monthly_claim_type_avg['Month'].apply(lambda x: sorted_months.index(x) if x in sorted_months else len(sorted_months))
+        with cols1:
+            # Create the bar chart for average monthly claim amount by claim type
+            def build_fig_monthly_claim_type_avg():
+                # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
+                monthly_claim_type_avg = filters.rollup(['Claim Type', 'Month'], 'Claim Amount', 'mean').reset_index()
 
-        monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Month_Order', 'Claim Type'])
+                # 'Month' is an ordered categorical, so this sorts in calendar order
+                monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Month', 'Claim Type'])
 
+                fig_monthly_claim_type_avg = go.Figure()
 
-        with cols1:
-            # Create the bar chart for average monthly claim amount by claim type
-            fig_monthly_claim_type_avg = go.Figure()
-
-            # Add trace for Average Monthly Claim Amount
-            for idx, claim_type in enumerate(monthly_claim_type_avg['Claim Type'].unique()):
-                filtered_data = monthly_claim_type_avg[monthly_claim_type_avg['Claim Type'] == claim_type]
-                fig_monthly_claim_type_avg.add_trace(go.Bar(
-                    x=filtered_data['Month'],
-                    y=filtered_data['Claim Amount'],
-                    name=claim_type,
-                    text=[f'{value/1e3:.0f}K' for value in filtered_data['Claim Amount']],
+                # Add trace for Average Monthly Claim Amount
+                fig_monthly_claim_type_avg.add_traces(charts.series_traces(
+                    monthly_claim_type_avg, 'Month', 'Claim Amount', 'Claim Type',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e3, suffix='K'),
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Set layout for the chart
-            fig_monthly_claim_type_avg.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Month",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Claim Type")
-            )
+                # Set layout for the chart
+                fig_monthly_claim_type_avg.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Month",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Claim Type")
+                )
+                return fig_monthly_claim_type_avg
+
+            fig_monthly_claim_type_avg = filters.figure("Average Monthly Claim Amount by Claim Type", build_fig_monthly_claim_type_avg)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Monthly Claim Amount by Claim Type</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_claim_type_avg, use_container_width=True)
 
 
-        # Calculate the Approved Claim Amount by Client Segment
-        int_owner = df.groupby("Claim Type")["Claim Amount"].sum().reset_index()
-        int_owner.columns = ["Claim Type", "Claim Amount"]    
-
         with cols2:
             # Display the header
             st.markdown('<h3 class="custom-subheader">Total Claim Amount by Claim Type</h3>', unsafe_allow_html=True)
 
 
             # Create a donut chart
-            fig = px.pie(int_owner, names="Claim Type", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
-            fig.update_traces(textposition='inside', textinfo='value+percent')
-            fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+            def build_fig():
+                # Calculate the Approved Claim Amount by Client Segment
+                int_owner = filters.rollup("Claim Type", "Claim Amount").reset_index()
+                int_owner.columns = ["Claim Type", "Claim Amount"]
 
-            # Display the chart in Streamlit
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.pie(int_owner, names="Claim Type", values="Claim Amount", hole=0.5, template="plotly_dark", color_discrete_sequence=custom_colors)
+                fig.update_traces(textposition='inside', textinfo='value+percent')
+                fig.update_layout(height=450, margin=dict(l=0, r=10, t=30, b=50))
+                return fig
 
+            fig = filters.figure("Total Claim Amount by Claim Type", build_fig)
 
-        # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
-        monthly_claim_type_avg = df.groupby(['Claim Status', 'Claim Type'])['Claim Amount'].mean().reset_index()
-        monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Claim Type', 'Claim Status'])
+            # Display the chart in Streamlit
+            st.plotly_chart(fig, use_container_width=True)
 
 
         with cols1:
             # Create the bar chart for average monthly claim amount by claim type
-            fig_monthly_claim_type_avg = go.Figure()
-
-            # Add trace for Average Monthly Claim Amount
-            for idx, claim_type in enumerate(monthly_claim_type_avg['Claim Status'].unique()):
-                filtered_data = monthly_claim_type_avg[monthly_claim_type_avg['Claim Status'] == claim_type]
-                fig_monthly_claim_type_avg.add_trace(go.Bar(
-                    x=filtered_data['Claim Type'],
-                    y=filtered_data['Claim Amount'],
-                    name=claim_type,
-                    text=[f'{value/1e3:.0f}K' for value in filtered_data['Claim Amount']],
+            def build_fig_monthly_claim_type_avg():
+                # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
+                monthly_claim_type_avg = filters.rollup(['Claim Status', 'Claim Type'], 'Claim Amount', 'mean').reset_index()
+                monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Claim Type', 'Claim Status'])
+
+                fig_monthly_claim_type_avg = go.Figure()
+
+                # Add trace for Average Monthly Claim Amount
+                fig_monthly_claim_type_avg.add_traces(charts.series_traces(
+                    monthly_claim_type_avg, 'Claim Type', 'Claim Amount', 'Claim Status',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e3, suffix='K'),
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Set layout for the chart
-            fig_monthly_claim_type_avg.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Claim Type",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Claim Status")
-            )
+                # Set layout for the chart
+                fig_monthly_claim_type_avg.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Claim Type",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Claim Status")
+                )
+                return fig_monthly_claim_type_avg
+
+            fig_monthly_claim_type_avg = filters.figure("Average Claim Amount by Claim Type and Status", build_fig_monthly_claim_type_avg)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Claim Amount by Claim Type and Status</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_claim_type_avg, use_container_width=True)
 
 
-        # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
-        monthly_claim_type_avg = df.groupby(['Claim Status', 'Claim Type'])['Claim ID'].nunique().reset_index()
-        monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Claim Type', 'Claim Status'])
-
-
         with cols2:
             # Create the bar chart for average monthly claim amount by claim type
-            fig_monthly_claim_type_avg = go.Figure()
-
-            # Add trace for Average Monthly Claim Amount
-            for idx, claim_type in enumerate(monthly_claim_type_avg['Claim Status'].unique()):
-                filtered_data = monthly_claim_type_avg[monthly_claim_type_avg['Claim Status'] == claim_type]
-                fig_monthly_claim_type_avg.add_trace(go.Bar(
-                    x=filtered_data['Claim Type'],
-                    y=filtered_data['Claim ID'],
-                    name=claim_type,
-                    text=[f'{value/1e3:.0f}K' for value in filtered_data['Claim ID']],
+            def build_fig_monthly_claim_type_avg():
+                # Group data by "Claim Type" and "Month" to calculate the average claim amount per month
+                monthly_claim_type_avg = df.groupby(['Claim Status', 'Claim Type'], observed=True)['Claim ID'].nunique().reset_index()
+                monthly_claim_type_avg = monthly_claim_type_avg.sort_values(by=['Claim Type', 'Claim Status'])
+
+                fig_monthly_claim_type_avg = go.Figure()
+
+                # Add trace for Average Monthly Claim Amount
+                fig_monthly_claim_type_avg.add_traces(charts.series_traces(
+                    monthly_claim_type_avg, 'Claim Type', 'Claim ID', 'Claim Status',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e3, suffix='K'),
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Set layout for the chart
-            fig_monthly_claim_type_avg.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Claim Type",
-                yaxis_title="Number of Claims",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Claim Status")
-            )
+                # Set layout for the chart
+                fig_monthly_claim_type_avg.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Claim Type",
+                    yaxis_title="Number of Claims",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Claim Status")
+                )
+                return fig_monthly_claim_type_avg
+
+            fig_monthly_claim_type_avg = filters.figure("Number of Claims by Claim Type and Status", build_fig_monthly_claim_type_avg)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Claims by Claim Type and Status</h3>', unsafe_allow_html=True)
@@ -676,88 +670,88 @@ def display_claim_type():
 
         # Create the layout columns
         cls1, cls2 = st.columns(2)
-        # Group by Employer Name and Client Segment, then sum the Approved Claim Amount
-        df_grouped = df.groupby(['Employer Name', 'Claim Type'])['Approved Claim Amount'].sum().nlargest(10).reset_index()
+        with cls1:
+            # Create the bar chart
+            def build_fig():
+                # Group by Employer Name and Client Segment, then sum the Approved Claim Amount
+                df_grouped = filters.rollup(['Employer Name', 'Claim Type'], 'Approved Claim Amount').nlargest(10).reset_index()
 
-        # Get the top 10 clients by Approved Claim Amount
-        top_10_clients = df_grouped.groupby('Employer Name')['Approved Claim Amount'].sum().reset_index()
+                # Get the top 10 clients by Approved Claim Amount
+                top_10_clients = df_grouped.groupby('Employer Name', observed=True)['Approved Claim Amount'].sum().reset_index()
 
-        # Filter the original DataFrame to include only the top 10 clients
-        client_df = df_grouped[df_grouped['Employer Name'].isin(top_10_clients['Employer Name'])]
+                # Filter the original DataFrame to include only the top 10 clients
+                client_df = df_grouped[df_grouped['Employer Name'].isin(top_10_clients['Employer Name'])]
 
-        # Sort the client_df by Approved Claim Amount in descending order
-        client_df = client_df.sort_values(by='Approved Claim Amount', ascending=False)
+                # Sort the client_df by Approved Claim Amount in descending order
+                client_df = client_df.sort_values(by='Approved Claim Amount', ascending=False)
 
-        with cls1:
-            # Create the bar chart
-            fig = go.Figure()
-
-
-                    # Add bars for each Client Segment
-            for idx, Client_Segment in enumerate(client_df['Claim Type'].unique()):
-                        Client_Segment_data = client_df[client_df['Claim Type'] == Client_Segment]
-                        fig.add_trace(go.Bar(
-                            x=Client_Segment_data['Employer Name'],
-                            y=Client_Segment_data['Approved Claim Amount'],
-                            name=Client_Segment,
-                            text=[f'{value/1e6:.0f}M' for value in Client_Segment_data['Approved Claim Amount']],
-                            textposition='auto',
-                            marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
-                        ))
-
-            fig.update_layout(
-                        barmode='stack',
-                        yaxis_title="Approved Claim Amount",
-                        xaxis_title="Employer Name",
-                        font=dict(color='Black'),
-                        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                        margin=dict(l=0, r=0, t=30, b=50)
-                    )
+                fig = go.Figure()
+
+
+                # Add bars for each Claim Type
+                fig.add_traces(charts.series_traces(
+                    client_df, 'Employer Name', 'Approved Claim Amount', 'Claim Type',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e6, suffix='M'),
+                    textposition='auto',
+                ))
+
+                fig.update_layout(
+                            barmode='stack',
+                            yaxis_title="Approved Claim Amount",
+                            xaxis_title="Employer Name",
+                            font=dict(color='Black'),
+                            xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                            yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                            margin=dict(l=0, r=0, t=30, b=50)
+                        )
+                return fig
+
+            fig = filters.figure("Top 10 Employer groups by Approved Claim Amount and Claim Type", build_fig)
 
                     # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Employer groups by Approved Claim Amount and Claim Type</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig, use_container_width=True)
 
 
-        # Group by Employer Name and Client Segment, then sum the Approved Claim Amount
-        df_grouped = df.groupby(['Provider Name', 'Claim Type'])['Approved Claim Amount'].sum().nlargest(10).reset_index()
+        with cls2:
+            # Create the bar chart
+            def build_fig():
+                # Group by Employer Name and Client Segment, then sum the Approved Claim Amount
+                df_grouped = filters.rollup(['Provider Name', 'Claim Type'], 'Approved Claim Amount').nlargest(10).reset_index()
 
-        # Get the top 10 clients by Approved Claim Amount
-        top_10_clients = df_grouped.groupby('Provider Name')['Approved Claim Amount'].sum().reset_index()
+                # Get the top 10 clients by Approved Claim Amount
+                top_10_clients = df_grouped.groupby('Provider Name', observed=True)['Approved Claim Amount'].sum().reset_index()
 
-        # Filter the original DataFrame to include only the top 10 clients
-        client_df = df_grouped[df_grouped['Provider Name'].isin(top_10_clients['Provider Name'])]
+                # Filter the original DataFrame to include only the top 10 clients
+                client_df = df_grouped[df_grouped['Provider Name'].isin(top_10_clients['Provider Name'])]
 
-        # Sort the client_df by Approved Claim Amount in descending order
-        client_df = client_df.sort_values(by='Approved Claim Amount', ascending=False)
+                # Sort the client_df by Approved Claim Amount in descending order
+                client_df = client_df.sort_values(by='Approved Claim Amount', ascending=False)
 
-        with cls2:
-            # Create the bar chart
-            fig = go.Figure()
-
-
-                    # Add bars for each Client Segment
-            for idx, Client_Segment in enumerate(client_df['Claim Type'].unique()):
-                        Client_Segment_data = client_df[client_df['Claim Type'] == Client_Segment]
-                        fig.add_trace(go.Bar(
-                            x=Client_Segment_data['Provider Name'],
-                            y=Client_Segment_data['Approved Claim Amount'],
-                            name=Client_Segment,
-                            text=[f'{value/1e6:.0f}M' for value in Client_Segment_data['Approved Claim Amount']],
-                            textposition='auto',
-                            marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
-                        ))
-
-            fig.update_layout(
-                        barmode='stack',
-                        yaxis_title="Approved Claim Amount",
-                        xaxis_title="Provider Name",
-                        font=dict(color='Black'),
-                        xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                        yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                        margin=dict(l=0, r=0, t=30, b=50)
-                    )
+                fig = go.Figure()
+
+
+                # Add bars for each Claim Type
+                fig.add_traces(charts.series_traces(
+                    client_df, 'Provider Name', 'Approved Claim Amount', 'Claim Type',
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e6, suffix='M'),
+                    textposition='auto',
+                ))
+
+                fig.update_layout(
+                            barmode='stack',
+                            yaxis_title="Approved Claim Amount",
+                            xaxis_title="Provider Name",
+                            font=dict(color='Black'),
+                            xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                            yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                            margin=dict(l=0, r=0, t=30, b=50)
+                        )
+                return fig
+
+            fig = filters.figure("Top 10 Service Providers by Approved Claim Amount and Claim Type", build_fig)
 
                     # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Service Providers by Approved Claim Amount and Claim Type</h3>', unsafe_allow_html=True)
@@ -1,6 +1,8 @@
 
 import streamlit as st
 import json
+import logging
+import uuid
 import bcrypt
 import pandas as pd
 import altair as alt
@@ -11,11 +13,14 @@ from datetime import datetime
 
 
 # Import functions from other files
+import claim_analysis, claim_type, fraud, loss_ratio, product
 from claim_analysis import display_analysis
 from product import display_product
 from claim_type import display_claim_type
 from loss_ratio import display_loss_ratio
 from fraud import display_fraud
+from filter_cache import FILTER_CACHE
+from warmup import WAIT_SECONDS, start_warm_up
 
 
 st.set_page_config(
@@ -57,14 +62,43 @@ current_date = datetime.now()
 
 
 
+# Keys of the view filter widgets, whose values are kept while their view is hidden
+VIEW_FILTER_KEYS = [
+    key for view in (claim_analysis, product, claim_type, fraud, loss_ratio) for key in view.FILTER_KEYS
+]
+
+
+# Function to keep the filter values of views that are not drawn on this rerun.
+# Streamlit forgets the state of widgets it does not draw; writing each value back
+# into session state, before any widget is created, keeps it until it is drawn again.
+# Only the filter keys the views register are written back: Streamlit refuses values
+# set for buttons, forms and file uploaders, warns for widgets created with a default
+# (e.g. the year selectors and date inputs), and other session state needs no keeping.
+def keep_widget_state():
+    for key in VIEW_FILTER_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+
 # Function to display the dashboard
 def display_dashboard(username):
+    keep_widget_state()
+
+    # A session arriving while the warm-up runs waits for it rather than computing the
+    # same default views alongside it
+    warm_up = start_warm_up()
+    if not warm_up.done.is_set():
+        with st.spinner("Preparing dashboards..."):
+            warm_up.wait(WAIT_SECONDS)
+
     # SIDEBAR FILTER
     logo_url = 'EC_logo.png'  
     st.sidebar.image(logo_url, use_column_width=True)
 
+    # Only the selected view runs on each rerun (st.tabs would run all six); the
+    # widget values of the hidden views are kept until they are shown again
     tab_titles = ["Home", "Claims Analysis", "Product View", "Claim Type View", "Fraud Detection", "Loss Ratio View"]
-    tabs = st.tabs(tab_titles)
+    active_view = st.radio("View", tab_titles, horizontal=True, key="active_view", label_visibility="collapsed")
 
     # Custom CSS for vivid and bold tabs
     st.markdown(
@@ -72,7 +106,7 @@ def display_dashboard(username):
         <style>
 
         /* Style for the entire tab container */
-        [data-baseweb="tab-list"] {
+        .st-key-active_view [role="radiogroup"] {
             font-size: 1.2rem;
             font-weight: bold;
             color: white;
@@ -85,8 +119,11 @@ def display_dashboard(username):
             z-index: 1000; /* Ensure it stays above other content */
         }
 
-        /* Style for individual tabs */
-        [data-baseweb="tab"] {
+        /* Style for individual tabs (the radio circles are hidden) */
+        .st-key-active_view label > div:first-child {
+            display: none;
+        }
+        .st-key-active_view label {
             background-color: #e66c37; /* Orange background for tabs */
             color: white;
             
@@ -99,8 +136,13 @@ def display_dashboard(username):
 
 
 
+        /* Highlight for the selected tab */
+        .st-key-active_view label:has(input:checked) {
+            background-color: #F49773;
+        }
+
         /* Hover effect for tabs */
-        [data-baseweb="tab"]:hover {
+        .st-key-active_view label:hover {
             background-color: #F49773; /* Darker orange on hover */
             cursor: pointer;
             color: white;
@@ -160,7 +202,7 @@ def display_dashboard(username):
 
 
 
-    with tabs[0]:
+    if active_view == "Home":
             st.markdown('<h1 class="main-title">EDEN CARE CLAIMS MANAGEMENT DASHBOARD</h1>', unsafe_allow_html=True)
             st.image("Tiny doctor giving health insurance.jpg", caption='Eden Care Medical', use_column_width=True)
             st.markdown('<h2 class="subheader">Welcome to the Eden Care Claims Management Dashboard Executive View</h2>', unsafe_allow_html=True)
@@ -196,31 +238,54 @@ def display_dashboard(username):
         
 
     # Claims Analysis Tab
-    with tabs[1]:
+    elif active_view == "Claims Analysis":
         display_analysis()
 
-    with tabs[2]:
+    elif active_view == "Product View":
         display_product()
 
-    with tabs[3]:
+    elif active_view == "Claim Type View":
         display_claim_type()
 
-    with tabs[4]:
+    elif active_view == "Fraud Detection":
         display_fraud()
 
-    with tabs[5]:
+    elif active_view == "Loss Ratio View":
         display_loss_ratio()
 
+# Function to show the approximate memory the shared cache holds for this session in
+# the sidebar, and log it per view; results over the per-session budget have already
+# been dropped by the cache
+def show_memory_usage(session_id):
+    usage = FILTER_CACHE.usage()
+    session, total = usage['sessions'].get(session_id, 0) / 2**20, sum(usage['sessions'].values()) / 2**20
+    st.sidebar.caption(f"Cached results: {session:.1f} MB for this session, {total:.1f} MB in all")
+    logging.getLogger(__name__).info(
+        "Session %s holds %.1f MB of cached results; per view (MB): %s", session_id, session,
+        {view: round(size / 2**20, 1) for view, size in usage['views'].items()},
+    )
+
+
 # Streamlit app
 def main():
+    warm_up = start_warm_up()
+
     if 'logged_in' not in st.session_state:
         st.session_state['logged_in'] = False
         st.session_state['username'] = ""
 
     if st.session_state['logged_in']:
-        display_dashboard(st.session_state['username'])
+        # What this run adds to the shared cache counts towards this session's budget
+        session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+        with FILTER_CACHE.owned_by(session_id):
+            display_dashboard(st.session_state['username'])
+        show_memory_usage(session_id)
     else:
         st.title("Login Page")
+        if warm_up.ready:
+            st.caption("Dashboards ready")
+        elif warm_up.state == 'running':
+            st.caption("Preparing dashboards...")
 
         username = st.text_input("Enter username")
         password = st.text_input("Enter password", type="password")
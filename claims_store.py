@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+
+# Kept free of Streamlit imports so refreshes can also run from the command line
+
+DATE_COLUMN = 'Claim Created Date'
+KEY_COLUMN = 'Claim ID'
+
+
+# Function to read the dataset manifest (watermark and the extracts merged so far)
+def read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+# Function to replace a file in one step, so readers never see it half written
+def _replace_atomically(path, write):
+    partial = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    write(partial)
+    os.replace(partial, path)
+
+
+def write_manifest(path, manifest):
+    def write(partial):
+        with open(partial, 'w') as file:
+            json.dump(manifest, file, indent=4)
+    _replace_atomically(path, write)
+
+
+# Function to store the dataset uncompressed, so the app can memory-map it in place
+def write_dataset(path, df):
+    _replace_atomically(path, lambda partial: df.reset_index(drop=True).to_feather(partial, compression='uncompressed'))
+
+
+# Function to find the watermark of a frame: the latest created date and the largest
+# claim ID on that date. Returns None for a frame without dated rows.
+def watermark(df):
+    dates = df[DATE_COLUMN]
+    latest = dates.max()
+    if pd.isna(latest):
+        return None
+    return {'date': latest.isoformat(), 'claim_id': df.loc[dates == latest, KEY_COLUMN].astype(str).max()}
+
+
+def _later_mark(a, b):
+    if a is None or b is None:
+        return a or b
+    return max(a, b, key=lambda mark: (pd.Timestamp(mark['date']), mark['claim_id']))
+
+
+# Function to flag the rows past a watermark, ordered by (created date, claim ID)
+def _above(df, mark):
+    if mark is None:
+        return pd.Series(True, index=df.index)
+    date = pd.Timestamp(mark['date'])
+    dates = df[DATE_COLUMN]
+    return (dates > date) | ((dates == date) & (df[KEY_COLUMN].astype(str) > mark['claim_id']))
+
+
+# Function to fingerprint each claim's rows so stored and extracted versions compare
+# in one vectorized pass. Both sides are hashed from one frame so they share dtypes.
+def _claim_hashes(stored, extract, columns):
+    both = pd.concat([stored[columns], extract[columns]], ignore_index=True)
+    hashes = pd.util.hash_pandas_object(both, index=False)
+    side = pd.Series(['stored'] * len(stored) + ['extract'] * len(extract))
+    # Summing row hashes per claim gives a fingerprint independent of row order
+    sums = hashes.groupby([side, both[KEY_COLUMN]], observed=True).sum()
+    return sums.unstack(0).reindex(columns=['stored', 'extract'])
+
+
+# Function to merge an extract into the stored dataset. Rows past the watermark are
+# new unless their claim is already stored; only claims at or below it are compared
+# against their stored rows. A claim that changed has all its stored rows replaced.
+# Claims missing from the extract are kept, so partial (delta) extracts are fine.
+# The merged rows are kept sorted by DATE_COLUMN (missing dates last), so date ranges
+# are contiguous slices of the dataset.
+def merge_extract(stored, extract, mark):
+    known = extract[KEY_COLUMN].isin(stored[KEY_COLUMN])
+    above = _above(extract, mark)
+
+    added_ids = extract.loc[~known, KEY_COLUMN].unique()
+    moved_ids = extract.loc[known & above, KEY_COLUMN].unique()
+
+    check = extract[known & ~above & ~extract[KEY_COLUMN].isin(moved_ids)]
+    columns = [name for name in stored.columns if name in extract.columns]
+    hashes = _claim_hashes(stored[stored[KEY_COLUMN].isin(check[KEY_COLUMN])], check, columns)
+    edited_ids = hashes.index[hashes['stored'] != hashes['extract']]
+
+    updated_ids = pd.Index(moved_ids).append(edited_ids)
+    incoming = extract[extract[KEY_COLUMN].isin(pd.Index(added_ids).append(updated_ids))]
+    kept = stored[~stored[KEY_COLUMN].isin(updated_ids)]
+    merged = pd.concat([kept, incoming], ignore_index=True)
+    merged = merged.sort_values(DATE_COLUMN, kind='stable', na_position='last', ignore_index=True)
+
+    # Categories differ between the two sides; rebuild them over the merged values
+    for name in stored.columns[stored.dtypes == 'category']:
+        if merged[name].dtype != 'category':
+            merged[name] = merged[name].astype('category')
+
+    report = {
+        'rows_read': len(extract),
+        'added': len(added_ids),
+        'updated': len(updated_ids),
+        'unchanged': int(check[KEY_COLUMN].nunique()) - len(edited_ids),
+        'rows_stored': len(merged),
+        'watermark_before': mark,
+        'watermark_after': _later_mark(mark, watermark(incoming)),
+        'updated_ids': [str(claim_id) for claim_id in updated_ids],
+    }
+    return merged, report
@@ -0,0 +1,82 @@
+import pandas as pd
+
+import icd10
+
+
+# The cube and the ICD-10 rollups are built at ingest next to the claims dataset
+
+DATE_COLUMN = 'Claim Created Date'
+
+# One cube cell per distinct combination of these, the created date taken at day grain
+# (times dropped), so the cube grows with days rather than claims. Year, Month and
+# Quarter follow from the created date, so keeping them adds no cells but lets period
+# filters use the cube. Diagnosis and ICD-10 codes are left out: together with employer
+# and provider they would give nearly every claim a cell of its own.
+CUBE_DIMENSIONS = [
+    DATE_COLUMN, 'Year', 'Month', 'Quarter',
+    'Claim Type', 'Claim Status', 'Source', 'Product', 'Employer Name', 'Provider Name',
+]
+
+# The ICD-10 levels rolled up into cubes of their own, for drilling down chapter ->
+# block -> code. Each is over the level, the levels above it (which add no cells) and
+# these: the day and its periods, and the filters with few values. A filter on any other
+# column (employer, provider, diagnosis) drops the rollups, as it drops the cube.
+ICD_LEVELS = [icd10.CHAPTER_COLUMN, icd10.BLOCK_COLUMN, icd10.CODE_COLUMN]
+ICD_DIMENSIONS = [DATE_COLUMN, 'Year', 'Month', 'Quarter', 'Claim Type', 'Claim Status', 'Source', 'Product']
+
+# Per cell: the sum and non-missing count of each measure, and the number of rows
+CUBE_MEASURES = ['Claim Amount', 'Approved Claim Amount']
+ROWS = 'Rows'
+
+
+def _count_column(measure):
+    return f"{measure} Count"
+
+
+# Function to aggregate claims into a cube over the given dimensions. Missing dimension
+# values get cells of their own, so every claim is counted once.
+def build_cube(df, dimensions=CUBE_DIMENSIONS):
+    dimensions = [name for name in dimensions if name in df.columns]
+    if DATE_COLUMN in df.columns:
+        df = df.assign(**{DATE_COLUMN: df[DATE_COLUMN].dt.normalize()})
+    grouped = df.groupby(dimensions, observed=True, dropna=False, sort=False)
+    cube = grouped[CUBE_MEASURES].agg(['sum', 'count'])
+    cube.columns = [measure if how == 'sum' else _count_column(measure) for measure, how in cube.columns]
+    cube[ROWS] = grouped.size()
+    return cube.reset_index()
+
+
+# Function to build the rollup of each ICD-10 level: claim count, Claim Amount and
+# Approved Claim Amount per day, level value (with the levels above it) and
+# ICD_DIMENSIONS, as a cube rollup() answers like the claims cube
+def build_icd_rollups(df):
+    return {
+        level: build_cube(df, ICD_DIMENSIONS + icd10.LEVELS[:icd10.LEVELS.index(level) + 1])
+        for level in ICD_LEVELS
+    }
+
+
+# Function to turn a date range into whole days, the only ranges the cube can answer:
+# the start of the first day and the start of the day after the last, for filtering
+# dates with start <= date < end
+def day_range(start, end):
+    return pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+
+
+# Function to answer df.groupby(by, observed=True)[measure].agg(how) from cube cells,
+# for how in 'sum', 'mean' and 'size' (measure unused). With by=None the total over
+# all rows is returned instead, like df[measure].agg(how).
+def rollup(cube, by, measure=None, how='sum'):
+    if by is None:
+        if how == 'size':
+            return int(cube[ROWS].sum())
+        total = cube[measure].sum()
+        return total / cube[_count_column(measure)].sum() if how == 'mean' else total
+
+    grouped = cube.groupby(by, observed=True)
+    if how == 'size':
+        return grouped[ROWS].sum().rename(None)
+    sums = grouped[measure].sum()
+    if how == 'mean':
+        return (sums / grouped[_count_column(measure)].sum()).rename(measure)
+    return sums
@@ -0,0 +1,376 @@
+import hashlib
+import os
+import re
+import sys
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+import claims_store
+import icd10
+from cube import ICD_LEVELS, build_cube, build_icd_rollups
+from filter_cache import FILTER_CACHE
+from workbook_reader import read_year_sheets, stream_year_sheets
+
+
+# Source workbooks and the per-year sheets read from them ("2023 claims", "2024", ...)
+CLAIMS_FILE = "Claims.xlsx"
+CLAIM_SHEET_PATTERN = re.compile(r"^\s*(\d{4}) claims\s*$", re.IGNORECASE)
+
+PREMIUMS_FILE = "JAN-NOV 2024 GWP.xlsx"
+PREMIUM_SHEET_PATTERN = re.compile(r"^\s*(\d{4})\s*$")
+
+# Claim dimensions stored as categoricals: one shared dictionary per column, so
+# filters and group-bys work on integer codes instead of Python strings
+CATEGORY_COLUMNS = [
+    'Employer Name', 'Provider Name', 'Claim Type', 'Claim Status', 'Source',
+    'Diagnosis', 'ICD-10 Code', 'Product', 'Quarter', 'Employer Name As Entered',
+]
+
+# Employer names are upper-cased for the claims views; the loss ratio view matches
+# claims to premiums on the name as it was entered, so that is kept alongside
+EMPLOYER_AS_ENTERED = 'Employer Name As Entered'
+
+# Calendar months in order; 'Month' is stored as an ordered categorical over these
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+# Formats tried in turn for dates stored as text (Excel date cells need none)
+DATE_FORMATS = ['ISO8601', '%d/%m/%Y', '%d/%m/%Y %H:%M']
+
+# Bumped whenever normalization changes, so compiled files and the stored claims
+# dataset from an older pipeline are rebuilt instead of reused
+PIPELINE_VERSION = 11
+
+# Compiled columnar copies of the workbooks, one Feather file per content version
+CACHE_DIR = ".data_cache"
+
+# Claims dataset that extracts are merged into, and its watermark manifest
+CLAIMS_DATASET = os.path.join(CACHE_DIR, "claims.feather")
+CLAIMS_MANIFEST = os.path.join(CACHE_DIR, "claims.json")
+
+# Daily aggregate cube of the claims dataset (see cube.py), rebuilt with every merge
+CLAIMS_CUBE = os.path.join(CACHE_DIR, "claims-cube.feather")
+
+# Rollup of each ICD-10 level (see cube.py), e.g. claims-cube-icd-10-chapter.feather,
+# rebuilt with the cube
+CLAIMS_ICD_ROLLUPS = {
+    level: os.path.join(CACHE_DIR, f"claims-cube-{level.lower().replace(' ', '-')}.feather") for level in ICD_LEVELS
+}
+
+# From this size on, workbooks are streamed in chunks instead of loaded whole
+STREAM_MIN_BYTES = 32 * 1024 * 1024
+
+# Content digests per path, only recomputed when the file's mtime or size moves
+_digests = {}
+
+# One merge at a time per process; sessions rerunning meanwhile wait for it
+_ingest_lock = threading.Lock()
+
+# Functions called with the merge report each time ingest_claims stores new data
+_refresh_hooks = []
+
+
+# Function to register hook(report) to run whenever new claims data has been stored,
+# e.g. to drop results computed from the previous data
+def on_refresh(hook):
+    _refresh_hooks.append(hook)
+    return hook
+
+
+# Function to fingerprint a file by content so caches follow the data, not the path
+def file_version(path):
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(path)
+    if cached is None or cached[0] != stamp:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        cached = (stamp, digest.hexdigest())
+        _digests[path] = cached
+    return cached[1]
+
+
+# Function to give object columns a single type so they can be stored column-wise
+def _coerce_for_arrow(df):
+    for name in df.columns[df.dtypes == object]:
+        kind = pd.api.types.infer_dtype(df[name], skipna=True)
+        if kind in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+            df[name] = pd.to_numeric(df[name], errors='coerce')
+        elif kind in ('datetime', 'datetime64', 'date'):
+            df[name] = pd.to_datetime(df[name], errors='coerce')
+        elif kind not in ('string', 'empty', 'boolean'):
+            df[name] = df[name].where(df[name].isna(), df[name].astype(str))
+    return df
+
+
+# Function to parse a date column with explicit formats instead of letting pandas
+# guess one per value; values no format matches become NaT
+def _parse_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for date_format in DATE_FORMATS:
+        missing = parsed.isna() & values.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing].astype(str), format=date_format, errors='coerce')
+    return parsed
+
+
+# Function to derive the quarter label ("Q1".."Q4") of each date
+def _quarters(dates):
+    quarter = dates.dt.quarter
+    return ("Q" + quarter.astype('Int64').astype(str)).where(quarter.notna())
+
+
+# Function to apply the preprocessing every claims view used to repeat: dates, name
+# casing (keeping the employer name as entered too), an ordered Month (values outside
+# MONTHS become missing), its 1-12 order (0 when missing), the quarter of the created
+# date, the ICD-10 chapter, block and category of the code (see icd10.py; bump
+# PIPELINE_VERSION after changing its tables) and, if the sheet has none, the year
+def _normalize_claims(df):
+    df['Claim Created Date'] = _parse_dates(df['Claim Created Date'])
+    df[EMPLOYER_AS_ENTERED] = df["Employer Name"]
+    df["Employer Name"] = df["Employer Name"].str.upper()
+    df["Provider Name"] = df["Provider Name"].str.upper()
+    df['Source'] = df['Source'].astype(str)
+    df['Month'] = pd.Categorical(df['Month'], categories=MONTHS, ordered=True)
+    df['Month Order'] = (df['Month'].cat.codes + 1).astype('int8')
+    df['Quarter'] = _quarters(df['Claim Created Date'])
+    df = icd10.join_hierarchy(df)
+    if 'Year' not in df.columns:
+        df['Year'] = df['Claim Created Date'].dt.year
+    df = _coerce_for_arrow(df)
+    for name in CATEGORY_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype('category')
+    return df
+
+
+# Function to apply the preprocessing the loss ratio view used to repeat: the policy
+# dates and the month, year and quarter each policy starts in
+def _normalize_premiums(df):
+    df['Start Date'] = _parse_dates(df['Start Date'])
+    df['End Date'] = _parse_dates(df['End Date'])
+    df['Month'] = df['Start Date'].dt.month_name()
+    df['Year'] = df['Start Date'].dt.year
+    df['Quarter'] = _quarters(df['Start Date'])
+    return df
+
+
+# Function to combine per-chunk Arrow tables into one. Numeric and all-null columns
+# are widened across chunks (int64 + float64 -> float64); a column whose chunks
+# disagree in kind, e.g. numbers in one and text in another, is stored as text, and
+# one that is empty throughout is stored as float like pd.read_excel does.
+def _concat_chunks(tables):
+    kinds = {}
+    for table in tables:
+        for field in table.schema:
+            if pa.types.is_null(field.type):
+                continue
+            value_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+            kind = 'number' if pa.types.is_integer(value_type) or pa.types.is_floating(value_type) else str(value_type)
+            kinds.setdefault(field.name, set()).add(kind)
+    mixed = [name for name, found in kinds.items() if len(found) > 1]
+    for i, table in enumerate(tables):
+        for name in mixed:
+            column = table.column(name)
+            if pa.types.is_dictionary(column.type):
+                column = column.cast(column.type.value_type)
+            tables[i] = table = table.set_column(table.schema.get_field_index(name), name, column.cast(pa.string()))
+    table = pa.concat_tables(tables, promote_options='permissive').unify_dictionaries().combine_chunks()
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table
+
+
+# Function to read a large workbook chunk by chunk. Each chunk is normalized and
+# converted to an Arrow table straight away, so only one chunk at a time is held
+# as Python objects and the openpyxl model of the whole workbook is never built.
+def _stream_workbook(path, pattern, normalize):
+    tables = [
+        pa.Table.from_pandas(_coerce_for_arrow(normalize(chunk)), preserve_index=False)
+        for chunk in stream_year_sheets(path, pattern)
+    ]
+    return _concat_chunks(tables)
+
+
+# Function to compile a workbook into a typed Feather file keyed by its content hash.
+# The workbook is only parsed when no compiled copy exists for its current version;
+# copies left over from earlier versions are removed. Workbooks of STREAM_MIN_BYTES
+# or more are streamed in chunks unless stream is set explicitly.
+def compile_workbook(path, pattern, normalize, version=None, stream=None):
+    version = version or file_version(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(CACHE_DIR, f"{stem}-{version[:16]}-v{PIPELINE_VERSION}.feather")
+    if os.path.exists(target):
+        return target
+
+    if stream is None:
+        stream = os.path.getsize(path) >= STREAM_MIN_BYTES
+    if stream:
+        data = _stream_workbook(path, pattern, normalize)
+    else:
+        data = _coerce_for_arrow(normalize(read_year_sheets(path, pattern)))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    partial = f"{target}.{os.getpid()}-{threading.get_ident()}.tmp"
+    # Uncompressed, so readers can map the file instead of decoding it (see read_mapped)
+    feather.write_feather(data, partial, compression='uncompressed')
+    os.replace(partial, target)
+    _remove_stale_copies(stem, target)
+    return target
+
+
+# Function to remove the compiled copies of a workbook other than target. Only names of
+# the form compile_workbook gives, {stem}-{16 hex digits}-v{N}.feather, are matched, so
+# other files sharing the stem (e.g. claims-cube.feather next to a claims.xlsx) stay.
+def _remove_stale_copies(stem, target):
+    compiled = re.compile(rf"{re.escape(stem)}-[0-9a-f]{{16}}-v\d+\.feather")
+    for name in os.listdir(CACHE_DIR):
+        if compiled.fullmatch(name) and os.path.join(CACHE_DIR, name) != target:
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+# Function to merge a claims extract into the stored dataset and report what changed.
+# The extract may hold the full history or only recent claims: rows past the watermark
+# are appended, rows at or below it replace their claim only where they differ, and
+# claims the extract leaves out are kept. Returns None if the extract (by content) was
+# merged before. Deleted claims are not detected; remove CACHE_DIR to rebuild. A dataset
+# stored by an older PIPELINE_VERSION is rebuilt from the extract. The cube and the
+# ICD-10 rollups are written before the dataset, so a session seeing the new dataset
+# also finds them.
+def ingest_claims(path=CLAIMS_FILE, version=None):
+    version = version or file_version(path)
+    with _ingest_lock:
+        manifest = claims_store.read_manifest(CLAIMS_MANIFEST)
+        if manifest.get('pipeline') != PIPELINE_VERSION:
+            manifest = {}
+        stored_files = [CLAIMS_DATASET, CLAIMS_CUBE, *CLAIMS_ICD_ROLLUPS.values()]
+        if version in manifest.get('extracts', []) and all(os.path.exists(name) for name in stored_files):
+            return None
+
+        extract = pd.read_feather(compile_workbook(path, CLAIM_SHEET_PATTERN, _normalize_claims, version))
+        if manifest and os.path.exists(CLAIMS_DATASET):
+            stored, mark = pd.read_feather(CLAIMS_DATASET), manifest.get('watermark')
+        else:
+            stored, mark = extract.iloc[:0], None
+        merged, report = claims_store.merge_extract(stored, extract, mark)
+
+        claims_store.write_dataset(CLAIMS_CUBE, build_cube(merged))
+        for level, rollup in build_icd_rollups(merged).items():
+            claims_store.write_dataset(CLAIMS_ICD_ROLLUPS[level], rollup)
+        claims_store.write_dataset(CLAIMS_DATASET, merged)
+        claims_store.write_manifest(CLAIMS_MANIFEST, {
+            'pipeline': PIPELINE_VERSION,
+            'watermark': report['watermark_after'],
+            'extracts': manifest.get('extracts', []) + [version],
+            'rows': len(merged),
+        })
+        for hook in _refresh_hooks:
+            hook(report)
+        return report
+
+
+# Function to memory-map an Arrow IPC (Feather) file read-only as a DataFrame. Text
+# columns stay Arrow-backed and numeric and date columns without gaps are used in
+# place, so their data lives in the OS page cache, shared by every session and every
+# process mapping the same file, instead of in a private copy per process. The arrays
+# are read-only: derive new columns rather than writing into these.
+def read_mapped(path):
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+# Loaded once per dataset version and shared by every session; the version argument
+# is part of the cache key, so the merged dataset is read again after each refresh
+@st.cache_resource(show_spinner="Loading claims data...", max_entries=2)
+def _read_claims(path, version):
+    return read_mapped(path)
+
+
+# Also reads the ICD-10 rollups: room for two versions of each file
+@st.cache_resource(show_spinner=False, max_entries=2 * (1 + len(ICD_LEVELS)))
+def _read_cube(path, version):
+    return read_mapped(path)
+
+
+@st.cache_resource(show_spinner="Loading premium data...", max_entries=2)
+def _read_premiums(path, version):
+    return read_mapped(compile_workbook(path, PREMIUM_SHEET_PATTERN, _normalize_premiums, version))
+
+
+# Results shared between sessions are keyed by data version, so after a refresh they
+# would only be unreachable; drop them at once instead of waiting for eviction or TTL
+on_refresh(lambda report: FILTER_CACHE.clear())
+
+
+# Function to load the shared claims frame, merging the extract at path first if it
+# changed. Views get a shallow copy: adding or replacing columns stays local to the
+# view, while the underlying data is shared and must not be modified in place.
+def load_claims(path=CLAIMS_FILE):
+    report = ingest_claims(path)
+    if report is not None and report['watermark_before'] is not None:
+        st.toast(f"Claims refreshed: {report['added']:,} new, {report['updated']:,} changed")
+    return _read_claims(CLAIMS_DATASET, file_version(CLAIMS_DATASET)).copy(deep=False)
+
+
+# Function to load the shared daily cube of the claims dataset; call after load_claims,
+# which keeps it up to date
+def load_cube():
+    return _read_cube(CLAIMS_CUBE, file_version(CLAIMS_CUBE))
+
+
+# Function to load the shared ICD-10 rollups, chapter, block and code, as a list
+# for FilterChain(rollups=...); call after load_claims
+def load_icd_rollups():
+    return [_read_cube(path, file_version(path)) for path in CLAIMS_ICD_ROLLUPS.values()]
+
+
+# Function to identify the claims data the views currently see, for keying caches
+def claims_version():
+    return file_version(CLAIMS_DATASET)
+
+
+def premiums_version(path=PREMIUMS_FILE):
+    return file_version(path)
+
+
+# Function to load the shared premiums frame (same sharing rules as load_claims)
+def load_premiums(path=PREMIUMS_FILE):
+    return _read_premiums(path, file_version(path)).copy(deep=False)
+
+
+# Function to drop categories that filtering left without rows, so charts built
+# from the filtered frame only show values that are actually present
+def compact_categories(df):
+    df = df.copy(deep=False)
+    for name in df.columns[df.dtypes == 'category']:
+        df[name] = df[name].cat.remove_unused_categories()
+    return df
+
+
+# Compile the workbooks ahead of time, e.g. right after a data drop, and merge claims
+# extracts into the dataset: python data_loader.py [--stream] [extract.xlsx ...].
+# --stream streams the workbooks in chunks whatever their size.
+if __name__ == "__main__":
+    stream = True if "--stream" in sys.argv[1:] else None
+    extracts = [arg for arg in sys.argv[1:] if arg != "--stream"] or [CLAIMS_FILE]
+    print(f"{PREMIUMS_FILE} -> {compile_workbook(PREMIUMS_FILE, PREMIUM_SHEET_PATTERN, _normalize_premiums, stream=stream)}")
+    for path in extracts:
+        print(f"{path} -> {compile_workbook(path, CLAIM_SHEET_PATTERN, _normalize_claims, stream=stream)}")
+        report = ingest_claims(path)
+        if report is None:
+            print("  already merged")
+        else:
+            print(f"  {report['added']:,} new, {report['updated']:,} changed, {report['unchanged']:,} unchanged, "
+                  f"{report['rows_stored']:,} rows stored; watermark {report['watermark_after']}")
@@ -0,0 +1,149 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+# Filters select rows through a mask over integer codes of the filtered columns
+# instead of copying the frame at every step, and the options of each filter widget
+# come from one bincount over the masked codes.
+
+# Columns with at most this many distinct values keep one bitmap per value, so a
+# selection is an OR of a few bitmaps; other columns look their codes up instead
+BITMAP_MAX_VALUES = 64
+
+# One filter widget: its session state key, the column it filters, whether its options
+# come from the rows left by the widgets before it (cascade) or from all rows, and an
+# optional function giving its initial selection from its options, for widgets with a
+# default. Widgets are listed in the order the view applies their filters.
+Facet = namedtuple('Facet', ['key', 'column', 'cascade', 'default'], defaults=[True, None])
+
+
+# Index over the rows of a frame. Columns are coded on first use: categorical columns
+# keep their codes and categories (so an ordered 'Month' stays in calendar order),
+# other columns are factorized in sorted order. Missing values have code 0 and are
+# never an option. Row masks are packed bitmaps, one bit per row.
+class Facets:
+    def __init__(self, df):
+        self.df = df
+        self.rows = len(df)
+        self._columns = {}
+        self._sorted = {}
+
+    # Function to code a column once: (codes, labels, per-value bitmaps or None)
+    def _coded(self, column):
+        coded = self._columns.get(column)
+        if coded is None:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, labels = pd.factorize(values, sort=True)
+            codes = (codes + 1).astype(np.min_scalar_type(len(labels)))
+            bitmaps = None
+            if len(labels) <= BITMAP_MAX_VALUES:
+                bitmaps = np.stack([np.packbits(codes == code) for code in range(len(labels) + 1)])
+            coded = self._columns[column] = (codes, labels, bitmaps)
+        return coded
+
+    @property
+    def nbytes(self):
+        return sum(codes.nbytes + (0 if bitmaps is None else bitmaps.nbytes) for codes, _, bitmaps in self._columns.values())
+
+    # Function to check whether a column's values come in ascending order with missing
+    # values last, as the stored claims dataset keeps its created dates. Returns the
+    # number of non-missing rows if so, None otherwise.
+    def _sorted_rows(self, column):
+        if column not in self._sorted:
+            values = self.df[column]
+            valid = int(values.notna().sum())
+            head = values.iloc[:valid]
+            self._sorted[column] = valid if head.notna().all() and head.is_monotonic_increasing else None
+        return self._sorted[column]
+
+    # Function to mask the rows in [start, stop) without touching the others
+    def _range(self, start, stop):
+        keep = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        if stop > start:
+            first, last = start // 8, (stop - 1) // 8
+            keep[first:last + 1] = 0xFF
+            # Bits run from the most significant one, row 8 * byte first
+            keep[first] &= 0xFF >> (start % 8)
+            keep[last] &= (0xFF << (7 - (stop - 1) % 8)) & 0xFF
+        return keep
+
+    # Function to turn a packed mask into a boolean row selector
+    def unpack(self, keep):
+        return np.unpackbits(keep, count=self.rows).view(bool)
+
+    # Function to mask the rows whose column value is one of values
+    def isin(self, column, values):
+        codes, labels, bitmaps = self._coded(column)
+        positions = labels.get_indexer(list(values))
+        positions = positions[positions >= 0] + 1
+        if bitmaps is not None:
+            return np.bitwise_or.reduce(bitmaps[positions], axis=0) if len(positions) else np.zeros_like(bitmaps[0])
+        wanted = np.zeros(len(labels) + 1, dtype=bool)
+        wanted[positions] = True
+        return np.packbits(wanted[codes])
+
+    # Function to mask the rows where the column has a value
+    def notna(self, column):
+        return np.packbits(self._coded(column)[0] > 0)
+
+    # Function to mask the rows whose column value lies in [start, end], or in [start,
+    # end) with inclusive='left', as Series.between. On a sorted column the rows form one
+    # slice, found by binary search; other columns are compared row by row.
+    def between(self, column, start, end, inclusive='both'):
+        values = self.df[column]
+        valid = self._sorted_rows(column)
+        if valid is not None:
+            head = values.iloc[:valid]
+            stop = head.searchsorted(end, side='right' if inclusive == 'both' else 'left')
+            return self._range(head.searchsorted(start, side='left'), stop)
+        return np.packbits(values.between(start, end, inclusive=inclusive).to_numpy(dtype=bool, na_value=False))
+
+    # Function to find the smallest and largest value of a column within the rows kept
+    # by the packed mask keep. On a sorted column these are the first and last kept rows.
+    def bounds(self, column, keep=None):
+        values = self.df[column]
+        valid = self._sorted_rows(column)
+        if valid is None:
+            kept = values if keep is None else values[self.unpack(keep)]
+            return kept.min(), kept.max()
+        keep = self._range(0, valid) if keep is None else keep & self._range(0, valid)
+        nonzero = np.flatnonzero(keep)
+        if not len(nonzero):
+            return values.iloc[:0].min(), values.iloc[:0].max()
+        first, last = nonzero[0], nonzero[-1]
+        first_row = 8 * first + 8 - int(keep[first]).bit_length()
+        last_row = 8 * last + 7 - ((int(keep[last]) & -int(keep[last])).bit_length() - 1)
+        return values.iloc[first_row], values.iloc[last_row]
+
+    # Function to resolve the options of a row of cascading widgets from their current
+    # selections (e.g. st.session_state), within the rows kept by the packed mask keep.
+    # Returns {key: Series of row counts indexed by the options}, options in label
+    # order. Selected values outside the options match nothing, as with isin.
+    def resolve(self, facets, selections, keep=None):
+        base = np.ones(self.rows, dtype=bool) if keep is None else self.unpack(keep)
+        current = base.copy()
+        options = {}
+        for facet in facets:
+            codes, labels, _ = self._coded(facet.column)
+            counts = np.bincount(codes[current if facet.cascade else base], minlength=len(labels) + 1)[1:]
+            present = counts > 0
+            options[facet.key] = pd.Series(counts[present], index=labels[present], name=facet.column)
+
+            selected = selections.get(facet.key)
+            if selected is None and facet.default is not None:
+                selected = facet.default(list(options[facet.key].index))
+            if selected:
+                current &= self.unpack(self.isin(facet.column, selected))
+        return options
+
+
+# Function to list the keys of the widgets whose values can be written back into session
+# state (e.g. to keep them while their view is hidden): widgets with a default are left
+# out, as Streamlit warns when their value is also set through session state
+def state_keys(facets):
+    return [facet.key for facet in facets if facet.default is None]
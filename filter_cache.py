@@ -0,0 +1,364 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import cube as claims_cube
+import sql_engine
+from facets import Facets
+
+
+# One cache per process, shared by every session: users looking at the same data with
+# the same filters reuse each other's results.
+
+# Limits for the shared cache; whichever is reached first evicts least recently used entries
+MAX_ENTRIES = int(os.environ.get("FILTER_CACHE_MAX_ENTRIES", 512))
+MAX_BYTES = int(os.environ.get("FILTER_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+# Entries older than this are computed again. Keys already follow the data version, and
+# data_loader clears the cache when new data comes in, so this only bounds how long
+# results of an unnoticed change (e.g. a copied-back file) can live.
+TTL_SECONDS = float(os.environ.get("FILTER_CACHE_TTL_HOURS", 24)) * 3600
+
+# Bytes of cached results one session may own; past it, that session's least recently
+# used results are dropped first. Results computed outside a session (e.g. the warm-up)
+# have no owner and only count towards MAX_BYTES.
+SESSION_MAX_BYTES = int(os.environ.get("FILTER_CACHE_SESSION_MAX_MB", 128)) * 1024 * 1024
+
+# With CLAIMS_SQL_ENGINE=1 (and DuckDB installed), rollups no cube can answer are
+# queried from the claims dataset file by sql_engine instead of grouped from the rows
+SQL_ROLLUPS = os.environ.get("CLAIMS_SQL_ENGINE") == "1"
+
+
+# Function to estimate the memory held by a cached value
+def _nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, str):
+        return len(value)
+    # Objects that report their own size, e.g. facets.Facets
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    # Plotly figures, by the data and layout they hold
+    if hasattr(value, 'to_plotly_json'):
+        return _nbytes(value.to_plotly_json())
+    return 64
+
+
+# LRU cache bounded by entry count and by bytes, with a time to live per entry and
+# hit/miss counters. Sessions asking for the same missing key at once wait for the
+# first one to compute it instead of all computing it. Each entry is owned by the
+# session that computed it (see owned_by), so memory can be reported and bounded per
+# session; keys starting with a view name (as FilterChain's do) are reported per view.
+class FilterCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL_SECONDS, session_max_bytes=SESSION_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.session_max_bytes = session_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._owned = {}
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._local = threading.local()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    # Function to attribute what the current thread computes within the block to
+    # owner, e.g. the id of the session whose script run it is
+    @contextmanager
+    def owned_by(self, owner):
+        previous = getattr(self._local, 'owner', None)
+        self._local.owner = owner
+        try:
+            yield
+        finally:
+            self._local.owner = previous
+
+    # Function to remove an entry and its bytes; call with the lock held
+    def _drop(self, key):
+        _, size, _, owner = self._entries.pop(key)
+        self._bytes -= size
+        if owner is not None:
+            self._owned[owner] -= size
+            if not self._owned[owner]:
+                del self._owned[owner]
+
+    # Function to find a live entry; call with the lock held
+    def _lookup(self, key, missing):
+        entry = self._entries.get(key)
+        if entry is None:
+            return missing
+        if time.monotonic() - entry[2] > self.ttl:
+            self._drop(key)
+            self.expirations += 1
+            return missing
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key, default=None):
+        missing = object()
+        with self._lock:
+            value = self._lookup(key, missing)
+            if value is missing:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        owner = getattr(self._local, 'owner', None)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            # A value larger than the whole budget, or the owner's, is returned but not kept
+            if size > self.max_bytes or (owner is not None and size > self.session_max_bytes):
+                return value
+            self._entries[key] = (value, size, time.monotonic(), owner)
+            self._bytes += size
+            if owner is not None:
+                self._owned[owner] = self._owned.get(owner, 0) + size
+                # Oldest first, leaving the entry just stored
+                for old_key in [k for k, entry in self._entries.items() if entry[3] == owner and k != key]:
+                    if self._owned[owner] <= self.session_max_bytes:
+                        break
+                    self._drop(old_key)
+                    self.evictions += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    # Function to return the cached value for key, computing and storing it on a miss
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            with self._lock:
+                pending = self._pending.setdefault(key, threading.Lock())
+            with pending:
+                with self._lock:
+                    value = self._lookup(key, missing)
+                if value is missing:
+                    value = self.put(key, compute())
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+        return value
+
+    # Function to drop every entry, e.g. when new data has been loaded
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._owned.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    # Function to report approximate bytes held: {'sessions': {owner: bytes},
+    # 'views': {view: bytes}}, owner None standing for results computed outside a
+    # session and view None for keys that do not start with a view name
+    def usage(self):
+        sessions, views = {}, {}
+        with self._lock:
+            for key, (_, size, _, owner) in self._entries.items():
+                view = key[0] if isinstance(key, tuple) and key and isinstance(key[0], str) else None
+                sessions[owner] = sessions.get(owner, 0) + size
+                views[view] = views.get(view, 0) + size
+        return {'sessions': sessions, 'views': views}
+
+
+FILTER_CACHE = FilterCache()
+
+
+# Function to put one filter value in a canonical form: numpy scalars as Python values,
+# dates as ISO strings, so equal selections always give equal signatures
+def _canonical(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'isoformat'):
+        return pd.Timestamp(value).isoformat()
+    if hasattr(value, 'item'):
+        value = value.item()
+    return repr(value)
+
+
+# Filters applied one after another, as the views do. Each filter only narrows a packed
+# row mask over the frame the chain started from (see facets.Facets), cached under the
+# signature of all filters applied so far; the rows themselves are materialized once,
+# when something asks for them. The signature starts from the view and the data
+# version, so a reload or another view never reuses a result. Selections are
+# order-independent; empty selections leave the mask (and signature) unchanged. Frames
+# handed out are shallow copies, so adding or renaming columns on them does not touch
+# the cache.
+# Given the daily cube of the same rows, and any rollups built like it (e.g. the ICD-10
+# rollups), each filter is applied to them as well while the filtered column is one of
+# their dimensions; rollup() then answers from the first that is left with the columns
+# asked for. A filter on any other column (e.g. Diagnosis) drops a cube, and rollup()
+# falls back to the rows once none is left.
+# Given the dataset file the rows were read from (path), the filters are also kept as a
+# query for sql_engine, which serves those fallbacks when SQL_ROLLUPS is on.
+class FilterChain:
+    def __init__(self, df, *key, cache=FILTER_CACHE, cube=None, rollups=(), path=None):
+        self.base = df
+        self.index_key = key + (('index',),)
+        self.index = cache.get_or_compute(self.index_key, lambda: Facets(df))
+        self.index_bytes = self.index.nbytes
+        self.keep = None
+        self.cubes = [cube, *rollups]
+        self.signature = key
+        self.cache = cache
+        self.path = path
+        self.query = {'filters': {}, 'present': [], 'start': None, 'end': None}
+
+    # Function to add a filter to the sql_engine query, or give the query up when the
+    # filter cannot be expressed in it (e.g. a second selection on the same column)
+    def _query(self, name, column, value):
+        if self.query is None:
+            return
+        if name == 'filters' and column not in self.query['filters']:
+            self.query['filters'][column] = list(value)
+        elif name == 'present':
+            self.query['present'].append(column)
+        elif name == 'dates' and column == claims_cube.DATE_COLUMN and self.query['start'] is None:
+            self.query['start'], self.query['end'] = value
+        else:
+            self.query = None
+
+    # Function to store the index again once it has coded more columns (it codes them
+    # on first use), so the cache and the session budget count what it has grown by
+    def _account(self):
+        if self.index.nbytes != self.index_bytes:
+            self.index_bytes = self.index.nbytes
+            self.cache.put(self.index_key, self.index)
+
+    def _apply(self, step, select, compute):
+        self.signature += (step,)
+        keep = self.keep
+        self.keep = self.cache.get_or_compute(self.signature, lambda: select() if keep is None else select() & keep)
+        self._account()
+        self.cubes = [
+            None if cube is None or step[1] not in cube.columns
+            else self.cache.get_or_compute(self.signature + (('cube', position),), lambda cube=cube: compute(cube))
+            for position, cube in enumerate(self.cubes)
+        ]
+
+    # Function to keep rows where the column has a value
+    def notna(self, column):
+        self._apply(('notna', column), lambda: self.index.notna(column), lambda df: df[df[column].notna()])
+        self._query('present', column, None)
+
+    # Function to keep rows whose column value is one of the selected values
+    def isin(self, column, values):
+        if not len(values):
+            return
+        step = ('isin', column, tuple(sorted(_canonical(value) for value in values)))
+        self._apply(step, lambda: self.index.isin(column, values), lambda df: df[df[column].isin(values)])
+        self._query('filters', column, values)
+
+    # Function to keep rows whose column value lies in [start, end]. The created date is
+    # filtered on whole days, the grain of the cube, so rows and cube agree: every claim
+    # of the end day is kept, whatever its time.
+    def between(self, column, start, end):
+        self._query('dates', column, (start, end))
+        if column == claims_cube.DATE_COLUMN:
+            start, end = claims_cube.day_range(start, end)
+            inclusive = 'left'
+        else:
+            inclusive = 'both'
+        step = ('between', column, _canonical(start), _canonical(end), inclusive)
+        self._apply(
+            step,
+            lambda: self.index.between(column, start, end, inclusive),
+            lambda df: df[df[column].between(start, end, inclusive=inclusive)],
+        )
+
+    # The rows kept so far, materialized once per filter state
+    @property
+    def frame(self):
+        if self.keep is None:
+            return self.base
+        keep = self.keep
+        return self.cache.get_or_compute(self.signature + (('rows',),), lambda: self.base[self.index.unpack(keep)])
+
+    # Function to hand out the rows kept so far
+    def rows(self):
+        return self.frame.copy(deep=False)
+
+    # Function to find the smallest and largest value of a column in the rows kept so far,
+    # e.g. the default date range, without materializing the rows
+    def bounds(self, column):
+        return self.index.bounds(column, self.keep)
+
+    # Function to resolve filter widget options (see facets.Facets.resolve) within the
+    # rows kept so far
+    def options(self, facets, selections):
+        options = self.index.resolve(facets, selections, self.keep)
+        self._account()
+        return options
+
+    # Function to cache something derived from the current rows, e.g. an aggregate,
+    # under the current signature
+    def memo(self, name, compute):
+        value = self.cache.get_or_compute(self.signature + (('memo', name),), lambda: compute(self.frame))
+        return value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+
+    # Function to build a chart once per filter state: the figure is cached under the
+    # current signature and the chart id (unique within the view) and shared between
+    # sessions, so the returned figure must be displayed as is, not updated
+    def figure(self, chart_id, build):
+        return self.cache.get_or_compute(self.signature + (('figure', chart_id),), build)
+
+    # Function to group the current rows by the given columns with sql_engine, as
+    # rollup() does in pandas; None when the query cannot be run there
+    def _sql_rollup(self, by, measure, how):
+        columns = [by] if isinstance(by, str) else list(by)
+        if (not SQL_ROLLUPS or self.path is None or self.query is None or not sql_engine.available()
+                or how not in ('sum', 'mean', 'size')
+                or not set(columns + [measure] * (how != 'size')) <= set(sql_engine.columns(self.path))):
+            return None
+        value = None if how == 'size' else measure
+        query = self.query
+        result = self.cache.get_or_compute(
+            self.signature + (('sql', tuple(columns), value, how),),
+            lambda: sql_engine.aggregate(self.path, columns, value, how.replace('mean', 'avg'), query['filters'], query['start'], query['end'], present=query['present']),
+        )
+        return result.set_index(by)[value or 'Count'].rename(value)
+
+    # Function to group the current rows by the given columns and reduce measure with how
+    # ('sum', 'mean' or 'size'), or reduce all rows when by is None. Served from a cube
+    # still in step with the rows that has the columns, with sql_engine when enabled,
+    # from the rows otherwise.
+    def rollup(self, by, measure=None, how='sum'):
+        columns = [] if by is None else [by] if isinstance(by, str) else list(by)
+        for cube in self.cubes:
+            if cube is not None and set(columns) <= set(cube.columns):
+                return claims_cube.rollup(cube, by, measure, how)
+        if by is not None:
+            result = self._sql_rollup(by, measure, how)
+            if result is not None:
+                return result
+        if by is None:
+            return len(self.frame) if how == 'size' else self.frame[measure].agg(how)
+        grouped = self.frame.groupby(by, observed=True)
+        return grouped.size() if how == 'size' else grouped[measure].agg(how)
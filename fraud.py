@@ -10,6 +10,35 @@ from itertools import chain
 from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 
+import charts
+import timeseries
+from data_loader import CLAIMS_DATASET, claims_version, compact_categories, load_claims
+from facets import Facet, state_keys
+from filter_cache import FilterChain
+from kpis import ClaimKPIs
+
+
+# The filter widgets of the view, in the order their filters are applied (see facets.Facet)
+FACETS = [
+    Facet("sidebar__type_multiselect", 'Claim Type', cascade=False),
+    Facet("sidebar__status_multisect", 'Claim Status', cascade=False),
+    Facet("sidebar_source_multi", 'Source', cascade=False),
+    Facet("sidebar_diagnosis_mulselect", 'Diagnosis', cascade=False),
+    Facet("sidebar_employer_name_multisect", 'Employer Name', cascade=False),
+    Facet("sidebar_provider_name_multisect", 'Provider Name', cascade=False),
+    Facet("year_selector_multilect", 'Year', default=lambda years: years[-1:]),
+    Facet("month_selector_multilect", 'Month', cascade=False),
+    Facet("filter_quarter_multisele", 'Quarter'),
+    Facet("filter_business_line_multisect", 'Product'),
+    Facet("employer_selector_multiselt", 'Employer Name'),
+    Facet("Provider_selector_multilect", 'Provider Name'),
+    Facet("outlier_multislect", 'Outlier Level', default=lambda values: values[:1]),
+    Facet("status_multielect", 'Claim Status', default=lambda values: values[:1]),
+]
+
+# Keys of the filter widgets whose values are kept while the view is hidden
+FILTER_KEYS = state_keys(FACETS)
+
 
 def display_fraud():
 
@@ -33,23 +62,8 @@ def display_fraud():
     st.markdown('<h1 class="main-title">CLAIMS ABNORMALITIES</h1>', unsafe_allow_html=True)
 
 
-    # File paths and sheet names
-    filepath_visits = "Claims.xlsx"
-    sheet_name1 = "2023 claims"
-    sheet_name2 = "2024 claims"
-
-    # Read the Claims data
-    dfc_2023 = pd.read_excel(filepath_visits, sheet_name=sheet_name1)
-    dfc_2024 = pd.read_excel(filepath_visits, sheet_name=sheet_name2)
-
-    # Concatenate the dataframes
-    df = pd.concat([dfc_2023, dfc_2024])
-
-    # Data preprocessing
-    df['Claim Created Date'] = pd.to_datetime(df['Claim Created Date'], errors='coerce')
-
-    df["Employer Name"] = df["Employer Name"].str.upper()
-    df["Provider Name"] = df["Provider Name"].str.upper()
+    # Load the shared, normalized claims data
+    df = load_claims()
 
     column = 'Claim Amount'
     # Compute Q1, Q3, and IQR
@@ -118,12 +132,6 @@ def display_fraud():
         </style>
         """, unsafe_allow_html=True)
 
-    # Dictionary to map month names to their order
-    month_order = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6, "July": 7, "August": 8,
-        "September": 9, "October": 10, "November": 11, "December": 12
-    }
     # Define the mapping of months to quarters
     month_to_quarter = {
         "January": "Q1", "February": "Q1", "March": "Q1",
@@ -131,67 +139,73 @@ def display_fraud():
         "July": "Q3", "August": "Q3", "September": "Q3",
         "October": "Q4", "November": "Q4", "December": "Q4"
     }
-    # Filter DataFrame by months in `month_order`
-    df = df[df['Month'].isin(month_order)]
+    # Filters below are applied through a cached chain: repeating a selection
+    # reuses the rows it produced before instead of filtering again
+    filters = FilterChain(df, "Fraud Detection", claims_version(), path=CLAIMS_DATASET)
+
+    # Keep rows whose month is a calendar month ('Month' is ordered at load)
+    filters.notna('Month')
 
-    # Sort months based on their order
-    sorted_months = sorted(df['Month'].dropna().unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
-    df['Source'] = df['Source'].astype(str)
-    df['Quarter'] = "Q" + df['Claim Created Date'].dt.quarter.astype(str)
+    # Options for every filter widget below, each from the rows the filters before it
+    # leave, resolved up front from the selections in session state
+    options = filters.options(FACETS, st.session_state)
 
 
+    # Months present, in calendar order
+    sorted_months = list(options["month_selector_multilect"].index)
+
     # Sidebar for filters
     st.sidebar.header("Filters")
 
     type = st.sidebar.multiselect(
         "Select Claim Type",
-        options=sorted(df['Claim Type'].unique()),
+        options=list(options["sidebar__type_multiselect"].index),
         key="sidebar__type_multiselect"
     )
 
     status = st.sidebar.multiselect(
         "Select Claim Status",
-        options=df['Claim Status'].unique(),
+        options=list(options["sidebar__status_multisect"].index),
         key="sidebar__status_multisect"
     )
 
     source = st.sidebar.multiselect(
         "Select Claim Provider Type",
-        options=sorted(df['Source'].unique()),
+        options=list(options["sidebar_source_multi"].index),
         key="sidebar_source_multi"
     )
 
     code = st.sidebar.multiselect(
         "Select Diagnosis Code",
-        options=df['Diagnosis'].unique(),
+        options=list(options["sidebar_diagnosis_mulselect"].index),
         key="sidebar_diagnosis_mulselect"
     )
 
     client_name = st.sidebar.multiselect(
         "Select Employer Name",
-        options=sorted(df['Employer Name'].dropna().unique()),
+        options=list(options["sidebar_employer_name_multisect"].index),
         key="sidebar_employer_name_multisect"
     )
 
     prov_name = st.sidebar.multiselect(
         "Select Provider Name",
-        options=sorted(df['Provider Name'].dropna().unique()),
+        options=list(options["sidebar_provider_name_multisect"].index),
         key="sidebar_provider_name_multisect"
     )
 
     # Apply filters to the DataFrame
     if 'Claim Type' in df.columns and type:
-        df = df[df['Claim Type'].isin(type)]
+        filters.isin('Claim Type', type)
     if 'Claim Status' in df.columns and status:
-        df = df[df['Claim Status'].isin(status)]
+        filters.isin('Claim Status', status)
     if 'Source' in df.columns and source:
-        df = df[df['Source'].isin(source)]
+        filters.isin('Source', source)
     if 'Diagnosis' in df.columns and code:
-        df = df[df['Diagnosis'].isin(code)]
+        filters.isin('Diagnosis', code)
     if 'Employer Name' in df.columns and client_name:
-        df = df[df['Employer Name'].isin(client_name)]
+        filters.isin('Employer Name', client_name)
     if 'Provider Name' in df.columns and prov_name:
-        df = df[df['Provider Name'].isin(prov_name)]
+        filters.isin('Provider Name', prov_name)
 
 
     # Create a three-column layout
@@ -199,7 +213,7 @@ def display_fraud():
 
     # Year selector (allow multiple selections)
     with col1:
-        years = sorted(df['Year'].dropna().unique())
+        years = list(options["year_selector_multilect"].index)
         selected_years = st.multiselect(
             "Select Years",
             options=years,
@@ -207,7 +221,7 @@ def display_fraud():
             key="year_selector_multilect"
         )
         if selected_years:
-            df = df[df['Year'].isin(selected_years)]
+            filters.isin('Year', selected_years)
 
     # Month selector (allow multiple selections)
     with col2:
@@ -217,35 +231,35 @@ def display_fraud():
             key="month_selector_multilect"
         )
         if selected_months:
-            df = df[df['Month'].isin(selected_months)]
+            filters.isin('Month', selected_months)
 
         # Dynamically calculate the quarters based on selected months
         if selected_months:
             suggested_quarters = list(set(month_to_quarter[month] for month in selected_months))
         else:
-            suggested_quarters = sorted(df['Quarter'].dropna().unique())  # Default to all quarters
+            suggested_quarters = list(options["filter_quarter_multisele"].index)  # Default to all quarters
 
     # Quarter selector (allow manual selection, with dynamic suggestions)
     with col3:
-        quarters = sorted(df['Quarter'].dropna().unique())
+        quarters = list(options["filter_quarter_multisele"].index)
         selected_quarters = st.multiselect(
             "Select Quarters",
             options=quarters,
             key="filter_quarter_multisele"
         )
         if selected_quarters:
-            df = df[df['Quarter'].isin(selected_quarters)]
+            filters.isin('Quarter', selected_quarters)
 
     # Business Line selector (pre-select all options by default)
     with col4:
-        business_lines = sorted(df['Product'].dropna().unique()) if 'Product' in df.columns else []
+        business_lines = list(options["filter_business_line_multisect"].index)
         selected_business_lines = st.multiselect(
             "Select Business Lines",
             options=business_lines,
             key="filter_business_line_multisect"
         )
         if selected_business_lines:
-            df = df[df['Product'].isin(selected_business_lines)]
+            filters.isin('Product', selected_business_lines)
 
 
     # Create a three-column layout
@@ -253,30 +267,30 @@ def display_fraud():
 
     # Year selector (allow multiple selections)
     with col3:
-        years = sorted(df['Employer Name'].dropna().unique())
+        years = list(options["employer_selector_multiselt"].index)
         selected_years = st.multiselect(
             "Select Employer Group",
             options=years,
             key="employer_selector_multiselt"
         )
         if selected_years:
-            df = df[df['Employer Name'].isin(selected_years)]
+            filters.isin('Employer Name', selected_years)
 
     # Year selector (allow multiple selections)
     with col4:
-        years = sorted(df['Provider Name'].dropna().unique())
+        years = list(options["Provider_selector_multilect"].index)
         selected_years = st.multiselect(
             "Select Service Provider",
             options=years,
             key="Provider_selector_multilect"
         )
         if selected_years:
-            df = df[df['Provider Name'].isin(selected_years)]
+            filters.isin('Provider Name', selected_years)
 
 
         # Claim Status selector (pre-select one status by default)
         with col1:
-            business_lines = sorted(df['Outlier Level'].dropna().unique()) if 'Outlier Level' in df.columns else []
+            business_lines = list(options["outlier_multislect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -288,11 +302,11 @@ def display_fraud():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Outlier Level'].isin(selected_business_lines)]
+                filters.isin('Outlier Level', selected_business_lines)
 
         # Claim Status selector (pre-select one status by default)
         with col2:
-            business_lines = sorted(df['Claim Status'].dropna().unique()) if 'Claim Status' in df.columns else []
+            business_lines = list(options["status_multielect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -304,19 +318,11 @@ def display_fraud():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Status'].isin(selected_business_lines)]
-
+                filters.isin('Claim Status', selected_business_lines)
 
-    # Dynamically calculate the date range based on selected filters
-    if selected_months:
-        # Filter DataFrame by selected months
-        df_filtered = df[df['Month'].isin(selected_months)]
-    else:
-        df_filtered = df
 
-    # Get the minimum and maximum dates from the filtered DataFrame
-    startDate = df_filtered["Claim Created Date"].min()
-    endDate = df_filtered["Claim Created Date"].max()
+    # Date range of the rows the filters above keep (selected months included)
+    startDate, endDate = filters.bounds("Claim Created Date")
 
 
     # Define CSS for the styled date input boxes
@@ -367,37 +373,40 @@ def display_fraud():
 
     # Filter the DataFrame based on the selected date range
     if date1 and date2:
-        df = df[(df["Claim Created Date"] >= date1) & (df["Claim Created Date"] <= date2)]
+        filters.between("Claim Created Date", date1, date2)
+
+    # Drop categories the filters removed so charts only show what is left
+    df = filters.memo("compact", compact_categories)
 
 
     # Filter data by product type
     df_health = df[df['Product'] == 'Health Insurance']
     df_proactiv = df[df['Product'] == 'ProActiv']
 
-    # Filter data by claim status
-    df_app = df[df['Claim Status'] == 'Approved']
-    df_dec = df[df['Claim Status'] == 'Declined']
-
     if not df.empty:
         scale = 1_000_000  # For millions
         scaling = 1000  # For thousands
 
-        # General Metrics
-        total_claim_amount = (df["Claim Amount"].sum()) / scale
-        average_amount = (df["Claim Amount"].mean()) / scaling
-        average_app_amount = (df["Approved Claim Amount"].mean()) / scaling
+        # Calculate key metrics, all from one pass over the filtered claims
+        kpis = filters.memo("kpis", ClaimKPIs)
+        total_claim_amount = kpis.claim_amount / scale
+        average_amount = kpis.average_amount / scaling
+        average_app_amount = kpis.average_approved_amount / scaling
+
+        total_app_claim_amount = kpis.status('Approved', 'approved_amount') / scale
+        total_dec_claim_amount = kpis.status('Declined', 'claim_amount') / scaling
 
-        total_app_claim_amount = (df_app["Approved Claim Amount"].sum()) / scale
-        total_dec_claim_amount = (df_dec["Claim Amount"].sum()) / scaling
+        total_app = kpis.status('Approved')
+        total_dec = kpis.status('Declined')
 
-        total_app = df_app["Claim ID"].nunique()
-        total_dec = df_dec["Claim ID"].nunique()
+        total_clients = kpis.clients
+        total_claims = kpis.claims
 
-        total_clients = df["Employer Name"].nunique()
-        total_claims = df["Claim ID"].nunique()
+        # Approval Rate (Claims Approved / Total Claims)
+        approval_rate = kpis.rate('Approved')
 
-        approval_rate = (total_app / total_claims) * 100 if total_claims > 0 else 0
-        denial_rate = (total_dec / total_claims) * 100 if total_claims > 0 else 0
+        # Denial Rate (Claims Declined / Total Claims)
+        denial_rate = kpis.rate('Declined')
 
         # Fraud-Specific Metrics (IQR-Based)
         Q1 = df['Claim Amount'].quantile(0.25)
@@ -421,8 +430,8 @@ def display_fraud():
         total_normal_outliers = (df['Outlier Level'] == 'Normal').sum()
 
         # High-Frequency Providers/Members
-        top_providers = df.groupby('Provider Name')['Claim ID'].count().nlargest(5).reset_index()
-        top_members = df.groupby('Member Name')['Claim ID'].count().nlargest(5).reset_index()
+        top_providers = df.groupby('Provider Name', observed=True)['Claim ID'].count().nlargest(5).reset_index()
+        top_members = df.groupby('Member Name', observed=True)['Claim ID'].count().nlargest(5).reset_index()
 
         # Discrepancies Between Requested and Approved Amounts
         df['Amount Discrepancy'] = abs(df['Claim Amount'] - df['Approved Claim Amount'])
@@ -495,285 +504,269 @@ def display_fraud():
 
         col1, col2 = st.columns(2)
 
-        # Group data by Claim Created Date and Outlier Level, and count occurrences
-        outlier_count = (
-            df.groupby([df["Claim Created Date"].dt.strftime("%Y-%m-%d"), "Outlier Level"])
-            .size()
-            .reset_index(name="Count")
-        )
-
-        # Pivot the data for plotting (Outlier Level as columns)
-        pivot_outlier = outlier_count.pivot(
-            index="Claim Created Date", columns="Outlier Level", values="Count"
-        ).fillna(0)
-
-        # Sort the data by date
-        pivot_outlier = pivot_outlier.sort_index()
-
         with col1:
             # Create the stacked area chart
-            fig_outlier_time = go.Figure()
-
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(pivot_outlier.columns):
-                fig_outlier_time.add_trace(
-                    go.Scatter(
-                        x=pivot_outlier.index,
-                        y=pivot_outlier[outlier_level],
-                        mode="lines",
-                        stackgroup="one",  # This creates a stacked area chart
-                        name=outlier_level,
-                        line=dict(width=0.5, color=custom_colors[i % len(custom_colors)]),
-                        hoverinfo="x+y+name",
-                        fillcolor=custom_colors[i % len(custom_colors)],
-                    )
+            def build_fig_outlier_time():
+                # Count claims per period of the selected range and Outlier Level (Outlier Level as columns)
+                pivot_outlier = timeseries.resample(
+                    df["Claim Created Date"], timeseries.pick_grain(date1, date2), by=df["Outlier Level"]
                 )
 
-            # Update layout
-            fig_outlier_time.update_layout(
-                xaxis_title="Claim Created Date",
-                yaxis_title="Number of Claims",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
-                height=450,
-            )
+                fig_outlier_time = go.Figure()
+
+                # Add traces for each Outlier Level
+                fig_outlier_time.add_traces(charts.series_traces(
+                    pivot_outlier,
+                    trace=go.Scatter,
+                    colors=custom_colors,
+                    color_props=("line_color", "fillcolor"),
+                    mode="lines",
+                    stackgroup="one",  # This creates a stacked area chart
+                    line=dict(width=0.5),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Update layout
+                fig_outlier_time.update_layout(
+                    xaxis_title="Claim Created Date",
+                    yaxis_title="Number of Claims",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
+                    height=450,
+                )
+                return fig_outlier_time
+
+            fig_outlier_time = filters.figure("Outlier Distribution Over Time", build_fig_outlier_time)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Outlier Distribution Over Time</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_outlier_time, use_container_width=True)
 
-        # Filter claims with high discrepancies
-        high_discrepancy_data = df[df["Amount Discrepancy"] > avg_discrepancy * 2]
+        with col2:
 
-        # Group data by Provider Name to calculate total discrepancy
-        provider_discrepancy = (
-            high_discrepancy_data.groupby("Provider Name")["Amount Discrepancy"]
-            .sum()
-            .reset_index()
-        )
+            # Create the bar chart
+            def build_fig_discrepancy():
+                # Filter claims with high discrepancies
+                high_discrepancy_data = df[df["Amount Discrepancy"] > avg_discrepancy * 2]
+
+                # Group data by Provider Name to calculate total discrepancy
+                provider_discrepancy = (
+                    high_discrepancy_data.groupby("Provider Name", observed=True)["Amount Discrepancy"]
+                    .sum()
+                    .reset_index()
+                )
 
-        # Sort providers by total discrepancy
-        provider_discrepancy = provider_discrepancy.sort_values(by="Amount Discrepancy", ascending=False).head(10)
+                # Sort providers by total discrepancy
+                provider_discrepancy = provider_discrepancy.sort_values(by="Amount Discrepancy", ascending=False).head(10)
 
-        with col2:
+                fig_discrepancy = go.Figure()
 
-            # Create the bar chart
-            fig_discrepancy = go.Figure()
+                fig_discrepancy.add_trace(
+                    go.Bar(
+                        x=provider_discrepancy["Provider Name"],
+                        y=provider_discrepancy["Amount Discrepancy"],
+                        text=charts.text_labels(provider_discrepancy["Amount Discrepancy"], 1e3, suffix="K"),
+                        textposition="inside",
+                        textfont=dict(color="white"),
+                        hoverinfo="x+y",
+                        marker_color="#009DAE",
+                    )
+                )
 
-            fig_discrepancy.add_trace(
-                go.Bar(
-                    x=provider_discrepancy["Provider Name"],
-                    y=provider_discrepancy["Amount Discrepancy"],
-                    text=[f"{value / 1e3:.0f}K" for value in provider_discrepancy["Amount Discrepancy"]],
-                    textposition="inside",
-                    textfont=dict(color="white"),
-                    hoverinfo="x+y",
-                    marker_color="#009DAE",
+                # Update layout
+                fig_discrepancy.update_layout(
+                    xaxis_title="Provider Name",
+                    yaxis_title="Total Discrepancy ()",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
                 )
-            )
+                return fig_discrepancy
 
-            # Update layout
-            fig_discrepancy.update_layout(
-                xaxis_title="Provider Name",
-                yaxis_title="Total Discrepancy ()",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-            )
+            fig_discrepancy = filters.figure("Discrepancy Between Requested and Approved Amounts", build_fig_discrepancy)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Discrepancy Between Requested and Approved Amounts</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_discrepancy, use_container_width=True)
 
-        # Group by Outlier Level and sum the Claim Amount
-        outlier_claim_amount = (
-            df.groupby("Outlier Level")["Claim Amount"]
-            .sum()
-            .reset_index(name="Total Claim Amount")
-        )
-
-        # Sort by Total Claim Amount in descending order
-        outlier_claim_amount = outlier_claim_amount.sort_values(by="Total Claim Amount", ascending=False)
-
         cols1, cols2 = st.columns(2)
 
         with cols1:
             # Create the bar chart for outliers by claim amount
-            fig_outlier_claim_amount = go.Figure()
+            def build_fig_outlier_claim_amount():
+                # Group by Outlier Level and sum the Claim Amount
+                outlier_claim_amount = (
+                    df.groupby("Outlier Level", observed=True)["Claim Amount"]
+                    .sum()
+                    .reset_index(name="Total Claim Amount")
+                )
 
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(outlier_claim_amount["Outlier Level"]):
-                fig_outlier_claim_amount.add_trace(
-                    go.Bar(
-                        x=[outlier_level],  # Outlier Level as x-axis
-                        y=outlier_claim_amount.loc[outlier_claim_amount["Outlier Level"] == outlier_level, "Total Claim Amount"],
-                        name=outlier_level,
-                        text=[
-                            f"{value / 1e6:.1f}M"
-                            for value in outlier_claim_amount.loc[
-                                outlier_claim_amount["Outlier Level"] == outlier_level, "Total Claim Amount"
-                            ]
-                        ],  # Format text as X.M
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],  # Assign color based on index
-                    )
+                # Sort by Total Claim Amount in descending order
+                outlier_claim_amount = outlier_claim_amount.sort_values(by="Total Claim Amount", ascending=False)
+
+                fig_outlier_claim_amount = go.Figure()
+
+                # Add traces for each Outlier Level
+                fig_outlier_claim_amount.add_traces(charts.series_traces(
+                    outlier_claim_amount, "Outlier Level", "Total Claim Amount", "Outlier Level",  # Outlier Level as x-axis
+                    colors=custom_colors,  # Assign color based on index
+                    text=lambda values: charts.text_labels(values, 1e6, 1, suffix="M"),  # Format text as X.M
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the Outliers by Claim Amount chart
+                fig_outlier_claim_amount.update_layout(
+                    barmode="stack",  # Stacked bar chart
+                    xaxis_title="Outlier Level",
+                    yaxis_title="Total Claim Amount ()",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=500,
+                    legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
                 )
+                return fig_outlier_claim_amount
 
-            # Set layout for the Outliers by Claim Amount chart
-            fig_outlier_claim_amount.update_layout(
-                barmode="stack",  # Stacked bar chart
-                xaxis_title="Outlier Level",
-                yaxis_title="Total Claim Amount ()",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=500,
-                legend=dict(x=0, y=1.1, orientation="h"),  # Place legend above the chart
-            )
+            fig_outlier_claim_amount = filters.figure("Outliers by Claim Amount", build_fig_outlier_claim_amount)
 
             # Display the Outliers by Claim Amount chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Outliers by Claim Amount</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_outlier_claim_amount, use_container_width=True)
 
-        # Group data by "Product" and "Outlier Level" and count the number of claims
-        product_outliers = df.groupby(['Product', 'Outlier Level'])['Claim ID'].count().unstack().fillna(0)
-        # Ensure all outlier levels are present in the columns (even if some products don't have certain levels)
-        product_outliers = product_outliers.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
-
         with cols2:
-            fig_product_outliers = go.Figure()
-
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(product_outliers.columns):
-                fig_product_outliers.add_trace(go.Bar(
-                    x=product_outliers.index,
-                    y=product_outliers[outlier_level],
-                    name=outlier_level,
-                    text=product_outliers[outlier_level].apply(lambda x: f"{x}" if x > 0 else ""),  # Show raw count
+            def build_fig_product_outliers():
+                # Group data by "Product" and "Outlier Level" and count the number of claims
+                product_outliers = df.groupby(['Product', 'Outlier Level'], observed=True)['Claim ID'].count().unstack().fillna(0)
+                # Ensure all outlier levels are present in the columns (even if some products don't have certain levels)
+                product_outliers = product_outliers.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
+
+                fig_product_outliers = go.Figure()
+
+                # Add traces for each Outlier Level
+                fig_product_outliers.add_traces(charts.series_traces(
+                    product_outliers,
+                    colors=custom_colors,
+                    text=lambda values: charts.text_labels(values, decimals=None, hide_at_or_below=0),  # Show raw count
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[i % len(custom_colors)],
                 ))
 
-            # Set layout for the Number of Claims by Product and Outlier Level chart
-            fig_product_outliers.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Product",
-                yaxis_title="Number of Claims",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
-            )
+                # Set layout for the Number of Claims by Product and Outlier Level chart
+                fig_product_outliers.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Product",
+                    yaxis_title="Number of Claims",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
+                )
+                return fig_product_outliers
+
+            fig_product_outliers = filters.figure("Outliers by Number of Claims and Product", build_fig_product_outliers)
 
             # Display the Number of Claims by Product and Outlier Level chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Outliers by Number of Claims and Product</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_product_outliers, use_container_width=True)
 
 
-        # Group data by Month and Outlier Level to count occurrences
-        monthly_outliers = (
-            df.groupby(["Month", "Outlier Level"])["Claim ID"]
-            .count()
-            .reset_index(name="Count")
-        )
-
-        monthly_outliers["Month_Order"] = monthly_outliers["Month"].apply(
-            lambda x: sorted_months.index(x) if x in sorted_months else len(sorted_months)
-        )
-        monthly_outliers = monthly_outliers.sort_values(by="Month_Order")
-
         cols1, cols2 = st.columns(2)
 
         # Create the grouped bar chart for monthly outliers
         with cols2:
-            fig_monthly_outliers = go.Figure()
+            def build_fig_monthly_outliers():
+                # Group data by Month and Outlier Level to count occurrences
+                monthly_outliers = (
+                    df.groupby(["Month", "Outlier Level"], observed=True)["Claim ID"]
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-            # Add trace for each Outlier Level
-            for i, outlier_level in enumerate(monthly_outliers["Outlier Level"].unique()):
-                filtered_data = monthly_outliers[monthly_outliers["Outlier Level"] == outlier_level]
-                fig_monthly_outliers.add_trace(
-                    go.Bar(
-                        x=filtered_data["Month"],
-                        y=filtered_data["Count"],
-                        name=outlier_level,
-                        text=[f"{value}" for value in filtered_data["Count"]],
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],  # Assign color based on index
-                    )
+                # 'Month' is an ordered categorical, so this sorts in calendar order
+                monthly_outliers = monthly_outliers.sort_values(by="Month")
+
+                fig_monthly_outliers = go.Figure()
+
+                # Add trace for each Outlier Level
+                fig_monthly_outliers.add_traces(charts.series_traces(
+                    monthly_outliers, "Month", "Count", "Outlier Level",
+                    colors=custom_colors,  # Assign color based on index
+                    text=lambda values: charts.text_labels(values, decimals=None),
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the chart
+                fig_monthly_outliers.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Month",
+                    yaxis_title="Number of Outliers",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Outlier Level"),
                 )
+                return fig_monthly_outliers
 
-            # Set layout for the chart
-            fig_monthly_outliers.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Month",
-                yaxis_title="Number of Outliers",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Outlier Level"),
-            )
+            fig_monthly_outliers = filters.figure("Number of Monthly Outliers", build_fig_monthly_outliers)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Monthly Outliers</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_outliers, use_container_width=True)
 
-        # Group data by Year and Outlier Level to count occurrences
-        yearly_outliers = (
-            df.groupby(["Year", "Outlier Level"])["Claim ID"]
-            .count()
-            .reset_index(name="Count")
-        )
-
-        # Sort by Year
-        yearly_outliers = yearly_outliers.sort_values(by="Year")
-
         # Create the grouped bar chart for yearly outliers
         with cols1:
-            fig_yearly_outliers = go.Figure()
+            def build_fig_yearly_outliers():
+                # Group data by Year and Outlier Level to count occurrences
+                yearly_outliers = (
+                    df.groupby(["Year", "Outlier Level"], observed=True)["Claim ID"]
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-            # Add trace for each Outlier Level
-            for i, outlier_level in enumerate(yearly_outliers["Outlier Level"].unique()):
-                filtered_data = yearly_outliers[yearly_outliers["Outlier Level"] == outlier_level]
-                fig_yearly_outliers.add_trace(
-                    go.Bar(
-                        x=filtered_data["Year"],
-                        y=filtered_data["Count"],
-                        name=outlier_level,
-                        text=[f"{value}" for value in filtered_data["Count"]],
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],  # Assign color based on index
-                    )
+                # Sort by Year
+                yearly_outliers = yearly_outliers.sort_values(by="Year")
+
+                fig_yearly_outliers = go.Figure()
+
+                # Add trace for each Outlier Level
+                fig_yearly_outliers.add_traces(charts.series_traces(
+                    yearly_outliers, "Year", "Count", "Outlier Level",
+                    colors=custom_colors,  # Assign color based on index
+                    text=lambda values: charts.text_labels(values, decimals=None),
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the chart
+                fig_yearly_outliers.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Number of Outliers",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(title="Outlier Level"),
                 )
+                return fig_yearly_outliers
 
-            # Set layout for the chart
-            fig_yearly_outliers.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Number of Outliers",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(title="Outlier Level"),
-            )
+            fig_yearly_outliers = filters.figure("Number of Yearly Outliers", build_fig_yearly_outliers)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Yearly Outliers</h3>', unsafe_allow_html=True)
@@ -781,100 +774,98 @@ def display_fraud():
 
         col1, col2 = st.columns(2)
 
-        # Group by Claim Type and Outlier Level, then count the number of claims
-        claim_type_count = (
-            df.groupby(['Claim Type', 'Outlier Level'])['Claim ID']
-            .count()
-            .reset_index(name="Count")
-        )
+        with col1:
+            def build_fig_claim_type():
+                # Group by Claim Type and Outlier Level, then count the number of claims
+                claim_type_count = (
+                    df.groupby(['Claim Type', 'Outlier Level'], observed=True)['Claim ID']
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-        # Pivot the data for plotting (Outlier Level as columns)
-        pivot_claim_type = claim_type_count.pivot(
-            index="Claim Type", columns="Outlier Level", values="Count"
-        ).fillna(0)
+                # Pivot the data for plotting (Outlier Level as columns)
+                pivot_claim_type = claim_type_count.pivot(
+                    index="Claim Type", columns="Outlier Level", values="Count"
+                ).fillna(0)
 
-        # Ensure all outlier levels are present in the columns
-        pivot_claim_type = pivot_claim_type.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
+                # Ensure all outlier levels are present in the columns
+                pivot_claim_type = pivot_claim_type.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
 
-        with col1:
-            fig_claim_type = go.Figure()
+                fig_claim_type = go.Figure()
 
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(pivot_claim_type.columns):
-                fig_claim_type.add_trace(
-                    go.Bar(
-                        x=pivot_claim_type.index,
-                        y=pivot_claim_type[outlier_level],
-                        name=outlier_level,
-                        text=[f"{value}" for value in pivot_claim_type[outlier_level]],  # Show raw count
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],  # Assign color based on index
-                    )
+                # Add traces for each Outlier Level
+                fig_claim_type.add_traces(charts.series_traces(
+                    pivot_claim_type,
+                    colors=custom_colors,  # Assign color based on index
+                    text=lambda values: charts.text_labels(values, decimals=None),  # Show raw count
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the Claim Type chart
+                fig_claim_type.update_layout(
+                    barmode='group',
+                    yaxis_title="Number of Claims",
+                    xaxis_title="Claim Type",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
                 )
+                return fig_claim_type
 
-            # Set layout for the Claim Type chart
-            fig_claim_type.update_layout(
-                barmode='group',
-                yaxis_title="Number of Claims",
-                xaxis_title="Claim Type",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
-            )
+            fig_claim_type = filters.figure("Number of Outliers by Claim Type", build_fig_claim_type)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Outliers by Claim Type </h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_claim_type, use_container_width=True)
     
 
-        # Group by Source and Outlier Level, then count the number of claims
-        source_count = (
-            df.groupby(['Source', 'Outlier Level'])['Claim ID']
-            .count()
-            .reset_index(name="Count")
-        )
+        with col2:
+            def build_fig_source():
+                # Group by Source and Outlier Level, then count the number of claims
+                source_count = (
+                    df.groupby(['Source', 'Outlier Level'], observed=True)['Claim ID']
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-        # Pivot the data for plotting (Outlier Level as columns)
-        pivot_source = source_count.pivot(
-            index="Source", columns="Outlier Level", values="Count"
-        ).fillna(0)
+                # Pivot the data for plotting (Outlier Level as columns)
+                pivot_source = source_count.pivot(
+                    index="Source", columns="Outlier Level", values="Count"
+                ).fillna(0)
 
-        # Ensure all outlier levels are present in the columns
-        pivot_source = pivot_source.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
+                # Ensure all outlier levels are present in the columns
+                pivot_source = pivot_source.reindex(columns=["Normal", "Mild Outlier", "Extreme Outlier"], fill_value=0)
 
-        with col2:
-            fig_source = go.Figure()
+                fig_source = go.Figure()
 
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(pivot_source.columns):
-                fig_source.add_trace(
-                    go.Bar(
-                        x=pivot_source.index,
-                        y=pivot_source[outlier_level],
-                        name=outlier_level,
-                        text=[f"{value}" for value in pivot_source[outlier_level]],  # Show raw count
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],  # Assign color based on index
-                    )
+                # Add traces for each Outlier Level
+                fig_source.add_traces(charts.series_traces(
+                    pivot_source,
+                    colors=custom_colors,  # Assign color based on index
+                    text=lambda values: charts.text_labels(values, decimals=None),  # Show raw count
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the Source chart
+                fig_source.update_layout(
+                    barmode='group',
+                    yaxis_title="Number of Claims",
+                    xaxis_title="Source",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
                 )
+                return fig_source
 
-            # Set layout for the Source chart
-            fig_source.update_layout(
-                barmode='group',
-                yaxis_title="Number of Claims",
-                xaxis_title="Source",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
-            )
+            fig_source = filters.figure("Number of Outliers by Provider Type", build_fig_source)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Number of Outliers by Provider Type</h3>', unsafe_allow_html=True)
@@ -884,108 +875,106 @@ def display_fraud():
         cols1, cols2 = st.columns(2)
 
 
-        # Group data by Provider Name and Outlier Level to count the number of claims
-        provider_outlier_count = (
-            df.groupby(["Employer Name", "Outlier Level"])["Claim ID"]
-            .count()
-            .reset_index(name="Count")
-        )
+        with cols1:
+            def build_fig_provider_outliers():
+                # Group data by Provider Name and Outlier Level to count the number of claims
+                provider_outlier_count = (
+                    df.groupby(["Employer Name", "Outlier Level"], observed=True)["Claim ID"]
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-        # Pivot the data for plotting (Outlier Level as columns)
-        pivot_provider_outlier = provider_outlier_count.pivot(
-            index="Employer Name", columns="Outlier Level", values="Count"
-        ).fillna(0)
+                # Pivot the data for plotting (Outlier Level as columns)
+                pivot_provider_outlier = provider_outlier_count.pivot(
+                    index="Employer Name", columns="Outlier Level", values="Count"
+                ).fillna(0)
 
-        # Sort providers by total number of claims
-        pivot_provider_outlier["Total"] = pivot_provider_outlier.sum(axis=1)
-        pivot_provider_outlier = (
-            pivot_provider_outlier.sort_values(by="Total", ascending=False).head(10).drop(columns=["Total"])
-        )
+                # Sort providers by total number of claims
+                pivot_provider_outlier["Total"] = pivot_provider_outlier.sum(axis=1)
+                pivot_provider_outlier = (
+                    pivot_provider_outlier.sort_values(by="Total", ascending=False).head(10).drop(columns=["Total"])
+                )
 
-        with cols1:
-            fig_provider_outliers = go.Figure()
+                fig_provider_outliers = go.Figure()
 
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(pivot_provider_outlier.columns):
-                fig_provider_outliers.add_trace(
-                    go.Bar(
-                        x=pivot_provider_outlier.index,
-                        y=pivot_provider_outlier[outlier_level],
-                        name=outlier_level,
-                        text=[f"{value}" for value in pivot_provider_outlier[outlier_level]],  # Show raw count
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],
-                    )
+                # Add traces for each Outlier Level
+                fig_provider_outliers.add_traces(charts.series_traces(
+                    pivot_provider_outlier,
+                    colors=custom_colors,
+                    text=lambda values: charts.text_labels(values, decimals=None),  # Show raw count
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the Number of Claims by Provider (Outlier Highlighted) chart
+                fig_provider_outliers.update_layout(
+                    barmode="stack",  # Stacked bar chart
+                    xaxis_title="Employer Name",
+                    yaxis_title="Number of Claims",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=500,
+                    legend=dict(x=0, y=1.1, orientation="h"),
                 )
+                return fig_provider_outliers
 
-            # Set layout for the Number of Claims by Provider (Outlier Highlighted) chart
-            fig_provider_outliers.update_layout(
-                barmode="stack",  # Stacked bar chart
-                xaxis_title="Employer Name",
-                yaxis_title="Number of Claims",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=500,
-                legend=dict(x=0, y=1.1, orientation="h"),
-            )
+            fig_provider_outliers = filters.figure("Top 10 Employer Groups by Outlier and Claim Count", build_fig_provider_outliers)
 
             # Display the Number of Claims by Provider (Outlier Highlighted) chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Employer Groups by Outlier and Claim Count </h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_provider_outliers, use_container_width=True)
 
 
-        # Group data by Provider Name and Outlier Level to count the number of claims
-        provider_outlier_count = (
-            df.groupby(["Provider Name", "Outlier Level"])["Claim ID"]
-            .count()
-            .reset_index(name="Count")
-        )
+        with cols2:
+            def build_fig_provider_outliers():
+                # Group data by Provider Name and Outlier Level to count the number of claims
+                provider_outlier_count = (
+                    df.groupby(["Provider Name", "Outlier Level"], observed=True)["Claim ID"]
+                    .count()
+                    .reset_index(name="Count")
+                )
 
-        # Pivot the data for plotting (Outlier Level as columns)
-        pivot_provider_outlier = provider_outlier_count.pivot(
-            index="Provider Name", columns="Outlier Level", values="Count"
-        ).fillna(0)
+                # Pivot the data for plotting (Outlier Level as columns)
+                pivot_provider_outlier = provider_outlier_count.pivot(
+                    index="Provider Name", columns="Outlier Level", values="Count"
+                ).fillna(0)
 
-        # Sort providers by total number of claims
-        pivot_provider_outlier["Total"] = pivot_provider_outlier.sum(axis=1)
-        pivot_provider_outlier = (
-            pivot_provider_outlier.sort_values(by="Total", ascending=False).head(10).drop(columns=["Total"])
-        )
+                # Sort providers by total number of claims
+                pivot_provider_outlier["Total"] = pivot_provider_outlier.sum(axis=1)
+                pivot_provider_outlier = (
+                    pivot_provider_outlier.sort_values(by="Total", ascending=False).head(10).drop(columns=["Total"])
+                )
 
-        with cols2:
-            fig_provider_outliers = go.Figure()
+                fig_provider_outliers = go.Figure()
 
-            # Add traces for each Outlier Level
-            for i, outlier_level in enumerate(pivot_provider_outlier.columns):
-                fig_provider_outliers.add_trace(
-                    go.Bar(
-                        x=pivot_provider_outlier.index,
-                        y=pivot_provider_outlier[outlier_level],
-                        name=outlier_level,
-                        text=[f"{value}" for value in pivot_provider_outlier[outlier_level]],  # Show raw count
-                        textposition="inside",
-                        textfont=dict(color="white"),
-                        hoverinfo="x+y+name",
-                        marker_color=custom_colors[i % len(custom_colors)],
-                    )
+                # Add traces for each Outlier Level
+                fig_provider_outliers.add_traces(charts.series_traces(
+                    pivot_provider_outlier,
+                    colors=custom_colors,
+                    text=lambda values: charts.text_labels(values, decimals=None),  # Show raw count
+                    textposition="inside",
+                    textfont=dict(color="white"),
+                    hoverinfo="x+y+name",
+                ))
+
+                # Set layout for the Number of Claims by Provider (Outlier Highlighted) chart
+                fig_provider_outliers.update_layout(
+                    barmode="stack",  # Stacked bar chart
+                    xaxis_title="Provider Name",
+                    yaxis_title="Number of Claims",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=500,
+                    legend=dict(x=0, y=1.1, orientation="h"),
                 )
+                return fig_provider_outliers
 
-            # Set layout for the Number of Claims by Provider (Outlier Highlighted) chart
-            fig_provider_outliers.update_layout(
-                barmode="stack",  # Stacked bar chart
-                xaxis_title="Provider Name",
-                yaxis_title="Number of Claims",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=500,
-                legend=dict(x=0, y=1.1, orientation="h"),
-            )
+            fig_provider_outliers = filters.figure("Top 10 Providers by Outlier and Claim Count", build_fig_provider_outliers)
 
             # Display the Number of Claims by Provider (Outlier Highlighted) chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Providers by Outlier and Claim Count </h3>', unsafe_allow_html=True)
@@ -1,6 +1,7 @@
 import streamlit as st
 import matplotlib.colors as mcolors
 import plotly.express as px
+import numpy as np
 import pandas as pd
 import altair as alt
 import matplotlib.pyplot as plt
@@ -11,6 +12,27 @@ from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 import matplotlib.dates as mdates
 
+import charts
+import timeseries
+from data_loader import EMPLOYER_AS_ENTERED, MONTHS, claims_version, load_claims, load_premiums, premiums_version
+from facets import Facet, state_keys
+from filter_cache import FILTER_CACHE, FilterChain
+
+
+# The filter widgets of the view, in the order their filters are applied (see facets.Facet)
+FACETS = [
+    Facet("year_selector_multi", 'Year', default=lambda years: years[-1:]),
+    Facet("month_select_multi", 'Month', cascade=False),
+    Facet("filter_quarter_selector_multiselect", 'Quarter'),
+    Facet("filter_business_line_selector_multiselect", 'Product'),
+    Facet("outlier_multiselect", 'Client Name'),
+    Facet("cover_multiselect", 'Cover Type'),
+]
+
+# Keys of the filter widgets whose values are kept while the view is hidden
+FILTER_KEYS = state_keys(FACETS)
+
+
 def display_loss_ratio():
 
     # Centered and styled main title using inline styles
@@ -32,173 +54,158 @@ def display_loss_ratio():
 
     st.markdown('<h1 class="main-title">CLAIMS ANAYSIS - LOSS RATIO VIEW</h1>', unsafe_allow_html=True)
 
-    # Filepaths and sheet names
-    filepath_premiums = "JAN-NOV 2024 GWP.xlsx"
-    sheet_name_new_business = "2023"
-    sheet_name_endorsements = "2024"
+    # Load the shared, normalized premium and claims data
+    df_premiums = load_premiums()
+    df_claims = load_claims()
+
+    # Premiums and claims are matched once per data version and day (earned premium
+    # depends on today's date) and the result is shared by every rerun and session
+    key = ("Loss Ratio View", claims_version(), premiums_version(), pd.Timestamp.now().normalize())
+
+    # Function to match claims to the prioritized premiums and total them per client,
+    # product and year
+    def merge_premiums_and_claims(df_premiums, df_claims):
+        # Match claims to policies on the year they were created in (premium Month,
+        # Year and Quarter come from the policy start date at load)
+        df_claims['Year'] = df_claims['Claim Created Date'].dt.year
+
+        # Match premiums on the employer name as entered in the claims data, as 'Client Name'
+        df_claims = df_claims.drop(columns='Employer Name').rename(columns={EMPLOYER_AS_ENTERED: 'Client Name'})
+
+
+        # Function to prioritize cover types and mark prioritized rows
+        def prioritize_and_mark(group):
+            if 'Renewal' in group['Cover Type'].values:
+                return group[group['Cover Type'] == 'Renewal'].assign(Is_Prioritized=True)
+            elif 'New' in group['Cover Type'].values:
+                return group[group['Cover Type'] == 'New'].assign(Is_Prioritized=True)
+            else:
+                return group.assign(Is_Prioritized=False)
+
+        # Apply prioritization and marking
+        premiums_grouped = df_premiums.groupby(['Client Name', 'Product', 'Year'], observed=True).apply(prioritize_and_mark).reset_index(drop=True)
+
+        # Filter endorsements
+        endorsements = premiums_grouped[premiums_grouped['Cover Type'] == 'Endorsement']
+
+        # Merge endorsements with prioritized premiums (Renewal or New)
+        merged_endorsements = pd.merge(
+            endorsements,
+            premiums_grouped[premiums_grouped['Cover Type'].isin(['New', 'Renewal'])],
+            on=['Client Name', 'Product', 'Year'],
+            suffixes=('_endorsement', '_prioritized')
+        )
 
-    filepath_claims = "Claims.xlsx"
-    sheet_name1 = "2023 claims"
-    sheet_name2 = "2024 claims"
+        # Filter valid endorsements (within the premium period)
+        valid_endorsements = merged_endorsements[
+            (merged_endorsements['Start Date_endorsement'] >= merged_endorsements['Start Date_prioritized']) &
+            (merged_endorsements['End Date_endorsement'] <= merged_endorsements['End Date_prioritized'])
+        ]
+
+        # Aggregate endorsement premiums
+        endorsement_grouped = valid_endorsements.groupby(['Client Name', 'Product', 'Year'], observed=True).agg({
+            'Total_endorsement': 'sum'
+        }).reset_index().rename(columns={'Total_endorsement': 'Endorsement Premium'})
+
+        # Merge endorsement premiums back into prioritized premiums
+        final_premiums = pd.merge(
+            premiums_grouped,
+            endorsement_grouped,
+            on=['Client Name', 'Product', 'Year'],
+            how='left'
+        )
 
-    # Read premium data
-    df_2023 = pd.read_excel(filepath_premiums, sheet_name=sheet_name_new_business)
-    df_2024 = pd.read_excel(filepath_premiums, sheet_name=sheet_name_endorsements)
+        # Calculate total premium (base + endorsements)
+        final_premiums['Total Premium'] = (
+            final_premiums['Total'] + 
+            final_premiums['Endorsement Premium'].fillna(0)
+        )
 
-    # Read claims data
-    dfc_2023 = pd.read_excel(filepath_claims, sheet_name=sheet_name1)
-    dfc_2024 = pd.read_excel(filepath_claims, sheet_name=sheet_name2)
+        # Compute time-based metrics
+        current_date = pd.Timestamp.now()
+        client_product_data = final_premiums.groupby(['Client Name', 'Product', 'Year'], observed=True).agg({
+            'Start Date': 'min',
+            'End Date': 'max',
+            'Total Premium': 'sum'
+        }).reset_index()
+
+        client_product_data['Days Since Start'] = (current_date - client_product_data['Start Date']).dt.days
+        client_product_data['days_on_cover'] = (client_product_data['End Date'] - client_product_data['Start Date']).dt.days
+        client_product_data['Earned Premium'] = (
+            client_product_data['Total Premium'] * 
+            client_product_data['Days Since Start'] / 
+            client_product_data['days_on_cover']
+        )
 
-    # Concatenate premiums and claims
-    df_premiums = pd.concat([df_2023, df_2024])
-    df_claims = pd.concat([dfc_2023, dfc_2024])
+        # Merge earned premium calculations
+        premiums_with_earned = pd.merge(
+            final_premiums,
+            client_product_data[['Client Name', 'Product', 'Year', 'Days Since Start', 'days_on_cover', 'Earned Premium']],
+            on=['Client Name', 'Product', 'Year'],
+            how='left'
+        )
 
-    # Standardize date formats
-    df_premiums['Start Date'] = pd.to_datetime(df_premiums['Start Date'])
-    df_premiums['End Date'] = pd.to_datetime(df_premiums['End Date'])
-    df_claims['Claim Created Date'] = pd.to_datetime(df_claims['Claim Created Date'], errors='coerce')
+        # Final premium DataFrame
+        premiums_final = premiums_with_earned[
+            ['Client Name', 'Product', 'Year', 'Start Date', 'End Date', 'Month', 'Quarter', 'Total Premium', 
+            'Endorsement Premium', 'Cover Type', 'Is_Prioritized', 'Days Since Start', 'days_on_cover', 'Earned Premium']
+        ]
+
+        # Filter only prioritized rows for claims matching
+        premiums_prioritized = premiums_final[premiums_final['Is_Prioritized']].reset_index(drop=True)
+
+        # Match claims to prioritized premiums
+        claims_within_range = pd.merge(
+            df_claims,
+            premiums_prioritized[['Client Name', 'Product', 'Year', 'Start Date', 'End Date']],
+            on=['Client Name', 'Product', 'Year'],
+            how='inner'
+        )
 
-    # Add 'Month' and 'Year' columns
-    df_premiums['Month'] = df_premiums['Start Date'].dt.strftime('%B')
-    df_premiums['Year'] = df_premiums['Start Date'].dt.year
-    df_claims['Month'] = df_claims['Claim Created Date'].dt.strftime('%B')
-    df_claims['Year'] = df_claims['Claim Created Date'].dt.year
+        # Filter claims that fall within the premium period
+        claims_within_range = claims_within_range[
+            (claims_within_range['Claim Created Date'] >= claims_within_range['Start Date']) &
+            (claims_within_range['Claim Created Date'] <= claims_within_range['End Date'])
+        ]
+
+        # Aggregate claims by client-product-year
+        claims_aggregated = claims_within_range.groupby(['Client Name', 'Product', 'Year'], observed=True).agg({
+            'Claim ID': 'count',  # Number of claims
+            'Claim Amount': 'sum',  # Total claim amount
+            'Approved Claim Amount': 'sum'  # Approved claim amount (if available)
+        }).reset_index()
+
+        # Rename columns for clarity
+        claims_aggregated.rename(columns={
+            'Claim ID': 'Number of Claims',
+            'Claim Amount': 'Total Claims',
+            'Approved Claim Amount': 'Approved Claims'
+        }, inplace=True)
+
+        # Merge claims with premiums (outer join to include all premiums, even without claims)
+        final_data = pd.merge(
+            premiums_final,
+            claims_aggregated,
+            on=['Client Name', 'Product', 'Year'],
+            how='outer'
+        )
 
-    # Rename 'Employer Name' in claims data for consistency
-    df_claims.rename(columns={'Employer Name': 'Client Name'}, inplace=True)
+        # Fill missing values (e.g., no claims for some clients/products)
+        final_data['Number of Claims'] = final_data['Number of Claims'].fillna(0).astype(int)
+        final_data['Total Claims'] = final_data['Total Claims'].fillna(0)
+        final_data['Approved Claims'] = final_data['Approved Claims'].fillna(0)
 
 
-    # Function to prioritize cover types and mark prioritized rows
-    def prioritize_and_mark(group):
-        if 'Renewal' in group['Cover Type'].values:
-            return group[group['Cover Type'] == 'Renewal'].assign(Is_Prioritized=True)
-        elif 'New' in group['Cover Type'].values:
-            return group[group['Cover Type'] == 'New'].assign(Is_Prioritized=True)
-        else:
-            return group.assign(Is_Prioritized=False)
-
-    # Apply prioritization and marking
-    premiums_grouped = df_premiums.groupby(['Client Name', 'Product', 'Year']).apply(prioritize_and_mark).reset_index(drop=True)
-
-    # Filter endorsements
-    endorsements = premiums_grouped[premiums_grouped['Cover Type'] == 'Endorsement']
-
-    # Merge endorsements with prioritized premiums (Renewal or New)
-    merged_endorsements = pd.merge(
-        endorsements,
-        premiums_grouped[premiums_grouped['Cover Type'].isin(['New', 'Renewal'])],
-        on=['Client Name', 'Product', 'Year'],
-        suffixes=('_endorsement', '_prioritized')
-    )
-
-    # Filter valid endorsements (within the premium period)
-    valid_endorsements = merged_endorsements[
-        (merged_endorsements['Start Date_endorsement'] >= merged_endorsements['Start Date_prioritized']) &
-        (merged_endorsements['End Date_endorsement'] <= merged_endorsements['End Date_prioritized'])
-    ]
-
-    # Aggregate endorsement premiums
-    endorsement_grouped = valid_endorsements.groupby(['Client Name', 'Product', 'Year']).agg({
-        'Total_endorsement': 'sum'
-    }).reset_index().rename(columns={'Total_endorsement': 'Endorsement Premium'})
-
-    # Merge endorsement premiums back into prioritized premiums
-    final_premiums = pd.merge(
-        premiums_grouped,
-        endorsement_grouped,
-        on=['Client Name', 'Product', 'Year'],
-        how='left'
-    )
-
-    # Calculate total premium (base + endorsements)
-    final_premiums['Total Premium'] = (
-        final_premiums['Total'] + 
-        final_premiums['Endorsement Premium'].fillna(0)
-    )
-
-    # Add 'Month' column
-    final_premiums['Month'] = final_premiums['Start Date'].dt.strftime('%B')
-
-    # Compute time-based metrics
-    current_date = pd.Timestamp.now()
-    client_product_data = final_premiums.groupby(['Client Name', 'Product', 'Year']).agg({
-        'Start Date': 'min',
-        'End Date': 'max',
-        'Total Premium': 'sum'
-    }).reset_index()
-
-    client_product_data['Days Since Start'] = (current_date - client_product_data['Start Date']).dt.days
-    client_product_data['days_on_cover'] = (client_product_data['End Date'] - client_product_data['Start Date']).dt.days
-    client_product_data['Earned Premium'] = (
-        client_product_data['Total Premium'] * 
-        client_product_data['Days Since Start'] / 
-        client_product_data['days_on_cover']
-    )
-
-    # Merge earned premium calculations
-    premiums_with_earned = pd.merge(
-        final_premiums,
-        client_product_data[['Client Name', 'Product', 'Year', 'Days Since Start', 'days_on_cover', 'Earned Premium']],
-        on=['Client Name', 'Product', 'Year'],
-        how='left'
-    )
-
-    # Final premium DataFrame
-    premiums_final = premiums_with_earned[
-        ['Client Name', 'Product', 'Year', 'Start Date', 'End Date', 'Month', 'Total Premium', 
-        'Endorsement Premium', 'Cover Type', 'Is_Prioritized', 'Days Since Start', 'days_on_cover', 'Earned Premium']
-    ]
-
-    # Filter only prioritized rows for claims matching
-    premiums_prioritized = premiums_final[premiums_final['Is_Prioritized']].reset_index(drop=True)
-
-    # Match claims to prioritized premiums
-    claims_within_range = pd.merge(
-        df_claims,
-        premiums_prioritized[['Client Name', 'Product', 'Year', 'Start Date', 'End Date']],
-        on=['Client Name', 'Product', 'Year'],
-        how='inner'
-    )
-
-    # Filter claims that fall within the premium period
-    claims_within_range = claims_within_range[
-        (claims_within_range['Claim Created Date'] >= claims_within_range['Start Date']) &
-        (claims_within_range['Claim Created Date'] <= claims_within_range['End Date'])
-    ]
-
-    # Aggregate claims by client-product-year
-    claims_aggregated = claims_within_range.groupby(['Client Name', 'Product', 'Year']).agg({
-        'Claim ID': 'count',  # Number of claims
-        'Claim Amount': 'sum',  # Total claim amount
-        'Approved Claim Amount': 'sum'  # Approved claim amount (if available)
-    }).reset_index()
-
-    # Rename columns for clarity
-    claims_aggregated.rename(columns={
-        'Claim ID': 'Number of Claims',
-        'Claim Amount': 'Total Claims',
-        'Approved Claim Amount': 'Approved Claims'
-    }, inplace=True)
-
-    # Merge claims with premiums (outer join to include all premiums, even without claims)
-    final_data = pd.merge(
-        premiums_final,
-        claims_aggregated,
-        on=['Client Name', 'Product', 'Year'],
-        how='outer'
-    )
-
-    # Fill missing values (e.g., no claims for some clients/products)
-    final_data['Number of Claims'] = final_data['Number of Claims'].fillna(0).astype(int)
-    final_data['Total Claims'] = final_data['Total Claims'].fillna(0)
-    final_data['Approved Claims'] = final_data['Approved Claims'].fillna(0)
-
-
-    df=final_data
-
-
-    df['Client Name'] = df['Client Name'].astype(str)
-    df["Client Name"] = df["Client Name"].str.upper()
+        df=final_data
+
+
+        df['Client Name'] = df['Client Name'].astype(str)
+        df["Client Name"] = df["Client Name"].str.upper()
+
+        # Filter DataFrame by calendar months
+        return df[df['Month'].isin(MONTHS)]
+
+    df = FILTER_CACHE.get_or_compute(key + (('merged',),), lambda: merge_premiums_and_claims(df_premiums, df_claims)).copy(deep=False)
 
 
     # Inspect the merged DataFrame
@@ -250,12 +257,6 @@ def display_loss_ratio():
         </style>
         """, unsafe_allow_html=True)
 
-    # Dictionary to map month names to their order
-    month_order = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6, "July": 7, "August": 8,
-        "September": 9, "October": 10, "November": 11, "December": 12
-    }
     # Define the mapping of months to quarters
     month_to_quarter = {
         "January": "Q1", "February": "Q1", "March": "Q1",
@@ -263,21 +264,25 @@ def display_loss_ratio():
         "July": "Q3", "August": "Q3", "September": "Q3",
         "October": "Q4", "November": "Q4", "December": "Q4"
     }
-    # Filter DataFrame by months in `month_order`
-    df = df[df['Month'].isin(month_order)]
-
-    # Sort months based on their order
-    sorted_months = sorted(df['Month'].dropna().unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
+    # Months present, in calendar order
+    present_months = set(df['Month'])
+    sorted_months = [month for month in MONTHS if month in present_months]
 
-    df['Quarter'] = "Q" + df['Start Date'].dt.quarter.astype(str)
+    # Filters below are applied through a cached chain: repeating a selection
+    # reuses the rows it produced before instead of filtering again. It is keyed
+    # like the merged frame, so the day is part of the key.
+    filters = FilterChain(df, *key)
 
+    # Options for every filter widget below, each from the rows the filters before it
+    # leave, resolved up front from the selections in session state
+    options = filters.options(FACETS, st.session_state)
 
     # Create a three-column layout
     col1, col2, col3, col4 = st.columns(4)
 
     # Year selector (allow multiple selections)
     with col1:
-        years = sorted(df['Year'].dropna().unique())
+        years = list(options["year_selector_multi"].index)
         selected_years = st.multiselect(
             "Select Years",
             options=years,
@@ -285,7 +290,7 @@ def display_loss_ratio():
             key="year_selector_multi"
         )
         if selected_years:
-            df = df[df['Year'].isin(selected_years)]
+            filters.isin('Year', selected_years)
 
     # Month selector (allow multiple selections)
     with col2:
@@ -295,35 +300,35 @@ def display_loss_ratio():
             key="month_select_multi"
         )
         if selected_months:
-            df = df[df['Month'].isin(selected_months)]
+            filters.isin('Month', selected_months)
 
         # Dynamically calculate the quarters based on selected months
         if selected_months:
             suggested_quarters = list(set(month_to_quarter[month] for month in selected_months))
         else:
-            suggested_quarters = sorted(df['Quarter'].dropna().unique())  # Default to all quarters
+            suggested_quarters = list(options["filter_quarter_selector_multiselect"].index)  # Default to all quarters
 
     # Quarter selector (allow manual selection, with dynamic suggestions)
     with col3:
-        quarters = sorted(df['Quarter'].dropna().unique())
+        quarters = list(options["filter_quarter_selector_multiselect"].index)
         selected_quarters = st.multiselect(
             "Select Quarters",
             options=quarters,
             key="filter_quarter_selector_multiselect"
         )
         if selected_quarters:
-            df = df[df['Quarter'].isin(selected_quarters)]
+            filters.isin('Quarter', selected_quarters)
 
     # Business Line selector (pre-select all options by default)
     with col4:
-        business_lines = sorted(df['Product'].dropna().unique()) if 'Product' in df.columns else []
+        business_lines = list(options["filter_business_line_selector_multiselect"].index)
         selected_business_lines = st.multiselect(
             "Select Business Lines",
             options=business_lines,
             key="filter_business_line_selector_multiselect"
         )
         if selected_business_lines:
-            df = df[df['Product'].isin(selected_business_lines)]
+            filters.isin('Product', selected_business_lines)
 
 
     # Create a three-column layout
@@ -331,7 +336,7 @@ def display_loss_ratio():
 
     # Claim Status selector (pre-select one status by default)
     with col2:
-        business_lines = sorted(df['Client Name'].dropna().unique()) if 'Client Name' in df.columns else []
+        business_lines = list(options["outlier_multiselect"].index)
         
         # Pre-select only one status by default (e.g., "Approved")
         selected_business_lines = st.multiselect(
@@ -342,12 +347,12 @@ def display_loss_ratio():
         
         # Apply filter for Claim Status
         if selected_business_lines:
-            df = df[df['Client Name'].isin(selected_business_lines)]
+            filters.isin('Client Name', selected_business_lines)
 
 
     # Claim Status selector (pre-select one status by default)
     with col1:
-        business_lines = sorted(df['Cover Type'].dropna().unique()) if 'Cover Type' in df.columns else []
+        business_lines = list(options["cover_multiselect"].index)
         
         # Pre-select only one status by default (e.g., "Approved")
         selected_business_lines = st.multiselect(
@@ -358,19 +363,11 @@ def display_loss_ratio():
         
         # Apply filter for Claim Status
         if selected_business_lines:
-            df = df[df['Cover Type'].isin(selected_business_lines)]
-
+            filters.isin('Cover Type', selected_business_lines)
 
-    # Dynamically calculate the date range based on selected filters
-    if selected_months:
-        # Filter DataFrame by selected months
-        df_filtered = df[df['Month'].isin(selected_months)]
-    else:
-        df_filtered = df
 
-    # Get the minimum and maximum dates from the filtered DataFrame
-    startDate = df_filtered["Start Date"].min()
-    endDate = df_filtered["Start Date"].max()
+    # Date range of the rows the filters above keep (selected months included)
+    startDate, endDate = filters.bounds("Start Date")
 
 
     # Define CSS for the styled date input boxes
@@ -420,63 +417,45 @@ def display_loss_ratio():
 
     # Filter the DataFrame based on the selected date range
     if date1 and date2:
-        df = df[(df["Start Date"] >= date1) & (df["Start Date"] <= date2)]
-
-
-
-
-    # Function to prioritize cover types and mark prioritized rows
-    def prioritize_and_mark(group):
-        if 'Renewal' in group['Cover Type'].values:
-            return group[group['Cover Type'] == 'Renewal'].assign(Is_Prioritized=True)
-        elif 'New' in group['Cover Type'].values:
-            return group[group['Cover Type'] == 'New'].assign(Is_Prioritized=True)
-        else:
-            return group.assign(Is_Prioritized=False)
-
-    # Apply prioritization and marking
-    df = df.groupby(['Client Name', 'Product', 'Year']).apply(prioritize_and_mark).reset_index(drop=True)
-
-
-    # Current date
-    current_date = pd.Timestamp.now()
-
-    # Compute time-based metrics for prioritized rows
-    df['Days Since Start'] = (
-        df.apply(lambda row: (current_date - row['Start Date']).days if row['Is_Prioritized'] else 0, axis=1)
-    )
-    df['days_on_cover'] = (
-        df.apply(lambda row: (row['End Date'] - row['Start Date']).days if row['Is_Prioritized'] else 0, axis=1)
-    )
-
-    # Calculate Earned Premium for each row
-    df['Earned Premium'] = (
-        df.apply(
-            lambda row: (row['Total Premium'] * row['Days Since Start']) / row['days_on_cover']
-            if row['Is_Prioritized'] and row['days_on_cover'] != 0 else 0,
-            axis=1
-        )
-    )
-    df['Loss Ratio'] = (
-        df.apply(
-            lambda row: (row['Approved Claims'] / row['Earned Premium'])
-            if row['Is_Prioritized'] and row['Earned Premium'] != 0 else 0,
-            axis=1
-        )
-    )
-    df['Loss Ratio Rate'] = (
-        df.apply(
-            lambda row: (row['Approved Claims'] / row['Earned Premium']) * 100 
-            if row['Is_Prioritized'] and row['Earned Premium'] != 0 else 0,
-            axis=1
-        )
-    )
-
-
-    # Set claims metrics to 0 for non-prioritized rows
-    df['Number of Claims'] = df.apply(lambda row: row['Number of Claims'] if row['Is_Prioritized'] else 0, axis=1)
-    df['Total Claims'] = df.apply(lambda row: row['Total Claims'] if row['Is_Prioritized'] else 0, axis=1)
-    df['Approved Claims'] = df.apply(lambda row: row['Approved Claims'] if row['Is_Prioritized'] else 0, axis=1)
+        filters.between("Start Date", date1, date2)
+
+    # Function to keep, per client, product and year, the Renewal rows, or the New rows
+    # when there is no renewal (marked prioritized), or all rows when there is neither
+    # (marked not prioritized), ordered by client, product and year as the groups come.
+    # Time-based metrics and claims are then computed for prioritized rows only, 0 for
+    # the others.
+    def prioritize(df):
+        keys = ['Client Name', 'Product', 'Year']
+        df = df.dropna(subset=keys)
+        renewal, new = df['Cover Type'] == 'Renewal', df['Cover Type'] == 'New'
+        groups = pd.DataFrame({'renewal': renewal, 'new': new}).groupby([df[key] for key in keys], observed=True)
+        has_renewal, has_new = groups['renewal'].transform('any'), groups['new'].transform('any')
+        keep = np.where(has_renewal, renewal, np.where(has_new, new, True))
+        df = df[keep].assign(Is_Prioritized=(has_renewal | has_new)[keep])
+        df = df.sort_values(keys, kind='stable', ignore_index=True)
+        prioritized = df['Is_Prioritized']
+
+        # Current date
+        current_date = pd.Timestamp.now()
+
+        # Compute time-based metrics for prioritized rows
+        df['Days Since Start'] = np.where(prioritized, (current_date - df['Start Date']).dt.days, 0)
+        df['days_on_cover'] = np.where(prioritized, (df['End Date'] - df['Start Date']).dt.days, 0)
+
+        # Calculate Earned Premium for each row
+        earning = prioritized & (df['days_on_cover'] != 0)
+        df['Earned Premium'] = np.where(earning, df['Total Premium'] * df['Days Since Start'] / df['days_on_cover'].where(earning, 1), 0)
+        losing = prioritized & (df['Earned Premium'] != 0)
+        df['Loss Ratio'] = np.where(losing, df['Approved Claims'] / df['Earned Premium'].where(losing, 1), 0)
+        df['Loss Ratio Rate'] = df['Loss Ratio'] * 100
+
+        # Set claims metrics to 0 for non-prioritized rows
+        for column in ['Number of Claims', 'Total Claims', 'Approved Claims']:
+            df[column] = np.where(prioritized, df[column], 0)
+        return df
+
+    # Prioritized rows, computed once per filter state
+    df = filters.memo("prioritized", prioritize)
 
     st.dataframe(df)
 
@@ -660,186 +639,197 @@ def display_loss_ratio():
 
         custom_colors = ["#009DAE", "#e66c37", "#461b09", "#f8a785", "#CC3636"]
 
-        # Group data by 'Start Date' to calculate daily loss ratio
-        daily_loss_ratio = (
-            df.groupby(df['Start Date'].dt.strftime("%Y-%m-%d"))  # Group by date (day level)
-            .agg(
-                Total_Claims=("Approved Claims", "sum"),  # Sum of approved claims
-                Earned_Premium=("Earned Premium", "sum")       # Sum of earned premium
-            )
-            .reset_index()
-        )
-
-        # Calculate loss ratio for each day
-        daily_loss_ratio["Loss Ratio"] = (
-            daily_loss_ratio["Total_Claims"] / daily_loss_ratio["Earned_Premium"]
-        ) * 100
-        daily_loss_ratio = daily_loss_ratio.fillna(0)  # Handle days with no claims or premiums
-
         with cols1:
             # Create the area chart
-            fig_daily_loss_ratio_area = go.Figure()
-
-            # Add area trace
-            fig_daily_loss_ratio_area.add_trace(go.Scatter(
-                x=daily_loss_ratio['Start Date'],  # X-axis: Start Date (day level)
-                y=daily_loss_ratio['Loss Ratio'],  # Y-axis: Loss Ratio
-                mode='lines',
-                fill='tozeroy',  # Fill area under the line
-                name='Loss Ratio',
-                text=[f"{value:.1f}%" for value in daily_loss_ratio['Loss Ratio']],  # Tooltip format
-                hoverinfo='x+y+text+name',
-                line=dict(color=custom_colors[0])
-            ))
-
-            # Update layout
-            fig_daily_loss_ratio_area.update_layout(
-                xaxis_title="Date",
-                yaxis_title="Loss Ratio (%)",
-                font=dict(color="Black"),
-                xaxis=dict(
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12),
-                    type='date',  # Ensure proper date formatting
-                    tickformat="%Y-%m-%d"  # Display date in YYYY-MM-DD format
-                ),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450
-            )
+            def build_fig_daily_loss_ratio_area():
+                # Sum approved claims and earned premium per period of the selected range
+                daily_loss_ratio = timeseries.resample(
+                    df['Start Date'], timeseries.pick_grain(date1, date2),
+                    pd.DataFrame({"Total_Claims": df["Approved Claims"], "Earned_Premium": df["Earned Premium"]}),
+                ).reset_index()
+
+                # Calculate loss ratio for each day
+                daily_loss_ratio["Loss Ratio"] = (
+                    daily_loss_ratio["Total_Claims"] / daily_loss_ratio["Earned_Premium"]
+                ) * 100
+                daily_loss_ratio = daily_loss_ratio.fillna(0)  # Handle days with no claims or premiums
+
+                fig_daily_loss_ratio_area = go.Figure()
+
+                # Add area trace
+                fig_daily_loss_ratio_area.add_trace(go.Scatter(
+                    x=daily_loss_ratio['Start Date'],  # X-axis: Start Date (day level)
+                    y=daily_loss_ratio['Loss Ratio'],  # Y-axis: Loss Ratio
+                    mode='lines',
+                    fill='tozeroy',  # Fill area under the line
+                    name='Loss Ratio',
+                    text=charts.text_labels(daily_loss_ratio['Loss Ratio'], decimals=1, suffix='%'),  # Tooltip format
+                    hoverinfo='x+y+text+name',
+                    line=dict(color=custom_colors[0])
+                ))
+
+                # Update layout
+                fig_daily_loss_ratio_area.update_layout(
+                    xaxis_title="Date",
+                    yaxis_title="Loss Ratio (%)",
+                    font=dict(color="Black"),
+                    xaxis=dict(
+                        title_font=dict(size=14),
+                        tickfont=dict(size=12),
+                        type='date',  # Ensure proper date formatting
+                        tickformat="%Y-%m-%d"  # Display date in YYYY-MM-DD format
+                    ),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450
+                )
+                return fig_daily_loss_ratio_area
+
+            fig_daily_loss_ratio_area = filters.figure("Daily Loss Ratio Over Time", build_fig_daily_loss_ratio_area)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Daily Loss Ratio Over Time</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_daily_loss_ratio_area, use_container_width=True)
 
-        # Group data by 'Year' and calculate the sum of Total Premium, Approved Claims, and Earned Premium
-        yearly_data_combined = df.groupby('Year')['Total Premium'].sum().reset_index(name='Total Premium')
-        yearly_data_earned = df.groupby('Year')['Approved Claims'].sum().reset_index(name='Approved Claim Amount')
-        yearly_data_endorsements = df.groupby('Year')['Earned Premium'].sum().reset_index(name='Earned Premium')
-
-        # Merge the data frames on 'Year'
-        yearly_data = pd.merge(yearly_data_combined, yearly_data_earned, on='Year', how='outer')
-        yearly_data = pd.merge(yearly_data, yearly_data_endorsements, on='Year', how='outer')
-
-
         with cols2:
-            # Fill NaN values with 0
-            yearly_data = yearly_data.fillna(0)
-
             # Create the grouped bar chart for Total Premium and Endorsements
-            fig_yearly_avg_premium = go.Figure()
-
-            # Add Total Premium bar trace
-            fig_yearly_avg_premium.add_trace(go.Bar(
-                x=yearly_data['Year'],
-                y=yearly_data['Total Premium'],
-                name='Total Premium',
-                textposition='inside',
-                textfont=dict(color='white'),
-                hoverinfo='x+y+name',
-                marker_color=custom_colors[0]
-            ))
-            # Add Total Premium bar trace
-            fig_yearly_avg_premium.add_trace(go.Bar(
-                x=yearly_data['Year'],
-                y=yearly_data['Earned Premium'],
-                name='Earned Premium',
-                textposition='inside',
-                textfont=dict(color='white'),
-                hoverinfo='x+y+name',
-                marker_color=custom_colors[1]
-            ))
-            # Add Total Endorsements bar trace
-            fig_yearly_avg_premium.add_trace(go.Bar(
-                x=yearly_data['Year'],
-                y=yearly_data['Approved Claim Amount'],
-                name='Approved Claim Amount',
-                textposition='inside',
-                textfont=dict(color='white'),
-                hoverinfo='x+y+name',
-                marker_color=custom_colors[2]
-            ))
-
-            fig_yearly_avg_premium.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Total Amount",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), type='category'),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450
-            )
+            def build_fig_yearly_avg_premium():
+                # Group data by 'Year' and calculate the sum of Total Premium, Approved Claims, and Earned Premium
+                yearly_data_combined = df.groupby('Year', observed=True)['Total Premium'].sum().reset_index(name='Total Premium')
+                yearly_data_earned = df.groupby('Year', observed=True)['Approved Claims'].sum().reset_index(name='Approved Claim Amount')
+                yearly_data_endorsements = df.groupby('Year', observed=True)['Earned Premium'].sum().reset_index(name='Earned Premium')
+
+                # Merge the data frames on 'Year'
+                yearly_data = pd.merge(yearly_data_combined, yearly_data_earned, on='Year', how='outer')
+                yearly_data = pd.merge(yearly_data, yearly_data_endorsements, on='Year', how='outer')
+
+                # Fill NaN values with 0
+                yearly_data = yearly_data.fillna(0)
+
+                fig_yearly_avg_premium = go.Figure()
+
+                # Add Total Premium bar trace
+                fig_yearly_avg_premium.add_trace(go.Bar(
+                    x=yearly_data['Year'],
+                    y=yearly_data['Total Premium'],
+                    name='Total Premium',
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                    marker_color=custom_colors[0]
+                ))
+                # Add Total Premium bar trace
+                fig_yearly_avg_premium.add_trace(go.Bar(
+                    x=yearly_data['Year'],
+                    y=yearly_data['Earned Premium'],
+                    name='Earned Premium',
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                    marker_color=custom_colors[1]
+                ))
+                # Add Total Endorsements bar trace
+                fig_yearly_avg_premium.add_trace(go.Bar(
+                    x=yearly_data['Year'],
+                    y=yearly_data['Approved Claim Amount'],
+                    name='Approved Claim Amount',
+                    textposition='inside',
+                    textfont=dict(color='white'),
+                    hoverinfo='x+y+name',
+                    marker_color=custom_colors[2]
+                ))
+
+                fig_yearly_avg_premium.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Total Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), type='category'),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450
+                )
+                return fig_yearly_avg_premium
+
+            fig_yearly_avg_premium = filters.figure("Yearly Distribution of Total Premium, Earned Premium and Approved Claim Amount", build_fig_yearly_avg_premium)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Yearly Distribution of Total Premium, Earned Premium and Approved Claim Amount</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_yearly_avg_premium, use_container_width=True)
 
-        # Group by product and calculate the mean loss ratio
-        product_data = df.groupby('Product')['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
-
         with cols1:
             # Create a bar chart
-            fig_loss_ratio_by_product = go.Figure()
-
-            for idx, (product, loss_ratio) in enumerate(zip(product_data['Product'], product_data['Loss_Ratio_Rate'])):
-                fig_loss_ratio_by_product.add_trace(go.Bar(
-                    x=[product],  # Single product per trace to allow individual coloring
-                    y=[loss_ratio],
-                    name=product,  # Product name in legend
-                    text=f"{loss_ratio:.1f}%",
-                    textposition='outside',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
-                ))
+            def build_fig_loss_ratio_by_product():
+                # Group by product and calculate the mean loss ratio
+                product_data = df.groupby('Product', observed=True)['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
+
+                fig_loss_ratio_by_product = go.Figure()
+
+                for idx, (product, loss_ratio) in enumerate(zip(product_data['Product'], product_data['Loss_Ratio_Rate'])):
+                    fig_loss_ratio_by_product.add_trace(go.Bar(
+                        x=[product],  # Single product per trace to allow individual coloring
+                        y=[loss_ratio],
+                        name=product,  # Product name in legend
+                        text=f"{loss_ratio:.1f}%",
+                        textposition='outside',
+                        marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
+                    ))
+
+                # Update layout
+                fig_loss_ratio_by_product.update_layout(
+                    xaxis_title="Product",
+                    yaxis_title="Loss Ratio Rate (%)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500
+                )
+                return fig_loss_ratio_by_product
 
-            # Update layout
-            fig_loss_ratio_by_product.update_layout(
-                xaxis_title="Product",
-                yaxis_title="Loss Ratio Rate (%)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500
-            )
+            fig_loss_ratio_by_product = filters.figure("Average Loss Ratio Rate by Product", build_fig_loss_ratio_by_product)
 
             st.markdown('<h3 class="custom-subheader">Average Loss Ratio Rate by Product</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_loss_ratio_by_product, use_container_width=True)
 
 
-        # Group data by 'Product' to calculate Average Claim Size
-        average_claim_size = (
-            df.groupby('Product')
-            .agg(Average_Claim_Size=("Approved Claims", "sum"), Number_of_Claims=("Number of Claims", "sum"))
-            .reset_index()
-        )
-        average_claim_size["Average Claim Size"] = average_claim_size["Average_Claim_Size"] / average_claim_size["Number_of_Claims"]
-
         with cols2:
             # Create the bar chart
-            fig_average_claim_size = go.Figure()
+            def build_fig_average_claim_size():
+                # Group data by 'Product' to calculate Average Claim Size
+                average_claim_size = (
+                    df.groupby('Product', observed=True)
+                    .agg(Average_Claim_Size=("Approved Claims", "sum"), Number_of_Claims=("Number of Claims", "sum"))
+                    .reset_index()
+                )
+                average_claim_size["Average Claim Size"] = average_claim_size["Average_Claim_Size"] / average_claim_size["Number_of_Claims"]
+
+                fig_average_claim_size = go.Figure()
             
-            # Add bar trace for each product
-            for idx, (product, avg_claim) in enumerate(zip(average_claim_size['Product'], average_claim_size['Average Claim Size'])):
-                fig_average_claim_size.add_trace(go.Bar(
-                    x=[product],  # Single product per trace to allow individual coloring
-                    y=[avg_claim],
-                    name=product,  # Product name in legend
-                    text=f"{avg_claim / 1e3:.0f}K",
-                    textposition='outside',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
-                ))
+                # Add bar trace for each product
+                for idx, (product, avg_claim) in enumerate(zip(average_claim_size['Product'], average_claim_size['Average Claim Size'])):
+                    fig_average_claim_size.add_trace(go.Bar(
+                        x=[product],  # Single product per trace to allow individual coloring
+                        y=[avg_claim],
+                        name=product,  # Product name in legend
+                        text=f"{avg_claim / 1e3:.0f}K",
+                        textposition='outside',
+                        marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
+                    ))
+
+                # Update layout
+                fig_average_claim_size.update_layout(
+                    xaxis_title="Product",
+                    yaxis_title="Average Claim Size ()",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450
+                )
+                return fig_average_claim_size
 
-            # Update layout
-            fig_average_claim_size.update_layout(
-                xaxis_title="Product",
-                yaxis_title="Average Claim Size ()",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450
-            )
+            fig_average_claim_size = filters.figure("Average Claim Size by Product", build_fig_average_claim_size)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Claim Size by Product</h3>', unsafe_allow_html=True)
@@ -849,203 +839,214 @@ def display_loss_ratio():
         cols1, cols2 = st.columns(2)
 
 
-        # Group data by 'Month' and calculate the sum/mean of relevant metrics
-        monthly_data_earned = df.groupby('Month')['Earned Premium'].sum().reset_index(name='Earned_Premium')
-        monthly_data_claims = df.groupby('Month')['Approved Claims'].sum().reset_index(name='Approved_Claim_Amount')
-        monthly_data_loss_ratio = df.groupby('Month')['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
+        with cols1:
+            # Create a subplot with dual y-axes
+            def build_fig_monthly_distribution():
+                # Group data by 'Month' and calculate the sum/mean of relevant metrics
+                monthly_data_earned = df.groupby('Month', observed=True)['Earned Premium'].sum().reset_index(name='Earned_Premium')
+                monthly_data_claims = df.groupby('Month', observed=True)['Approved Claims'].sum().reset_index(name='Approved_Claim_Amount')
+                monthly_data_loss_ratio = df.groupby('Month', observed=True)['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
+
+                # Merge the data frames on the 'Month'
+                monthly_data = (
+                    monthly_data_earned
+                    .merge(monthly_data_claims, on='Month', how='outer')
+                    .merge(monthly_data_loss_ratio, on='Month', how='outer')
+                )
 
-        # Merge the data frames on the 'Month'
-        monthly_data = (
-            monthly_data_earned
-            .merge(monthly_data_claims, on='Month', how='outer')
-            .merge(monthly_data_loss_ratio, on='Month', how='outer')
-        )
+                # Fill NaN values with 0 for numerical columns
+                monthly_data[['Earned_Premium', 'Approved_Claim_Amount']] = monthly_data[['Earned_Premium', 'Approved_Claim_Amount']].fillna(0)
+                monthly_data['Loss_Ratio_Rate'] = monthly_data['Loss_Ratio_Rate'].fillna(0)
+
+                fig_monthly_distribution = make_subplots(specs=[[{"secondary_y": True}]])  # Secondary y-axis for Loss Ratio Rate
+
+                # Add Earned Premium bar trace (on primary y-axis)
+                fig_monthly_distribution.add_trace(go.Bar(
+                    x=monthly_data['Month'],
+                    y=monthly_data['Earned_Premium'],
+                    name='Earned Premium',
+                    text=charts.text_labels(monthly_data['Earned_Premium'], 1e6, 1, suffix='M'),
+                    textposition='outside',  # Display values outside the bars
+                    textfont=dict(color='black', size=12),
+                    marker_color=custom_colors[0],
+                    offsetgroup=0
+                ), secondary_y=False)
+
+                # Add Approved Claim Amount bar trace (on primary y-axis)
+                fig_monthly_distribution.add_trace(go.Bar(
+                    x=monthly_data['Month'],
+                    y=monthly_data['Approved_Claim_Amount'],
+                    name='Approved Claim Amount',
+                    text=charts.text_labels(monthly_data['Approved_Claim_Amount'], 1e6, 1, suffix='M'),
+                    textposition='outside',  # Display values outside the bars
+                    textfont=dict(color='black', size=12),
+                    marker_color=custom_colors[1],
+                    offsetgroup=1
+                ), secondary_y=False)
+
+                # Add Loss Ratio Rate line trace (on secondary y-axis)
+                fig_monthly_distribution.add_trace(go.Scatter(
+                    x=monthly_data['Month'],
+                    y=monthly_data['Loss_Ratio_Rate'],  # Loss Ratio Rate on secondary y-axis
+                    name='Loss Ratio Rate (%)',
+                    mode='lines+markers+text',
+                    text=charts.text_labels(monthly_data['Loss_Ratio_Rate'], decimals=1, suffix='%'),  # Format as percentage
+                    textposition='top center',  # Display values above the line
+                    textfont=dict(color='black', size=12),
+                    line=dict(color=custom_colors[2], width=2),
+                    marker=dict(size=8, color=custom_colors[2]),
+                    hoverinfo='x+y+name'
+                ), secondary_y=True)
+
+                # Update layout for grouped bars and dual axes
+                fig_monthly_distribution.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Month",
+                    yaxis_title="Amount (M)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), type='category'),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(x=0.01, y=1.1, orientation="h")  # Place legend above the chart
+                )
 
-        # Fill NaN values with 0 for numerical columns
-        monthly_data[['Earned_Premium', 'Approved_Claim_Amount']] = monthly_data[['Earned_Premium', 'Approved_Claim_Amount']].fillna(0)
-        monthly_data['Loss_Ratio_Rate'] = monthly_data['Loss_Ratio_Rate'].fillna(0)
+                # Set secondary y-axis for Loss Ratio Rate
+                fig_monthly_distribution.update_yaxes(
+                    title_text="Loss Ratio Rate (%)",
+                    secondary_y=True,
+                    title_font=dict(size=14),
+                    tickfont=dict(size=12),
+                    range=[0, max(monthly_data['Loss_Ratio_Rate']) * 1.2]  # Adjust range dynamically
+                )
 
-        with cols1:
-            # Create a subplot with dual y-axes
-            fig_monthly_distribution = make_subplots(specs=[[{"secondary_y": True}]])  # Secondary y-axis for Loss Ratio Rate
-
-            # Add Earned Premium bar trace (on primary y-axis)
-            fig_monthly_distribution.add_trace(go.Bar(
-                x=monthly_data['Month'],
-                y=monthly_data['Earned_Premium'],
-                name='Earned Premium',
-                text=monthly_data['Earned_Premium'].apply(lambda x: f"{x / 1_000_000:.1f}M"),
-                textposition='outside',  # Display values outside the bars
-                textfont=dict(color='black', size=12),
-                marker_color=custom_colors[0],
-                offsetgroup=0
-            ), secondary_y=False)
-
-            # Add Approved Claim Amount bar trace (on primary y-axis)
-            fig_monthly_distribution.add_trace(go.Bar(
-                x=monthly_data['Month'],
-                y=monthly_data['Approved_Claim_Amount'],
-                name='Approved Claim Amount',
-                text=monthly_data['Approved_Claim_Amount'].apply(lambda x: f"{x / 1_000_000:.1f}M"),
-                textposition='outside',  # Display values outside the bars
-                textfont=dict(color='black', size=12),
-                marker_color=custom_colors[1],
-                offsetgroup=1
-            ), secondary_y=False)
-
-            # Add Loss Ratio Rate line trace (on secondary y-axis)
-            fig_monthly_distribution.add_trace(go.Scatter(
-                x=monthly_data['Month'],
-                y=monthly_data['Loss_Ratio_Rate'],  # Loss Ratio Rate on secondary y-axis
-                name='Loss Ratio Rate (%)',
-                mode='lines+markers+text',
-                text=monthly_data['Loss_Ratio_Rate'].apply(lambda x: f"{x:.1f}%"),  # Format as percentage
-                textposition='top center',  # Display values above the line
-                textfont=dict(color='black', size=12),
-                line=dict(color=custom_colors[2], width=2),
-                marker=dict(size=8, color=custom_colors[2]),
-                hoverinfo='x+y+name'
-            ), secondary_y=True)
-
-            # Update layout for grouped bars and dual axes
-            fig_monthly_distribution.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Month",
-                yaxis_title="Amount (M)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), type='category'),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(x=0.01, y=1.1, orientation="h")  # Place legend above the chart
-            )
-
-            # Set secondary y-axis for Loss Ratio Rate
-            fig_monthly_distribution.update_yaxes(
-                title_text="Loss Ratio Rate (%)",
-                secondary_y=True,
-                title_font=dict(size=14),
-                tickfont=dict(size=12),
-                range=[0, max(monthly_data['Loss_Ratio_Rate']) * 1.2]  # Adjust range dynamically
-            )
-
-            # Rotate x-axis labels for better readability
-            fig_monthly_distribution.update_xaxes(tickangle=45)
+                # Rotate x-axis labels for better readability
+                fig_monthly_distribution.update_xaxes(tickangle=45)
+                return fig_monthly_distribution
+
+            fig_monthly_distribution = filters.figure("Monthly Distribution of Earned Premium, Approved Claims, and Loss Ratio Rate", build_fig_monthly_distribution)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Monthly Distribution of Earned Premium, Approved Claims, and Loss Ratio Rate</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_distribution, use_container_width=True)
 
 
-        # Group by client and calculate the mean loss ratio
-        client_data = df.groupby('Client Name')['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
-
-        # Sort by loss ratio rate for better visualization
-        client_data = client_data.sort_values(by='Loss_Ratio_Rate', ascending=False).head(10)
-        
         with cols2:
 
             # Create a bar chart
-            fig_loss_ratio_by_client = go.Figure()
-
-            fig_loss_ratio_by_client.add_trace(go.Bar(
-                x=client_data['Client Name'],
-                y=client_data['Loss_Ratio_Rate'],
-                name='Loss Ratio Rate (%)',
-                text=client_data['Loss_Ratio_Rate'].apply(lambda x: f"{x:.1f}%"),
-                textposition='outside',
-                marker_color='#009DAE'
-            ))
-
-            # Update layout
-            fig_loss_ratio_by_client.update_layout(
-                xaxis_title="Client Name",
-                yaxis_title="Loss Ratio Rate (%)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-            )
+            def build_fig_loss_ratio_by_client():
+                # Group by client and calculate the mean loss ratio
+                client_data = df.groupby('Client Name', observed=True)['Loss Ratio Rate'].mean().reset_index(name='Loss_Ratio_Rate')
+
+                # Sort by loss ratio rate for better visualization
+                client_data = client_data.sort_values(by='Loss_Ratio_Rate', ascending=False).head(10)
+
+                fig_loss_ratio_by_client = go.Figure()
+
+                fig_loss_ratio_by_client.add_trace(go.Bar(
+                    x=client_data['Client Name'],
+                    y=client_data['Loss_Ratio_Rate'],
+                    name='Loss Ratio Rate (%)',
+                    text=charts.text_labels(client_data['Loss_Ratio_Rate'], decimals=1, suffix='%'),
+                    textposition='outside',
+                    marker_color='#009DAE'
+                ))
+
+                # Update layout
+                fig_loss_ratio_by_client.update_layout(
+                    xaxis_title="Client Name",
+                    yaxis_title="Loss Ratio Rate (%)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                )
+                return fig_loss_ratio_by_client
+
+            fig_loss_ratio_by_client = filters.figure("Top 10 Employer Groups by Loss Ratio", build_fig_loss_ratio_by_client)
+
             st.markdown('<h3 class="custom-subheader">Top 10 Employer Groups by Loss Ratio</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_loss_ratio_by_client, use_container_width=True)
         
         with cols1:
 
             # Create a scatter plot
-            fig_loss_vs_premium = go.Figure()
-
-            fig_loss_vs_premium.add_trace(go.Scatter(
-                x=df['Loss Ratio Rate'],
-                y=df['Earned Premium'],
-                mode='markers',
-                name='Loss Ratio vs Earned Premium',
-                marker=dict(color='#009DAE', size=10),
-                text=df.apply(lambda row: f"Year: {row['Year']}<br>Product: {row['Product']}", axis=1),
-                hoverinfo='text+x+y'
-            ))
-
-            # Update layout
-            fig_loss_vs_premium.update_layout(
-                yaxis_title="Earned Premium (M)",
-                xaxis_title="Loss Ratio Rate (%)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-            )
-            st.markdown('<h3 class="custom-subheader">Earned Premium vs Loss Ratio Rate by Product</h3>', unsafe_allow_html=True)
-            st.plotly_chart(fig_loss_vs_premium, use_container_width=True)
+            def build_fig_loss_vs_premium():
+                fig_loss_vs_premium = go.Figure()
+
+                fig_loss_vs_premium.add_trace(go.Scatter(
+                    x=df['Loss Ratio Rate'],
+                    y=df['Earned Premium'],
+                    mode='markers',
+                    name='Loss Ratio vs Earned Premium',
+                    marker=dict(color='#009DAE', size=10),
+                    text=df.apply(lambda row: f"Year: {row['Year']}<br>Product: {row['Product']}", axis=1),
+                    hoverinfo='text+x+y'
+                ))
 
-        # Calculate Claims Frequency (Number of Claims per Client)
-        df['Claims Frequency'] = df['Number of Claims'] / df.groupby('Client Name')['Client Name'].transform('count')
-
-        # Group by 'Client Name' and calculate average Loss Ratio Rate and Claims Frequency
-        client_data = (
-            df.groupby('Client Name')
-            .agg(
-                Average_Loss_Ratio_Rate=('Loss Ratio Rate', 'mean'),  # Mean of Loss Ratio Rate
-                Claims_Frequency=('Claims Frequency', 'mean')        # Mean of Claims Frequency
-            )
-            .reset_index()
-        )
+                # Update layout
+                fig_loss_vs_premium.update_layout(
+                    yaxis_title="Earned Premium (M)",
+                    xaxis_title="Loss Ratio Rate (%)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                )
+                return fig_loss_vs_premium
 
-        # Calculate claims frequency per client
-        df['Claims Frequency'] = df['Number of Claims'] / df.groupby('Client Name')['Client Name'].transform('count')
+            fig_loss_vs_premium = filters.figure("Earned Premium vs Loss Ratio Rate by Product", build_fig_loss_vs_premium)
+
+            st.markdown('<h3 class="custom-subheader">Earned Premium vs Loss Ratio Rate by Product</h3>', unsafe_allow_html=True)
+            st.plotly_chart(fig_loss_vs_premium, use_container_width=True)
 
         with cols2:
             # Create a scatter plot
-            fig_loss_vs_frequency = go.Figure()
-
-            # Add scatter trace
-            for idx, product in enumerate(df['Product'].unique()):
-                filtered_data = df[df['Product'] == product]
-                fig_loss_vs_frequency.add_trace(
-                    go.Scatter(
-                        x=filtered_data['Claims Frequency'],
-                        y=filtered_data['Loss Ratio Rate'],
-                        mode='markers',
-                        name=product,
-                        text=filtered_data['Client Name'],  # Hover text
-                        marker=dict(
-                            color=custom_colors[idx % len(custom_colors)],
-                            size=8
-                        )
+            def build_fig_loss_vs_frequency():
+                # Calculate Claims Frequency (Number of Claims per Client)
+                df['Claims Frequency'] = df['Number of Claims'] / df.groupby('Client Name', observed=True)['Client Name'].transform('count')
+
+                # Group by 'Client Name' and calculate average Loss Ratio Rate and Claims Frequency
+                client_data = (
+                    df.groupby('Client Name', observed=True)
+                    .agg(
+                        Average_Loss_Ratio_Rate=('Loss Ratio Rate', 'mean'),  # Mean of Loss Ratio Rate
+                        Claims_Frequency=('Claims Frequency', 'mean')        # Mean of Claims Frequency
                     )
+                    .reset_index()
+                )
+
+                # Calculate claims frequency per client
+                df['Claims Frequency'] = df['Number of Claims'] / df.groupby('Client Name', observed=True)['Client Name'].transform('count')
+
+                fig_loss_vs_frequency = go.Figure()
+
+                # Add scatter trace
+                fig_loss_vs_frequency.add_traces(charts.series_traces(
+                    df, 'Claims Frequency', 'Loss Ratio Rate', 'Product',
+                    trace=go.Scatter,
+                    colors=custom_colors,
+                    text='Client Name',  # Hover text
+                    mode='markers',
+                    marker=dict(size=8)
+                ))
+
+                # Update layout
+                fig_loss_vs_frequency.update_layout(
+                    xaxis_title="Claims Frequency",
+                    yaxis_title="Loss Ratio Rate (%)",
+                    font=dict(color="Black"),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                    legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
                 )
+                return fig_loss_vs_frequency
 
-            # Update layout
-            fig_loss_vs_frequency.update_layout(
-                xaxis_title="Claims Frequency",
-                yaxis_title="Loss Ratio Rate (%)",
-                font=dict(color="Black"),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-                legend=dict(x=0, y=1.1, orientation='h')  # Place legend above the chart
-            )
+            fig_loss_vs_frequency = filters.figure("Loss Ratio Rate vs. Claims Frequency", build_fig_loss_vs_frequency)
 
             st.markdown('<h3 class="custom-subheader">Loss Ratio Rate vs. Claims Frequency</h3>', unsafe_allow_html=True)
             # Display the chart in Streamlit
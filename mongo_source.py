@@ -0,0 +1,112 @@
+import os
+
+import pandas as pd
+from pymongo import ASCENDING, MongoClient
+
+import cube
+
+
+# Kept free of Streamlit imports. Every function takes the collection to query, so a
+# mongomock collection can stand in for a server when running locally.
+
+MONGO_URI = os.environ.get("CLAIMS_MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.environ.get("CLAIMS_MONGO_DB", "claims_dashboard")
+CLAIMS_COLLECTION = "claims"
+PREMIUMS_COLLECTION = "premiums"
+
+DATE_FIELD = 'Claim Created Date'
+
+# Fields the dashboard filters claims on; indexed on upload so $match can use them
+CLAIM_INDEXES = ['Claim Type', 'Claim Status', 'Source', 'Diagnosis', 'Employer Name', 'Provider Name', 'Product', 'Year']
+
+
+# Function to open a collection of the dashboard database
+def get_collection(name, client=None):
+    client = client or MongoClient(MONGO_URI)
+    return client[MONGO_DB][name]
+
+
+# Function to turn a column name into a field name MongoDB accepts ("." separates paths).
+# Uploads rename columns with it, so every field a query refers to goes through it too.
+def _field_name(name):
+    return str(name).replace('.', '').lstrip('$')
+
+
+# Function to convert numpy scalars (e.g. years picked from a DataFrame) to Python ones BSON can encode
+def _plain(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+# Function to build the $match stage for the sidebar filters: {column: selected values}
+# plus an optional range of whole days, from the start day up to the end of the end day
+# (see cube.day_range), as in the views. Empty selections match everything, like in the views.
+def match_stage(filters=None, start=None, end=None, date_field=DATE_FIELD):
+    query = {
+        _field_name(name): {'$in': [_plain(value) for value in values]}
+        for name, values in (filters or {}).items() if len(values)
+    }
+    dates = {}
+    if start is not None:
+        dates['$gte'] = cube.day_range(start, start)[0].to_pydatetime()
+    if end is not None:
+        dates['$lt'] = cube.day_range(end, end)[1].to_pydatetime()
+    if dates:
+        query[_field_name(date_field)] = dates
+    return {'$match': query}
+
+
+# Function to aggregate inside MongoDB: filter, group by one or more fields and reduce
+# value with how ('sum', 'avg', 'min', 'max'), or count rows when value is None. With
+# top, only the top rows by the aggregate come back, e.g. the 10 most frequent
+# diagnoses; otherwise rows are ordered by the group keys. Only the grouped rows
+# leave the server.
+def aggregate(collection, by, value=None, how='sum', filters=None, start=None, end=None, top=None):
+    by = [by] if isinstance(by, str) else list(by)
+    keys = {f'k{i}': f'${_field_name(name)}' for i, name in enumerate(by)}
+    reduce = {'$sum': 1} if value is None else {f'${how}': f'${_field_name(value)}'}
+
+    pipeline = [match_stage(filters, start, end), {'$group': {'_id': keys, 'value': reduce}}]
+    if top is not None:
+        pipeline += [{'$sort': {'value': -1}}, {'$limit': int(top)}]
+    else:
+        pipeline.append({'$sort': {f'_id.{key}': 1 for key in keys}})
+
+    rows = [[doc['_id'].get(key) for key in keys] + [doc['value']] for doc in collection.aggregate(pipeline)]
+    return pd.DataFrame(rows, columns=by + [value or 'Count'])
+
+
+# Function to fetch matching rows (only the given columns) for charts that need them
+def find_frame(collection, filters=None, start=None, end=None, columns=None):
+    projection = {'_id': 0}
+    projection.update({_field_name(name): 1 for name in columns or []})
+    cursor = collection.find(match_stage(filters, start, end)['$match'], projection)
+    df = pd.DataFrame(list(cursor), columns=None if columns is None else [_field_name(name) for name in columns])
+    if columns is not None:
+        df.columns = list(columns)
+    return df
+
+
+# Function to replace a collection's documents with a DataFrame, batch by batch, and
+# index the given fields. Missing values are stored as null.
+def upload_frame(collection, df, indexes=(), batch_size=10_000):
+    df = df.rename(columns=_field_name)
+    collection.delete_many({})
+    for begin in range(0, len(df), batch_size):
+        batch = df.iloc[begin:begin + batch_size].astype(object)
+        collection.insert_many(batch.where(batch.notna(), None).to_dict('records'))
+    for name in indexes:
+        collection.create_index([(_field_name(name), ASCENDING)])
+
+
+# Load the local claims and premium datasets into MongoDB
+if __name__ == "__main__":
+    import data_loader
+
+    data_loader.ingest_claims()
+    claims = data_loader.read_mapped(data_loader.CLAIMS_DATASET)
+    premiums = data_loader.read_mapped(data_loader.compile_workbook(
+        data_loader.PREMIUMS_FILE, data_loader.PREMIUM_SHEET_PATTERN, data_loader._normalize_premiums))
+
+    upload_frame(get_collection(CLAIMS_COLLECTION), claims, [DATE_FIELD] + CLAIM_INDEXES)
+    upload_frame(get_collection(PREMIUMS_COLLECTION), premiums, ['Client Name', 'Start Date'])
+    print(f"Uploaded {len(claims):,} claims and {len(premiums):,} premium rows to {MONGO_DB}")
@@ -10,6 +10,36 @@ from itertools import chain
 from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 
+import charts
+import timeseries
+from data_loader import CLAIMS_DATASET, claims_version, compact_categories, load_claims, load_cube
+from facets import Facet, state_keys
+from filter_cache import FilterChain
+from kpis import ClaimKPIs
+
+
+# The filter widgets of the view, in the order their filters are applied (see facets.Facet)
+FACETS = [
+    Facet("sidebar_claim_type_multiselect", 'Claim Type', cascade=False),
+    Facet("sidebar_claim_status_multiselect", 'Claim Status', cascade=False),
+    Facet("sidebar_source_multiselect", 'Source', cascade=False),
+    Facet("sidebar_diagnosis_code_multiselect", 'Diagnosis', cascade=False),
+    Facet("sidebar_employer_name_multiselect", 'Employer Name', cascade=False),
+    Facet("sidebar_provider_name_multiselect", 'Provider Name', cascade=False),
+    Facet("year_select_multiselect", 'Year', default=lambda years: years[-1:]),
+    Facet("month_select_multiselect", 'Month', cascade=False),
+    Facet("filter_quarter_multiselector", 'Quarter'),
+    Facet("filter_business_line_multiselector", 'Product'),
+    Facet("Provider_selector_multiselector", 'Provider Name'),
+    Facet("status_multiselector", 'Claim Status'),
+    Facet("type_select_multiselect", 'Claim Type'),
+    Facet("employer_selecto_multiselector", 'Employer Name'),
+]
+
+# Keys of the filter widgets whose values are kept while the view is hidden
+FILTER_KEYS = state_keys(FACETS)
+
+
 def display_product():
 
     # Centered and styled main title using inline styles
@@ -32,22 +62,8 @@ def display_product():
     st.markdown('<h1 class="main-title">PRODUCT VIEW</h1>', unsafe_allow_html=True)
 
 
-    # File paths and sheet names
-    filepath_visits = "Claims.xlsx"
-    sheet_name1 = "2023 claims"
-    sheet_name2 = "2024 claims"
-
-    # Read the Claims data
-    dfc_2023 = pd.read_excel(filepath_visits, sheet_name=sheet_name1)
-    dfc_2024 = pd.read_excel(filepath_visits, sheet_name=sheet_name2)
-
-    # Concatenate the dataframes
-    df = pd.concat([dfc_2023, dfc_2024])
-
-    # Data preprocessing
-    df['Claim Created Date'] = pd.to_datetime(df['Claim Created Date'], errors='coerce')
-    df["Employer Name"] = df["Employer Name"].str.upper()
-    df["Provider Name"] = df["Provider Name"].str.upper()
+    # Load the shared, normalized claims data
+    df = load_claims()
 
     # Sidebar styling and logo
     st.markdown("""
@@ -95,12 +111,6 @@ def display_product():
         </style>
         """, unsafe_allow_html=True)
 
-    # Dictionary to map month names to their order
-    month_order = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6, "July": 7, "August": 8,
-        "September": 9, "October": 10, "November": 11, "December": 12
-    }
     # Define the mapping of months to quarters
     month_to_quarter = {
         "January": "Q1", "February": "Q1", "March": "Q1",
@@ -108,73 +118,82 @@ def display_product():
         "July": "Q3", "August": "Q3", "September": "Q3",
         "October": "Q4", "November": "Q4", "December": "Q4"
     }
-    # Filter DataFrame by months in `month_order`
-    df = df[df['Month'].isin(month_order)]
+    # Filters below are applied through a cached chain: repeating a selection
+    # reuses the rows it produced before instead of filtering again. The chain
+    # filters the daily cube alongside, so totals and averages by period, type,
+    # status or product are summed from cube cells rather than from every claim.
+    filters = FilterChain(df, "Product View", claims_version(), cube=load_cube(), path=CLAIMS_DATASET)
+
+    # Keep rows whose month is a calendar month ('Month' is ordered at load)
+    filters.notna('Month')
 
-    # Sort months based on their order
-    sorted_months = sorted(df['Month'].dropna().unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
-    df['Source'] = df['Source'].astype(str)
-    df['Quarter'] = "Q" + df['Claim Created Date'].dt.quarter.astype(str)
+    # Options for every filter widget below, each from the rows the filters before it
+    # leave, resolved up front from the selections in session state
+    options = filters.options(FACETS, st.session_state)
+
+
+    # Months present, in calendar order
+    sorted_months = list(options["month_select_multiselect"].index)
 
     # Sidebar for filters
     st.sidebar.header("Filters")
 
     type = st.sidebar.multiselect(
         "Select Claim Type",
-        options=sorted(df['Claim Type'].unique()),
+        options=list(options["sidebar_claim_type_multiselect"].index),
         key="sidebar_claim_type_multiselect"
     )
 
     status = st.sidebar.multiselect(
         "Select Claim Status",
-        options=df['Claim Status'].unique(),
+        options=list(options["sidebar_claim_status_multiselect"].index),
         key="sidebar_claim_status_multiselect"
     )
 
     source = st.sidebar.multiselect(
         "Select Claim Provider Type",
-        options=sorted(df['Source'].unique()),
+        options=list(options["sidebar_source_multiselect"].index),
         key="sidebar_source_multiselect"
     )
 
     code = st.sidebar.multiselect(
         "Select Diagnosis",
-        options=df['Diagnosis'].unique(),
+        options=list(options["sidebar_diagnosis_code_multiselect"].index),
         key="sidebar_diagnosis_code_multiselect"
     )
 
     client_name = st.sidebar.multiselect(
         "Select Employer Name",
-        options=sorted(df['Employer Name'].dropna().unique()),
+        options=list(options["sidebar_employer_name_multiselect"].index),
         key="sidebar_employer_name_multiselect"
     )
 
     prov_name = st.sidebar.multiselect(
         "Select Provider Name",
-        options=sorted(df['Provider Name'].dropna().unique()),
+        options=list(options["sidebar_provider_name_multiselect"].index),
         key="sidebar_provider_name_multiselect"
     )
 
     # Apply filters to the DataFrame
     if 'Claim Type' in df.columns and type:
-        df = df[df['Claim Type'].isin(type)]
+        filters.isin('Claim Type', type)
     if 'Claim Status' in df.columns and status:
-        df = df[df['Claim Status'].isin(status)]
+        filters.isin('Claim Status', status)
     if 'Source' in df.columns and source:
-        df = df[df['Source'].isin(source)]
+        filters.isin('Source', source)
     if 'Diagnosis' in df.columns and code:
-        df = df[df['Diagnosis'].isin(code)]
+        filters.isin('Diagnosis', code)
     if 'Employer Name' in df.columns and client_name:
-        df = df[df['Employer Name'].isin(client_name)]
+        filters.isin('Employer Name', client_name)
     if 'Provider Name' in df.columns and prov_name:
-        df = df[df['Provider Name'].isin(prov_name)]
+        filters.isin('Provider Name', prov_name)
 
     # Create a three-column layout
     col1, col2, col3, col4 = st.columns(4)
 
     # Year selector (allow multiple selections)
     with col1:
-        years = sorted(df['Year'].dropna().unique())
+        years = list(options["year_select_multiselect"].index)
         selected_years = st.multiselect(
             "Select Years",
             options=years,
@@ -182,7 +201,7 @@ def display_product():
             key="year_select_multiselect"
         )
         if selected_years:
-            df = df[df['Year'].isin(selected_years)]
+            filters.isin('Year', selected_years)
 
     # Month selector (allow multiple selections)
     with col2:
@@ -192,35 +211,35 @@ def display_product():
             key="month_select_multiselect"
         )
         if selected_months:
-            df = df[df['Month'].isin(selected_months)]
+            filters.isin('Month', selected_months)
 
         # Dynamically calculate the quarters based on selected months
         if selected_months:
             suggested_quarters = list(set(month_to_quarter[month] for month in selected_months))
         else:
-            suggested_quarters = sorted(df['Quarter'].dropna().unique())
+            suggested_quarters = list(options["filter_quarter_multiselector"].index)
 
     # Quarter selector (allow manual selection, with dynamic suggestions)
     with col3:
-        quarters = sorted(df['Quarter'].dropna().unique())
+        quarters = list(options["filter_quarter_multiselector"].index)
         selected_quarters = st.multiselect(
             "Select Quarters",
             options=quarters,
             key="filter_quarter_multiselector"
         )
         if selected_quarters:
-            df = df[df['Quarter'].isin(selected_quarters)]
+            filters.isin('Quarter', selected_quarters)
 
     # Business Line selector (pre-select all options by default)
     with col4:
-        business_lines = sorted(df['Product'].dropna().unique()) if 'Product' in df.columns else []
+        business_lines = list(options["filter_business_line_multiselector"].index)
         selected_business_lines = st.multiselect(
             "Select Business Lines",
             options=business_lines,
             key="filter_business_line_multiselector"
         )
         if selected_business_lines:
-            df = df[df['Product'].isin(selected_business_lines)]
+            filters.isin('Product', selected_business_lines)
 
 
     # Create a three-column layout
@@ -229,19 +248,19 @@ def display_product():
 
     # Year selector (allow multiple selections)
     with col3:
-        years = sorted(df['Provider Name'].dropna().unique())
+        years = list(options["Provider_selector_multiselector"].index)
         selected_years = st.multiselect(
             "Select Service Provider",
             options=years,
             key="Provider_selector_multiselector"
         )
         if selected_years:
-            df = df[df['Provider Name'].isin(selected_years)]
+            filters.isin('Provider Name', selected_years)
 
 
         # Claim Status selector (pre-select one status by default)
     with col2:
-            business_lines = sorted(df['Claim Status'].dropna().unique()) if 'Claim Status' in df.columns else []
+            business_lines = list(options["status_multiselector"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -252,11 +271,11 @@ def display_product():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Status'].isin(selected_business_lines)]
+                filters.isin('Claim Status', selected_business_lines)
 
         # Claim Status selector (pre-select one status by default)
     with col1:
-            business_lines = sorted(df['Claim Type'].dropna().unique()) if 'Claim Type' in df.columns else []
+            business_lines = list(options["type_select_multiselect"].index)
             
             # Pre-select only one status by default (e.g., "Approved")
             selected_business_lines = st.multiselect(
@@ -267,29 +286,21 @@ def display_product():
             
             # Apply filter for Claim Status
             if selected_business_lines:
-                df = df[df['Claim Type'].isin(selected_business_lines)]
+                filters.isin('Claim Type', selected_business_lines)
 
     # Year selector (allow multiple selections)
     with col4:
-        years = sorted(df['Employer Name'].dropna().unique())
+        years = list(options["employer_selecto_multiselector"].index)
         selected_years = st.multiselect(
             "Select Employer Group",
             options=years,
             key="employer_selecto_multiselector"
         )
         if selected_years:
-            df = df[df['Employer Name'].isin(selected_years)]
+            filters.isin('Employer Name', selected_years)
 
-    # Dynamically calculate the date range based on selected filters
-    if selected_months:
-        # Filter DataFrame by selected months
-        df_filtered = df[df['Month'].isin(selected_months)]
-    else:
-        df_filtered = df
-
-    # Get the minimum and maximum dates from the filtered DataFrame
-    startDate = df_filtered["Claim Created Date"].min()
-    endDate = df_filtered["Claim Created Date"].max()
+    # Date range of the rows the filters above keep (selected months included)
+    startDate, endDate = filters.bounds("Claim Created Date")
 
 
     # Define CSS for the styled date input boxes
@@ -340,7 +351,10 @@ def display_product():
 
     # Filter the DataFrame based on the selected date range
     if date1 and date2:
-        df = df[(df["Claim Created Date"] >= date1) & (df["Claim Created Date"] <= date2)]
+        filters.between("Claim Created Date", date1, date2)
+
+    # Drop categories the filters removed so charts only show what is left
+    df = filters.memo("compact", compact_categories)
 
 
 
@@ -349,35 +363,30 @@ def display_product():
  
 
 
-    df_app = df[df['Claim Status'] == 'Approved']
-    df_dec = df[df['Claim Status'] == 'Declined']
-
     if not df.empty:
         scale = 1_000_000  # For millions
         scaling = 1000  # For thousands
 
-        # Calculate key metrics
-        total_claim_amount = (df["Claim Amount"].sum()) / scale
-        average_amount = (df["Claim Amount"].mean()) / scaling
-        average_app_amount = (df["Approved Claim Amount"].mean()) / scaling
-
-        total_app_claim_amount = (df_app["Approved Claim Amount"].sum()) / scale
-        total_dec_claim_amount = (df_dec["Claim Amount"].sum()) / scaling
-
-        total_app = df_app["Claim ID"].nunique()
-        total_dec = df_dec["Claim ID"].nunique()
+        # Calculate key metrics, all from one pass over the filtered claims
+        kpis = filters.memo("kpis", ClaimKPIs)
+        total_claim_amount = kpis.claim_amount / scale
+        average_amount = kpis.average_amount / scaling
+        average_app_amount = kpis.average_approved_amount / scaling
 
+        total_app_claim_amount = kpis.status('Approved', 'approved_amount') / scale
+        total_dec_claim_amount = kpis.status('Declined', 'claim_amount') / scaling
 
+        total_app = kpis.status('Approved')
+        total_dec = kpis.status('Declined')
 
-        total_clients = df["Client Name"].nunique()
-        total_claims = df["Claim ID"].nunique()
-
+        total_clients = kpis.clients
+        total_claims = kpis.claims
 
         # Approval Rate (Claims Approved / Total Claims)
-        approval_rate = (total_app / total_claims) * 100 if total_claims > 0 else 0
+        approval_rate = kpis.rate('Approved')
 
         # Denial Rate (Claims Declined / Total Claims)
-        denial_rate = (total_dec / total_claims) * 100 if total_claims > 0 else 0
+        denial_rate = kpis.rate('Declined')
 
 
         # Create 4-column layout for metric cards# Define CSS for the styled boxes and tooltips
@@ -458,78 +467,83 @@ def display_product():
 
         with col1:
             # Total Claims and Approved Claim Amount Over Time
-            area_chart_count = df.groupby(df["Claim Created Date"].dt.strftime("%Y-%m-%d")).size().reset_index(name='Count')
-
-            area_chart_amount = df.groupby(df["Claim Created Date"].dt.strftime("%Y-%m-%d"))['Claim Amount'].sum().reset_index(name='Claim Amount')
-
-            area_chart = pd.merge(area_chart_count, area_chart_amount, on='Claim Created Date').sort_values("Claim Created Date")
-
-            fig1 = make_subplots(specs=[[{"secondary_y": True}]])
+            def build_fig1():
+                daily = pd.DataFrame({
+                    'Count': filters.rollup("Claim Created Date", how='size'),
+                    'Claim Amount': filters.rollup("Claim Created Date", 'Claim Amount'),
+                })
+                area_chart = timeseries.resample(daily.index, timeseries.pick_grain(date1, date2), daily).reset_index()
+
+                fig1 = make_subplots(specs=[[{"secondary_y": True}]])
             
-            fig1.add_trace(
-                go.Scatter(
-                    x=area_chart['Claim Created Date'], 
-                    y=area_chart['Count'], 
-                    name="Number of Claims", 
-                    fill='tozeroy', 
-                    line=dict(color=custom_colors[1])), 
-                    secondary_y=False)
+                fig1.add_trace(
+                    go.Scatter(
+                        x=area_chart['Claim Created Date'], 
+                        y=area_chart['Count'], 
+                        name="Number of Claims", 
+                        fill='tozeroy', 
+                        line=dict(color=custom_colors[1])), 
+                        secondary_y=False)
             
-            fig1.add_trace(
-                go.Scatter(
-                    x=area_chart['Claim Created Date'], 
-                    y=area_chart['Claim Amount'], 
-                    name="Claim Amount", fill='tozeroy', 
-                    line=dict(color=custom_colors[0])), 
-                    secondary_y=True)
+                fig1.add_trace(
+                    go.Scatter(
+                        x=area_chart['Claim Created Date'], 
+                        y=area_chart['Claim Amount'], 
+                        name="Claim Amount", fill='tozeroy', 
+                        line=dict(color=custom_colors[0])), 
+                        secondary_y=True)
             
-            fig1.update_xaxes(
-                title_text="Claim Created Date", 
-                tickangle=45)
+                fig1.update_xaxes(
+                    title_text="Claim Created Date", 
+                    tickangle=45)
             
-            fig1.update_yaxes(
-                title_text="<b>Number of Claims</b>", 
-                secondary_y=False)
+                fig1.update_yaxes(
+                    title_text="<b>Number of Claims</b>", 
+                    secondary_y=False)
             
-            fig1.update_yaxes(
-                title_text="<b>Approved Claim Amount</b>", 
-                secondary_y=True)
+                fig1.update_yaxes(
+                    title_text="<b>Approved Claim Amount</b>", 
+                    secondary_y=True)
+                return fig1
+
+            fig1 = filters.figure("Total Claims and Approved Claim Amount Over Time", build_fig1)
             
             st.markdown('<h3 class="custom-subheader">Total Claims and Approved Claim Amount Over Time</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig1, use_container_width=True)
 
-        # Group data by "Year" and "Product" and calculate the average Claim Amount
-        yearly_avg_claim = df.groupby(['Year', 'Product'])['Claim Amount'].sum().unstack().fillna(0)
-
         # Define custom colors
         with col2:
             # Create the grouped bar chart
-            fig_yearly_avg_claim = go.Figure()
-
-            # Add traces for each product
-            for idx, product in enumerate(yearly_avg_claim.columns):
-                fig_yearly_avg_claim.add_trace(go.Bar(
-                    x=yearly_avg_claim.index,  # Years on the x-axis
-                    y=yearly_avg_claim[product],  # Average claim amount for each product
-                    name=product,  # Product name as legend
-                    text=yearly_avg_claim[product].apply(lambda x: f"{x / 1_000_000:.1f}M"),  # Format values in millions
+            def build_fig_yearly_avg_claim():
+                # Group data by "Year" and "Product" and calculate the average Claim Amount
+                yearly_avg_claim = filters.rollup(['Year', 'Product'], 'Claim Amount').unstack().fillna(0)
+
+                fig_yearly_avg_claim = go.Figure()
+
+                # Add traces for each product, years on the x-axis
+                fig_yearly_avg_claim.add_traces(charts.series_traces(
+                    yearly_avg_claim,
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e6, 1, suffix='M'),  # Format values in millions
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Update layout
-            fig_yearly_avg_claim.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Year",
-                yaxis_title="Total Claim Amount (M)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450
-            )
+                # Update layout
+                fig_yearly_avg_claim.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Year",
+                    yaxis_title="Total Claim Amount (M)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450
+                )
+                return fig_yearly_avg_claim
+
+            fig_yearly_avg_claim = filters.figure("Total Yearly Claims by Product", build_fig_yearly_avg_claim)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Total Yearly Claims by Product</h3>', unsafe_allow_html=True)
@@ -537,72 +551,74 @@ def display_product():
 
         col1, col2 = st.columns(2)
 
-        # Group data by "Month" and "Product" and calculate the average Claim Amount
-        monthly_avg_claim = df.groupby(['Month', 'Product'])['Claim Amount'].mean().unstack().fillna(0)
-
         # Define custom colors
         with col1:
             # Create the grouped bar chart
-            fig_monthly_avg_claim = go.Figure()
-
-            # Add traces for each product
-            for idx, product in enumerate(monthly_avg_claim.columns):
-                fig_monthly_avg_claim.add_trace(go.Bar(
-                    x=monthly_avg_claim.index,  # Months on the x-axis
-                    y=monthly_avg_claim[product],  # Average claim amount for each product
-                    name=product,  # Product name as legend
-                    text=monthly_avg_claim[product].apply(lambda x: f"{x / 1_000:.1f}K"),  # Format values in millions
+            def build_fig_monthly_avg_claim():
+                # Group data by "Month" and "Product" and calculate the average Claim Amount
+                monthly_avg_claim = filters.rollup(['Month', 'Product'], 'Claim Amount', 'mean').unstack().fillna(0)
+
+                fig_monthly_avg_claim = go.Figure()
+
+                # Add traces for each product, months on the x-axis
+                fig_monthly_avg_claim.add_traces(charts.series_traces(
+                    monthly_avg_claim,
+                    colors=custom_colors,  # Cycle through custom colors
+                    text=lambda values: charts.text_labels(values, 1e3, 1, suffix='K'),  # Format values in thousands
                     textposition='inside',
                     textfont=dict(color='white'),
                     hoverinfo='x+y+name',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
                 ))
 
-            # Update layout
-            fig_monthly_avg_claim.update_layout(
-                barmode='group',  # Grouped bar chart
-                xaxis_title="Month",
-                yaxis_title="Average Claim Amount (M)",
-                font=dict(color='Black'),
-                xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),  # Rotate month labels for readability
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
-                margin=dict(l=0, r=0, t=30, b=50),
-                height=450
-            )
+                # Update layout
+                fig_monthly_avg_claim.update_layout(
+                    barmode='group',  # Grouped bar chart
+                    xaxis_title="Month",
+                    yaxis_title="Average Claim Amount (M)",
+                    font=dict(color='Black'),
+                    xaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), tickangle=45),  # Rotate month labels for readability
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12)),
+                    margin=dict(l=0, r=0, t=30, b=50),
+                    height=450
+                )
+                return fig_monthly_avg_claim
+
+            fig_monthly_avg_claim = filters.figure("Average Monthly Claim Amount by Product", build_fig_monthly_avg_claim)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Average Monthly Claim Amount by Product</h3>', unsafe_allow_html=True)
             st.plotly_chart(fig_monthly_avg_claim, use_container_width=True)
 
-    # Group by product and count total claims
-    product_claim_count = df.groupby(['Product'])['Claim Amount'].mean().reset_index()
-
     with col2:
         # Create a bar chart showing total claims by product
-        fig_claim_status_by_product = go.Figure()
-
-        # Add traces for each product with different colors
-        for idx, product in enumerate(product_claim_count['Product']):
-            fig_claim_status_by_product.add_trace(go.Bar(
-                x=[product],  # The product name on the x-axis
-                y=[product_claim_count.loc[product_claim_count['Product'] == product, 'Claim Amount'].values[0]],  # The claim amount for the product
-                name=product,  # Product name as legend
-                text=product_claim_count.loc[product_claim_count['Product'] == product, 'Claim Amount'].apply(lambda x: f"{x / 1_000:.1f}K"),  # Format values in millions
+        def build_fig_claim_status_by_product():
+            # Group by product and count total claims
+            product_claim_count = filters.rollup(['Product'], 'Claim Amount', 'mean').reset_index()
+
+            fig_claim_status_by_product = go.Figure()
+
+            # Add traces for each product with different colors
+            fig_claim_status_by_product.add_traces(charts.series_traces(
+                product_claim_count, 'Product', 'Claim Amount', 'Product',
+                colors=custom_colors,  # Cycle through custom colors
+                text=lambda values: charts.text_labels(values, 1e3, 1, suffix='K'),  # Format values in thousands
                 textposition='inside',
                 textfont=dict(color='white'),
                 hoverinfo='x+y+name',
-                marker_color=custom_colors[idx % len(custom_colors)]  # Cycle through custom colors
             ))
 
-        # Update layout
-        fig_claim_status_by_product.update_layout(
-            barmode='group',
-            xaxis_title="Product",
-            yaxis_title="Average Claim Amount",
-            font=dict(color='Black'),
-            margin=dict(l=0, r=0, t=50, b=50),
-            height=500
-        )
+            # Update layout
+            fig_claim_status_by_product.update_layout(
+                barmode='group',
+                xaxis_title="Product",
+                yaxis_title="Average Claim Amount",
+                font=dict(color='Black'),
+                margin=dict(l=0, r=0, t=50, b=50),
+                height=500
+            )
+            return fig_claim_status_by_product
+
+        fig_claim_status_by_product = filters.figure("Average Claim Amount by Product", build_fig_claim_status_by_product)
 
         st.markdown('<h3 class="custom-subheader">Average Claim Amount by Product</h3>', unsafe_allow_html=True)
 
@@ -611,34 +627,35 @@ def display_product():
 
     col1, col2 = st.columns(2)
 
-    # Group by product and count total claims
-    product_claim_count = df.groupby(['Product'])['Claim ID'].nunique().reset_index()
-
     with col1:
         # Create a bar chart showing total claims by product
-        fig_claim_status_by_product = go.Figure()
-
-        # Add traces for each product with different colors
-        for idx, product in enumerate(product_claim_count['Product']):
-            fig_claim_status_by_product.add_trace(go.Bar(
-                x=[product],  # The product name on the x-axis
-                y=[product_claim_count.loc[product_claim_count['Product'] == product, 'Claim ID'].values[0]],  # The claim amount for the product
-                name=product,  # Product name as legend
+        def build_fig_claim_status_by_product():
+            # Group by product and count total claims
+            product_claim_count = df.groupby(['Product'], observed=True)['Claim ID'].nunique().reset_index()
+
+            fig_claim_status_by_product = go.Figure()
+
+            # Add traces for each product with different colors
+            fig_claim_status_by_product.add_traces(charts.series_traces(
+                product_claim_count, 'Product', 'Claim ID', 'Product',
+                colors=custom_colors,
                 textposition='inside',
                 textfont=dict(color='white'),
                 hoverinfo='x+y+name',
-                marker_color=custom_colors[idx % len(custom_colors)]  
             ))
 
-        # Update layout
-        fig_claim_status_by_product.update_layout(
-            barmode='group',
-            xaxis_title="Product",
-            yaxis_title="Number of Claims",
-            font=dict(color='Black'),
-            margin=dict(l=0, r=0, t=50, b=50),
-            height=500
-        )
+            # Update layout
+            fig_claim_status_by_product.update_layout(
+                barmode='group',
+                xaxis_title="Product",
+                yaxis_title="Number of Claims",
+                font=dict(color='Black'),
+                margin=dict(l=0, r=0, t=50, b=50),
+                height=500
+            )
+            return fig_claim_status_by_product
+
+        fig_claim_status_by_product = filters.figure("Number of Claims by Product", build_fig_claim_status_by_product)
 
         st.markdown('<h3 class="custom-subheader">Number of Claims by Product</h3>', unsafe_allow_html=True)
 
@@ -648,32 +665,32 @@ def display_product():
 
         with col2:
 
-            # Filter top providers by claim volume
-            top_providers = df.groupby(['Product', 'Source'])['Claim Amount'].mean().reset_index(name='Claim Amount')
+            # Create a grouped bar chart
+            def build_fig_top_providers():
+                # Filter top providers by claim volume
+                top_providers = filters.rollup(['Product', 'Source'], 'Claim Amount', 'mean').reset_index(name='Claim Amount')
 
+                fig_top_providers = go.Figure()
 
-            # Create a grouped bar chart
-            fig_top_providers = go.Figure()
-
-            for product in top_providers['Product'].unique():
-                product_data = top_providers[top_providers['Product'] == product]
-                fig_top_providers.add_trace(go.Bar(
-                    x=product_data['Source'],
-                    y=product_data['Claim Amount'],
-                    name=product,
-                    marker_color=custom_colors[list(top_providers['Product'].unique()).index(product) % len(custom_colors)]  # Assign unique color per product
+                fig_top_providers.add_traces(charts.series_traces(
+                    top_providers, 'Source', 'Claim Amount', 'Product',
+                    colors=custom_colors,  # Assign unique color per product
                 ))
 
-            # Update layout
-            fig_top_providers.update_layout(
-                barmode='group',
-                xaxis_title="Provider Type",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(tickangle=45),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500
-            )
+                # Update layout
+                fig_top_providers.update_layout(
+                    barmode='group',
+                    xaxis_title="Provider Type",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(tickangle=45),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500
+                )
+                return fig_top_providers
+
+            fig_top_providers = filters.figure("Provider Type Trend by Product and Average Claim Amount", build_fig_top_providers)
+
             st.markdown('<h3 class="custom-subheader">Provider Type Trend by Product and Average Cllaim Amount</h3>', unsafe_allow_html=True)
 
             st.plotly_chart(fig_top_providers, use_container_width=True)
@@ -681,102 +698,103 @@ def display_product():
 
         with col1:
 
-            # Filter top providers by claim volume
-            top_providers = df.groupby(['Product', 'Claim Type'])['Claim Amount'].mean().reset_index(name='Claim Amount')
+            # Create a grouped bar chart
+            def build_fig_top_providers():
+                # Filter top providers by claim volume
+                top_providers = filters.rollup(['Product', 'Claim Type'], 'Claim Amount', 'mean').reset_index(name='Claim Amount')
 
+                fig_top_providers = go.Figure()
 
-            # Create a grouped bar chart
-            fig_top_providers = go.Figure()
-
-            for product in top_providers['Product'].unique():
-                product_data = top_providers[top_providers['Product'] == product]
-                fig_top_providers.add_trace(go.Bar(
-                    x=product_data['Claim Type'],
-                    y=product_data['Claim Amount'],
-                    name=product,
-                    marker_color=custom_colors[list(top_providers['Product'].unique()).index(product) % len(custom_colors)]  # Assign unique color per product
+                fig_top_providers.add_traces(charts.series_traces(
+                    top_providers, 'Claim Type', 'Claim Amount', 'Product',
+                    colors=custom_colors,  # Assign unique color per product
                 ))
 
-            # Update layout
-            fig_top_providers.update_layout(
-                barmode='group',
-                xaxis_title="Claim Type",
-                yaxis_title="Average Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(tickangle=45),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500
-            )
+                # Update layout
+                fig_top_providers.update_layout(
+                    barmode='group',
+                    xaxis_title="Claim Type",
+                    yaxis_title="Average Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(tickangle=45),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500
+                )
+                return fig_top_providers
+
+            fig_top_providers = filters.figure("Average Claim Amount and Claim Type Trend by Product", build_fig_top_providers)
+
             st.markdown('<h3 class="custom-subheader">Average Claim Amount and Claim Type Trend by Product</h3>', unsafe_allow_html=True)
 
             st.plotly_chart(fig_top_providers, use_container_width=True)
 
         with col2:
 
-            # Filter top providers by claim volume
-            top_providers = df.groupby(['Product', 'Diagnosis'])['Claim Amount'].sum().reset_index(name='Claim Amount')
+            # Create a grouped bar chart
+            def build_fig_top_providers():
+                # Filter top providers by claim volume
+                top_providers = df.groupby(['Product', 'Diagnosis'], observed=True)['Claim Amount'].sum().reset_index(name='Claim Amount')
 
-            top_providers = top_providers.sort_values(by=['Product', 'Claim Amount'], ascending=[True, False]).groupby('Product').head(10)
+                top_providers = top_providers.sort_values(by=['Product', 'Claim Amount'], ascending=[True, False]).groupby('Product', observed=True).head(10)
 
-            # Create a grouped bar chart
-            fig_top_providers = go.Figure()
-
-            for product in top_providers['Product'].unique():
-                product_data = top_providers[top_providers['Product'] == product]
-                fig_top_providers.add_trace(go.Bar(
-                    x=product_data['Diagnosis'],
-                    y=product_data['Claim Amount'],
-                    name=product,
-                    marker_color=custom_colors[list(top_providers['Product'].unique()).index(product) % len(custom_colors)]  # Assign unique color per product
+                fig_top_providers = go.Figure()
+
+                fig_top_providers.add_traces(charts.series_traces(
+                    top_providers, 'Diagnosis', 'Claim Amount', 'Product',
+                    colors=custom_colors,  # Assign unique color per product
                 ))
 
-            # Update layout
-            fig_top_providers.update_layout(
-                barmode='group',
-                xaxis_title="Diagnosis",
-                yaxis_title="Claim Amount",
-                font=dict(color='Black'),
-                xaxis=dict(tickangle=45),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500,
-            )
+                # Update layout
+                fig_top_providers.update_layout(
+                    barmode='group',
+                    xaxis_title="Diagnosis",
+                    yaxis_title="Claim Amount",
+                    font=dict(color='Black'),
+                    xaxis=dict(tickangle=45),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500,
+                )
+                return fig_top_providers
+
+            fig_top_providers = filters.figure("Top 10 Diagnosis by Product", build_fig_top_providers)
+
             st.markdown('<h3 class="custom-subheader">Top 10 Diagnosis by Product</h3>', unsafe_allow_html=True)
 
             st.plotly_chart(fig_top_providers, use_container_width=True)
 
         with col1:
 
-            # Filter top providers by claim volume
-            top_providers = df.groupby(['Product', 'Provider Name'])['Claim Amount'].sum().reset_index(name='Total Claim Amount')
+            # Create a grouped bar chart for top providers
+            def build_fig_top_providers():
+                # Filter top providers by claim volume
+                top_providers = filters.rollup(['Product', 'Provider Name'], 'Claim Amount').reset_index(name='Total Claim Amount')
 
-            # Sort by claim amount and limit to top 5 providers per product
-            top_providers = top_providers.sort_values(by=['Product', 'Total Claim Amount'], ascending=[True, False]).groupby('Product').head(10)
+                # Sort by claim amount and limit to top 5 providers per product
+                top_providers = top_providers.sort_values(by=['Product', 'Total Claim Amount'], ascending=[True, False]).groupby('Product', observed=True).head(10)
 
-            # Create a grouped bar chart for top providers
-            fig_top_providers = go.Figure()
-
-            for idx, product in enumerate(top_providers['Product'].unique()):
-                product_data = top_providers[top_providers['Product'] == product]
-                fig_top_providers.add_trace(go.Bar(
-                    x=product_data['Provider Name'],
-                    y=product_data['Total Claim Amount'],
-                    name=product,
-                    text=product_data['Total Claim Amount'].apply(lambda x: f"Client Name{x / 1_000_000:.1f}M"),  # Format as millions
+                fig_top_providers = go.Figure()
+
+                fig_top_providers.add_traces(charts.series_traces(
+                    top_providers, 'Provider Name', 'Total Claim Amount', 'Product',
+                    colors=custom_colors,  # Assign unique color per product
+                    text=lambda values: charts.text_labels(values, 1e6, 1, prefix='Client Name', suffix='M'),  # Format as millions
                     textposition='outside',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Assign unique color per product
                 ))
 
-            # Update layout
-            fig_top_providers.update_layout(
-                barmode='group',
-                xaxis_title="Provider Name",
-                yaxis_title="Total Claim Amount (M)",
-                font=dict(color='Black', size=12),
-                xaxis=dict(tickangle=45, title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), ticksuffix="M"),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500
-            )
+                # Update layout
+                fig_top_providers.update_layout(
+                    barmode='group',
+                    xaxis_title="Provider Name",
+                    yaxis_title="Total Claim Amount (M)",
+                    font=dict(color='Black', size=12),
+                    xaxis=dict(tickangle=45, title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), ticksuffix="M"),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500
+                )
+                return fig_top_providers
+
+            fig_top_providers = filters.figure("Top 10 Service Providers by Claim Amount", build_fig_top_providers)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Service Providers by Claim Amount</h3>', unsafe_allow_html=True)
@@ -784,37 +802,37 @@ def display_product():
 
         with col2:
 
-            # Filter top clients by claim volume
-            top_clients = df.groupby(['Product', 'Client Name'])['Claim Amount'].sum().reset_index(name='Total Claim Amount')
+            # Create a grouped bar chart for top clients
+            def build_fig_top_clients():
+                # Filter top clients by claim volume
+                top_clients = df.groupby(['Product', 'Client Name'], observed=True)['Claim Amount'].sum().reset_index(name='Total Claim Amount')
 
-            # Sort by claim amount and limit to top 5 clients per product
-            top_clients = top_clients.sort_values(by=['Product', 'Total Claim Amount'], ascending=[True, False]).groupby('Product').head(10)
+                # Sort by claim amount and limit to top 5 clients per product
+                top_clients = top_clients.sort_values(by=['Product', 'Total Claim Amount'], ascending=[True, False]).groupby('Product', observed=True).head(10)
 
-            # Create a grouped bar chart for top clients
-            fig_top_clients = go.Figure()
-
-            for idx, product in enumerate(top_clients['Product'].unique()):
-                product_data = top_clients[top_clients['Product'] == product]
-                fig_top_clients.add_trace(go.Bar(
-                    x=product_data['Client Name'],
-                    y=product_data['Total Claim Amount'],
-                    name=product,
-                    text=product_data['Total Claim Amount'].apply(lambda x: f"{x / 1_000_000:.1f}M"),  # Format as millions
+                fig_top_clients = go.Figure()
+
+                fig_top_clients.add_traces(charts.series_traces(
+                    top_clients, 'Client Name', 'Total Claim Amount', 'Product',
+                    colors=custom_colors,  # Assign unique color per product
+                    text=lambda values: charts.text_labels(values, 1e6, 1, suffix='M'),  # Format as millions
                     textposition='outside',
-                    marker_color=custom_colors[idx % len(custom_colors)]  # Assign unique color per product
                 ))
 
-            # Update layout
-            fig_top_clients.update_layout(
-                barmode='group',
-                xaxis_title="Client Name",
-                yaxis_title="Total Claim Amount (M)",
-                font=dict(color='Black', size=12),
-                xaxis=dict(tickangle=45, title_font=dict(size=14), tickfont=dict(size=12)),
-                yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), ticksuffix="M"),
-                margin=dict(l=0, r=0, t=50, b=50),
-                height=500
-            )
+                # Update layout
+                fig_top_clients.update_layout(
+                    barmode='group',
+                    xaxis_title="Client Name",
+                    yaxis_title="Total Claim Amount (M)",
+                    font=dict(color='Black', size=12),
+                    xaxis=dict(tickangle=45, title_font=dict(size=14), tickfont=dict(size=12)),
+                    yaxis=dict(title_font=dict(size=14), tickfont=dict(size=12), ticksuffix="M"),
+                    margin=dict(l=0, r=0, t=50, b=50),
+                    height=500
+                )
+                return fig_top_clients
+
+            fig_top_clients = filters.figure("Top 10 Employer Group by Claim Amount", build_fig_top_clients)
 
             # Display the chart in Streamlit
             st.markdown('<h3 class="custom-subheader">Top 10 Employer Group by Claim Amount</h3>', unsafe_allow_html=True)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+
+# Leaderboards rank groups by a total without sorting every group: a partial sort
+# (np.argpartition) finds the K largest, and only those K are ordered.
+
+
+# Function to find the positions of the k largest totals, largest first. Ties keep the
+# earlier position first, as Series.nlargest does.
+def top_positions(totals, k):
+    totals = np.asarray(totals)
+    if len(totals) > k:
+        kth = totals[np.argpartition(totals, len(totals) - k)[len(totals) - k]]
+        candidates = np.flatnonzero(totals >= kth)
+    else:
+        candidates = np.arange(len(totals))
+    return candidates[np.lexsort((candidates, -totals[candidates]))][:k]
+
+
+# Function to rank groups by the sum of values and break the k largest down by segment,
+# e.g. employers by claim amount split by claim status. groups, segments and values are
+# aligned columns, such as raw rows or the levels of an already grouped Series; rows
+# with a missing group, segment or value are left out. Returns the breakdown matrix:
+# one row per top group, largest total first, one column per segment, the segment with
+# the largest single cell first, and NaN where a group has no rows of a segment.
+def top_k_breakdown(groups, segments, values, k):
+    group_codes, group_labels = pd.factorize(groups, sort=True)
+    segment_codes, segment_labels = pd.factorize(segments, sort=True)
+    values = np.asarray(values, dtype=float)
+    keep = (group_codes >= 0) & (segment_codes >= 0) & ~np.isnan(values)
+    group_codes, segment_codes, values = group_codes[keep], segment_codes[keep], values[keep]
+
+    top = top_positions(np.bincount(group_codes, values, minlength=len(group_labels)), k)
+
+    # Cells of the top groups only, in a (k, segments) matrix
+    rank = np.full(len(group_labels), -1)
+    rank[top] = np.arange(len(top))
+    in_top = rank[group_codes] >= 0
+    slots = rank[group_codes[in_top]] * len(segment_labels) + segment_codes[in_top]
+    size = len(top) * len(segment_labels)
+    sums = np.bincount(slots, values[in_top], minlength=size).reshape(len(top), len(segment_labels))
+    present = np.bincount(slots, minlength=size).reshape(len(top), len(segment_labels)) > 0
+
+    matrix = pd.DataFrame(
+        np.where(present, sums, np.nan),
+        index=pd.Index(group_labels[top], name=getattr(groups, 'name', None)),
+        columns=pd.Index(segment_labels, name=getattr(segments, 'name', None)),
+    )
+    order = top_positions(matrix.max().fillna(-np.inf).to_numpy(), len(segment_labels))
+    return matrix.iloc[:, order].loc[:, present.any(axis=0)[order]]
@@ -0,0 +1,133 @@
+import threading
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+import cube
+
+# DuckDB is optional (pip install duckdb); without it queries fall back to pandas
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+# aggregate() takes the arguments of mongo_source.aggregate, plus the columns that must
+# have a value, so either backend can serve a chart. FilterChain.rollup uses it when
+# enabled (see filter_cache.SQL_ROLLUPS).
+
+DATE_COLUMN = cube.DATE_COLUMN
+
+# DuckDB connections are not thread-safe; each Streamlit script thread gets its own
+_local = threading.local()
+
+SQL_AGGREGATES = {'sum': 'SUM', 'avg': 'AVG', 'min': 'MIN', 'max': 'MAX'}
+
+
+# Function to check whether queries run in DuckDB rather than pandas
+def available():
+    return duckdb is not None
+
+
+def _connection():
+    if getattr(_local, 'connection', None) is None:
+        _local.connection = duckdb.connect()
+    return _local.connection
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# Function to run SQL over Arrow IPC (Feather) files, each registered as a table:
+# sql("SELECT ... FROM claims WHERE ...", {'claims': path}, params). The files are
+# scanned as Arrow datasets, so DuckDB reads only the columns the query uses, pushes
+# its filters into the scan and spreads the scan over all cores.
+def sql(query, tables, params=None):
+    if duckdb is None:
+        raise RuntimeError("DuckDB is not installed; pip install duckdb")
+    connection = _connection()
+    for name, path in tables.items():
+        connection.register(name, ds.dataset(path, format='ipc'))
+    try:
+        return connection.execute(query, params or []).df()
+    finally:
+        for name in tables:
+            connection.unregister(name)
+
+
+# Function to list the columns of a dataset file, without reading it
+def columns(path):
+    return ds.dataset(path, format='ipc').schema.names
+
+
+# Function to build the WHERE clause for the sidebar filters: {column: selected values},
+# the columns that must have a value and an optional range of whole days, from the
+# start day up to the end of the end day (see cube.day_range), as in the views. Empty
+# selections match everything, like in the views.
+def where_clause(filters=None, start=None, end=None, present=(), date_column=DATE_COLUMN):
+    conditions, params = [], []
+    for name, values in (filters or {}).items():
+        if len(values):
+            conditions.append(f"{_quote(name)} IN ({', '.join('?' * len(values))})")
+            params += [value.item() if hasattr(value, 'item') else value for value in values]
+    conditions += [f"{_quote(name)} IS NOT NULL" for name in present]
+    if start is not None:
+        conditions.append(f"{_quote(date_column)} >= ?")
+        params.append(cube.day_range(start, start)[0].to_pydatetime())
+    if end is not None:
+        conditions.append(f"{_quote(date_column)} < ?")
+        params.append(cube.day_range(end, end)[1].to_pydatetime())
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+# Function to give group keys read from dictionary (categorical) columns their stored
+# categories and order the rows by them, as pandas orders groups of categoricals
+def _as_stored(result, path, by):
+    stored = ds.dataset(path, format='ipc').head(1, columns=by).to_pandas()
+    for name in by:
+        if isinstance(stored[name].dtype, pd.CategoricalDtype):
+            result[name] = result[name].astype(stored[name].dtype)
+    return result.sort_values(by, kind='stable', ignore_index=True)
+
+
+def _aggregate_pandas(path, by, value, how, filters, start, end, top, present=()):
+    df = pd.read_feather(path, columns=list(dict.fromkeys(by + list(filters or {}) + list(present) + [DATE_COLUMN] + ([value] if value else []))))
+    for name, values in (filters or {}).items():
+        if len(values):
+            df = df[df[name].isin(values)]
+    for name in present:
+        df = df[df[name].notna()]
+    if start is not None:
+        df = df[df[DATE_COLUMN] >= cube.day_range(start, start)[0]]
+    if end is not None:
+        df = df[df[DATE_COLUMN] < cube.day_range(end, end)[1]]
+    grouped = df.groupby(by, observed=True)
+    result = grouped.size().rename('Count') if value is None else grouped[value].agg(how.replace('avg', 'mean'))
+    result = result.reset_index()
+    if top is not None:
+        return result.sort_values(result.columns[-1], ascending=False).head(int(top)).reset_index(drop=True)
+    return result
+
+
+# Function to aggregate a dataset file: filter, group by one or more columns and reduce
+# value with how ('sum', 'avg', 'min', 'max'), or count rows when value is None. With
+# top, only the top rows by the aggregate come back; otherwise rows are ordered by the
+# group keys. Rows with a missing group key, or with a missing value in any of the
+# present columns, are left out. Runs in DuckDB when installed, in pandas otherwise,
+# with the same result.
+def aggregate(path, by, value=None, how='sum', filters=None, start=None, end=None, top=None, present=()):
+    by = [by] if isinstance(by, str) else list(by)
+    if duckdb is None:
+        return _aggregate_pandas(path, by, value, how, filters, start, end, top, present)
+
+    keys = ', '.join(_quote(name) for name in by)
+    name = value or 'Count'
+    reduce = 'COUNT(*)' if value is None else f"{SQL_AGGREGATES[how]}({_quote(value)})"
+    where, params = where_clause(filters, start, end, present)
+    present = ' AND '.join(f"{_quote(key)} IS NOT NULL" for key in by)
+    where = f"{where} AND {present}" if where else f"WHERE {present}"
+    order = f"ORDER BY {_quote(name)} DESC LIMIT {int(top)}" if top is not None else ""
+    query = f"SELECT {keys}, {reduce} AS {_quote(name)} FROM data {where} GROUP BY {keys} {order}"
+    result = sql(query, {'data': path}, params)
+    return result if top is not None else _as_stored(result, path, by)
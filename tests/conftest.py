@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+
+
+# Normalized claims over two years, with times of day so the day grain of the cubes and
+# of the date filters is exercised, and with the untidy values extracts carry (employer
+# names in another case, missing sources, codes that are not ICD-10)
+@pytest.fixture
+def claims():
+    rng = np.random.default_rng(0)
+    n = 2000
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730 * 24, n), unit='h')
+    claims = pd.DataFrame({
+        'Claim ID': [f'C{i}' for i in range(n)],
+        'Claim Created Date': dates,
+        'Employer Name': rng.choice(['Acme Ltd', 'ACME LTD', 'Kivu Choice', 'Baho'], n),
+        'Provider Name': rng.choice(['CHUK', 'Legacy Clinics', 'King Faisal Hospital'], n),
+        'Claim Type': rng.choice(['Inpatient', 'Outpatient', 'Dental'], n),
+        'Claim Status': rng.choice(['Approved', 'Declined', 'Pending'], n),
+        'Source': rng.choice(['Hospital', 'Clinic', None], n),
+        'Diagnosis': rng.choice(['Malaria', 'Flu', 'Gastritis'], n),
+        'ICD-10 Code': rng.choice(['B54', 'J06.9', 'J11.1', 'K29.7', 'not a code'], n),
+        'Product': rng.choice(['Health Insurance', 'ProActiv'], n),
+        'Month': dates.strftime('%B'),
+        'Year': dates.year,
+        'Claim Amount': rng.gamma(2, 50000, n).round(2),
+        'Approved Claim Amount': rng.gamma(2, 40000, n).round(2),
+    })
+    return data_loader._normalize_claims(claims)
@@ -0,0 +1,61 @@
+import pandas as pd
+
+import claims_store
+
+
+def _claims(rows):
+    return pd.DataFrame(rows, columns=['Claim ID', 'Claim Created Date', 'Claim Amount']).astype({'Claim Created Date': 'datetime64[ns]'})
+
+
+# Stored claims, C3 with two lines and C5 without a date
+STORED = _claims([
+    ('C1', '2024-01-05', 100.0),
+    ('C3', '2024-02-01', 30.0),
+    ('C3', '2024-02-01', 70.0),
+    ('C2', '2024-03-01', 200.0),
+    ('C4', '2024-03-01', 50.0),
+    ('C5', None, 10.0),
+])
+
+
+def test_watermark():
+    assert claims_store.watermark(STORED) == {'date': '2024-03-01T00:00:00', 'claim_id': 'C4'}
+    assert claims_store.watermark(STORED.iloc[5:]) is None
+
+
+# Claims compare by their rows whatever order the rows come in
+def test_claim_hashes_ignore_row_order():
+    hashes = claims_store._claim_hashes(STORED, STORED.iloc[::-1], list(STORED.columns))
+    assert (hashes['stored'] == hashes['extract']).all()
+
+
+def test_merge_extract():
+    mark = claims_store.watermark(STORED)
+    extract = _claims([
+        ('C1', '2024-01-05', 100.0),   # unchanged
+        ('C3', '2024-02-01', 70.0),    # unchanged, lines in another order
+        ('C3', '2024-02-01', 30.0),
+        ('C2', '2024-03-01', 250.0),   # edited below the watermark
+        ('C6', '2024-01-20', 60.0),    # late arrival below the watermark
+        ('C7', '2024-03-01', 80.0),    # on the watermark date, past its claim ID
+        ('C8', '2024-04-02', 90.0),    # past the watermark
+        ('C4', '2024-04-01', 50.0),    # stored claim whose date moved past the watermark
+    ])
+    merged, report = claims_store.merge_extract(STORED, extract, mark)
+
+    assert (report['added'], report['updated'], report['unchanged']) == (3, 2, 2)
+    assert sorted(report['updated_ids']) == ['C2', 'C4']
+    assert report['watermark_after'] == {'date': '2024-04-02T00:00:00', 'claim_id': 'C8'}
+
+    # C5, left out of the extract, is kept; rows are sorted by date, missing dates last
+    assert merged['Claim ID'].tolist() == ['C1', 'C6', 'C3', 'C3', 'C2', 'C7', 'C4', 'C8', 'C5']
+    assert merged.loc[merged['Claim ID'] == 'C2', 'Claim Amount'].tolist() == [250.0]
+    assert merged['Claim Created Date'].iloc[:-1].is_monotonic_increasing
+
+
+# Merging the same extract again changes nothing
+def test_merge_extract_again():
+    merged, report = claims_store.merge_extract(STORED, STORED.iloc[:5], claims_store.watermark(STORED))
+
+    assert (report['added'], report['updated'], report['unchanged']) == (0, 0, 4)
+    pd.testing.assert_frame_equal(merged, STORED)
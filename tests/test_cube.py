@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+import cube
+from filter_cache import FilterCache, FilterChain
+
+
+def _chain(claims):
+    rollups = cube.build_icd_rollups(claims)
+    return FilterChain(claims, 'test', 1, cache=FilterCache(), cube=cube.build_cube(claims), rollups=list(rollups.values()))
+
+
+@pytest.mark.parametrize("level", cube.ICD_LEVELS)
+def test_icd_rollups_match_rows(claims, level):
+    filters = _chain(claims)
+    filters.isin('Claim Status', ['Approved', 'Pending'])
+    filters.between('Claim Created Date', '2023-03-01', '2023-11-30')
+    assert all(rollup is not None for rollup in filters.cubes)
+
+    rows = filters.frame.groupby(level, observed=True)
+    pd.testing.assert_series_equal(filters.rollup(level, 'Claim Amount'), rows['Claim Amount'].sum(), check_names=False)
+    pd.testing.assert_series_equal(filters.rollup(level, how='size'), rows.size(), check_names=False)
+
+
+# A filter on a column the rollups do not keep drops them, and rollups of the level
+# come from the rows
+def test_icd_rollups_dropped_by_other_filters(claims):
+    filters = _chain(claims)
+    filters.isin('Diagnosis', ['Malaria'])
+
+    assert all(rollup is None for rollup in filters.cubes)
+    expected = claims[claims['Diagnosis'] == 'Malaria'].groupby('ICD-10 Block', observed=True)['Claim Amount'].sum()
+    pd.testing.assert_series_equal(filters.rollup('ICD-10 Block', 'Claim Amount'), expected)
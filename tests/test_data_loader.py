@@ -0,0 +1,17 @@
+import data_loader
+
+
+# Only earlier compiled copies of the workbook go; the stored dataset, its cube and
+# rollups share the stem of a claims.xlsx extract and stay
+def test_remove_stale_copies(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', str(tmp_path))
+    names = [
+        "claims-0123456789abcdef-v10.feather", "claims-fedcba9876543210-v11.feather",
+        "claims.feather", "claims-cube.feather", "claims-cube-icd-10-block.feather",
+        "claims-backup-v1.feather", "premiums-0123456789abcdef-v10.feather",
+    ]
+    for name in names:
+        (tmp_path / name).write_bytes(b'')
+
+    data_loader._remove_stale_copies("claims", str(tmp_path / "claims-fedcba9876543210-v11.feather"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(names[1:])
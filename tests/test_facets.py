@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import facets
+from facets import Facet, Facets
+
+
+# Every start and stop around byte edges, against setting the bits one by one
+@pytest.mark.parametrize("rows", [1, 7, 8, 9, 23, 24])
+def test_range(rows):
+    index = Facets(pd.DataFrame(index=range(rows)))
+    for start in range(rows + 1):
+        for stop in range(rows + 1):
+            expected = np.zeros(rows, dtype=bool)
+            expected[start:stop] = True
+            assert (index.unpack(index._range(start, stop)) == expected).all()
+
+
+# Masks of a column with bitmaps (few values) and of one looked up by code (many)
+@pytest.mark.parametrize("column", ['Claim Type', 'Claim ID'])
+def test_masks_match_pandas(claims, column):
+    index = Facets(claims)
+    values = claims[column].dropna().unique()[:2].tolist() + ['not a value']
+
+    assert (index.unpack(index.isin(column, values)) == claims[column].isin(values)).all()
+    assert (index.unpack(index.notna('Source')) == claims['Source'].notna()).all()
+
+
+# The created date is sorted (searched by bisection), the claim amount is not
+@pytest.mark.parametrize("column, start, end", [
+    ('Claim Created Date', pd.Timestamp('2023-03-01'), pd.Timestamp('2023-09-30 12:00')),
+    ('Claim Created Date', pd.Timestamp('2030-01-01'), pd.Timestamp('2031-01-01')),
+    ('Claim Amount', 50_000, 150_000),
+])
+@pytest.mark.parametrize("inclusive", ['both', 'left'])
+def test_between_and_bounds(claims, column, start, end, inclusive):
+    stored = claims.sort_values('Claim Created Date', ignore_index=True)
+    index = Facets(stored)
+    keep = index.between(column, start, end, inclusive)
+
+    expected = stored[column].between(start, end, inclusive=inclusive)
+    assert (index.unpack(keep) == expected).all()
+
+    kept = stored.loc[expected, 'Claim Created Date']
+    lowest, highest = index.bounds('Claim Created Date', keep)
+    assert (lowest, highest) == (kept.min(), kept.max()) or (kept.empty and pd.isna(lowest) and pd.isna(highest))
+    assert index.bounds('Claim Created Date') == (stored['Claim Created Date'].min(), stored['Claim Created Date'].max())
+
+
+# Options cascade from the rows left by the widgets before them; defaults apply to
+# widgets without a selection
+def test_resolve(claims):
+    index = Facets(claims)
+    widgets = [
+        Facet('status', 'Claim Status', cascade=False),
+        Facet('year', 'Year', default=lambda years: years[-1:]),
+        Facet('type', 'Claim Type'),
+    ]
+    options = index.resolve(widgets, {'status': ['Approved']})
+
+    rows = claims[claims['Claim Status'] == 'Approved']
+    assert options['status'].to_dict() == claims['Claim Status'].value_counts().to_dict()
+    assert list(options['year'].index) == sorted(rows['Year'].unique())
+    rows = rows[rows['Year'] == rows['Year'].max()]
+    assert options['type'].to_dict() == rows['Claim Type'].value_counts().to_dict()
+    assert facets.state_keys(widgets) == ['status', 'type']
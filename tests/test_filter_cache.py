@@ -0,0 +1,77 @@
+import numpy as np
+
+import filter_cache
+from filter_cache import FilterCache, FilterChain
+
+
+# One kilobyte, as the cache counts it
+def _kb(fill=0):
+    return np.full(1024, fill, dtype=np.uint8)
+
+
+# A session past its budget gives up its own least recently used results first; other
+# sessions' results and results computed outside a session stay
+def test_session_budget():
+    cache = FilterCache(session_max_bytes=3 * 1024)
+    cache.put('shared', _kb())
+    with cache.owned_by('b'):
+        cache.put('b1', _kb())
+    with cache.owned_by('a'):
+        for key in ['a1', 'a2', 'a3']:
+            cache.put(key, _kb())
+        cache.get('a1')
+        cache.put('a4', _kb())
+
+    assert [key for key in ['shared', 'b1', 'a1', 'a2', 'a3', 'a4'] if cache.get(key) is not None] == ['shared', 'b1', 'a1', 'a3', 'a4']
+    assert cache.usage()['sessions'] == {None: 1024, 'b': 1024, 'a': 3 * 1024}
+
+    # A result larger than the session budget is returned but not kept
+    with cache.owned_by('a'):
+        assert len(cache.put('a5', np.zeros(4 * 1024, dtype=np.uint8))) == 4 * 1024
+    assert cache.get('a5') is None
+
+
+# The index codes columns as the filters use them; the cache counts what it grows by,
+# towards the owner's budget too
+def test_index_accounted_after_coding(claims):
+    cache = FilterCache()
+    with cache.owned_by('a'):
+        filters = FilterChain(claims, 'test', 1, cache=cache)
+        assert filters.index.nbytes == 0
+        filters.isin('Claim Type', ['Dental'])
+        filters.notna('Provider Name')
+
+    index = filters.index.nbytes
+    assert index > 0
+    assert cache.stats()['bytes'] >= index
+    assert cache.usage()['sessions']['a'] == cache.stats()['bytes']
+
+
+# Least recently used entries go first, once either the entry or the byte limit is passed
+def test_lru_limits():
+    cache = FilterCache(max_entries=3, max_bytes=4 * 1024)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, _kb())
+    cache.get('a')
+    cache.put('d', _kb())
+    assert [key for key in 'abcd' if cache.get(key) is not None] == ['a', 'c', 'd']
+
+    cache.put('e', np.zeros(3 * 1024, dtype=np.uint8))
+    assert [key for key in 'acde' if cache.get(key) is not None] == ['d', 'e']
+    assert cache.stats()['bytes'] == 4 * 1024
+
+
+# Entries older than the TTL are computed again
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(filter_cache.time, 'monotonic', lambda: now[0])
+    cache = FilterCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_compute('key', compute) == 1
+    now[0] += 59
+    assert cache.get_or_compute('key', compute) == 1
+    now[0] += 2
+    assert cache.get_or_compute('key', compute) == 2
+    assert cache.stats()['expirations'] == 1
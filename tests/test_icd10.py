@@ -0,0 +1,31 @@
+import pandas as pd
+
+import icd10
+
+
+# Blocks are looked up by bisecting on their first category, so they must not overlap
+# and each must sit inside one chapter
+def test_blocks_partition_chapters():
+    blocks = sorted(icd10.BLOCKS)
+    for (_, last, _), (first, _, _) in zip(blocks, blocks[1:]):
+        assert last < first
+    chapters = [(first, last) for first, last, *_ in icd10.CHAPTERS]
+    for first, last, _ in blocks:
+        assert any(start <= first and last <= end for start, end in chapters)
+
+
+def test_join_hierarchy():
+    df = pd.DataFrame({'ICD-10 Code': ['K29.7', 'b54', None, 'not a code', 'U07.1']})
+    df = icd10.join_hierarchy(df)
+
+    assert df['ICD-10 Category'].tolist()[:2] == ['K29', 'B54']
+    assert df['ICD-10 Block'][0] == "K20-K31 Diseases of oesophagus, stomach and duodenum"
+    assert df['ICD-10 Chapter'][4] == "XXII Codes for special purposes"
+    assert df.loc[2:3, icd10.LEVELS[:3]].isna().all(axis=None)
+    assert list(df['ICD-10 Block'].cat.categories) == icd10.BLOCK_LABELS
+
+
+def test_chapter_blocks():
+    blocks = icd10.chapter_blocks("XXII Codes for special purposes")
+    assert blocks == [label for label in icd10.BLOCK_LABELS if label.startswith('U')]
+    assert sum(len(icd10.chapter_blocks(chapter)) for chapter in icd10.CHAPTER_LABELS) == len(icd10.BLOCK_LABELS)
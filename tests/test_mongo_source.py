@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import cube
+import mongo_source
+
+mongomock = pytest.importorskip("mongomock")
+
+
+# Claims whose column names MongoDB would not accept as they are
+@pytest.fixture
+def claims():
+    return pd.DataFrame({
+        'Claim Type': ['Dental', 'Optical', 'Dental', 'Inpatient', 'Dental', 'Optical'],
+        'Claim Status': ['Approved', 'Declined', 'Approved', 'Approved', 'Pending', 'Approved'],
+        'Amount (Rwf.)': [100.0, 250.0, 40.0, 900.0, 60.0, 10.0],
+        '$Approved': [90.0, 0.0, 36.0, 810.0, 0.0, 9.0],
+        'Claim Created Date': pd.to_datetime([
+            '2024-01-05', '2024-01-20', '2024-02-03', '2024-02-28', '2024-03-10 15:30', '2024-03-31',
+        ], format='ISO8601'),
+    })
+
+
+@pytest.fixture
+def collection(claims):
+    collection = mongomock.MongoClient().db.claims
+    mongo_source.upload_frame(collection, claims, ['Claim Type', '$Approved'])
+    return collection
+
+
+@pytest.mark.parametrize("value, how, reduce", [
+    ('Amount (Rwf.)', 'sum', 'sum'),
+    ('$Approved', 'avg', 'mean'),
+    (None, 'sum', 'size'),
+])
+def test_aggregate_matches_pandas(claims, collection, value, how, reduce):
+    filters = {'Claim Status': ['Approved', 'Pending']}
+    start, end = '2024-01-01', '2024-03-10'
+    result = mongo_source.aggregate(collection, ['Claim Type'], value, how, filters, start, end)
+
+    # Whole days, so the claim late on the end day is kept
+    rows = claims[claims['Claim Status'].isin(filters['Claim Status'])
+                  & claims['Claim Created Date'].between(*cube.day_range(start, end), inclusive='left')]
+    grouped = rows.groupby('Claim Type')
+    expected = (grouped.size() if value is None else grouped[value].agg(reduce)).reset_index(name=value or 'Count')
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_aggregate_top(claims, collection):
+    result = mongo_source.aggregate(collection, 'Claim Type', 'Amount (Rwf.)', top=2)
+
+    expected = claims.groupby('Claim Type')['Amount (Rwf.)'].sum().nlargest(2).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_find_frame_keeps_column_names(claims, collection):
+    columns = ['Claim Type', 'Amount (Rwf.)']
+    result = mongo_source.find_frame(collection, {'$Approved': [0.0]}, columns=columns)
+
+    expected = claims.loc[claims['$Approved'] == 0, columns].reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+import claims_store
+import cube
+import filter_cache
+import sql_engine
+from filter_cache import FilterCache, FilterChain
+
+pytest.importorskip("duckdb")
+
+
+# The claims stored the way ingest stores them: written uncompressed
+@pytest.fixture
+def dataset(tmp_path, claims):
+    path = str(tmp_path / "claims.feather")
+    claims_store.write_dataset(path, claims)
+    return path
+
+
+# DuckDB returns the group keys of a top query as text, pandas as categoricals
+def _plain(df):
+    return df.astype({name: object for name in df.columns[df.dtypes == 'category']})
+
+
+@pytest.mark.parametrize("by, value, how, filters, start, end, top", [
+    (['Claim Type'], 'Claim Amount', 'sum', None, None, None, None),
+    (['Employer Name', 'Claim Status'], 'Approved Claim Amount', 'avg', {'Product': ['ProActiv']}, None, None, None),
+    (['Source'], None, 'sum', {'Claim Status': ['Approved', 'Pending']}, '2023-03-01', '2024-06-30', None),
+    (['Claim Type'], 'Claim Amount', 'sum', None, '2023-03-01 12:00', '2023-03-01 06:00', None),
+    (['Provider Name', 'Diagnosis'], 'Claim Amount', 'max', None, '2024-01-01', None, 4),
+    (['Month'], 'Claim Amount', 'min', {'Year': [2024]}, None, None, None),
+    (['ICD-10 Chapter', 'Year'], None, 'sum', None, None, None, None),
+])
+def test_aggregate_matches_pandas(dataset, by, value, how, filters, start, end, top):
+    result = sql_engine.aggregate(dataset, by, value, how, filters, start, end, top)
+    expected = sql_engine._aggregate_pandas(dataset, by, value, how, filters, start, end, top)
+    pd.testing.assert_frame_equal(_plain(result), _plain(expected), check_dtype=False)
+
+
+# Dates are filtered on whole days, as in the views: every claim of the end day is
+# kept, whatever its time
+def test_where_clause_takes_whole_days(dataset, claims):
+    result = sql_engine.aggregate(dataset, 'Claim Type', how='sum', start='2023-03-01 12:00', end='2023-06-30 00:00')
+
+    rows = claims[claims['Claim Created Date'].between(*cube.day_range('2023-03-01', '2023-06-30'), inclusive='left')]
+    assert result['Count'].sum() == len(rows)
+
+
+# With the SQL engine on, rollups no cube answers come from the dataset file, the same
+# as from the rows
+@pytest.mark.parametrize("by, measure, how", [
+    ('Provider Name', 'Claim Amount', 'sum'),
+    (['Employer Name', 'Claim Type'], 'Approved Claim Amount', 'mean'),
+    ('Diagnosis', None, 'size'),
+])
+def test_filter_chain_sql_rollup(monkeypatch, dataset, claims, by, measure, how):
+    def chain():
+        filters = FilterChain(claims, 'test', 1, cache=FilterCache(), cube=cube.build_cube(claims), path=dataset)
+        filters.notna('Month')
+        filters.isin('Employer Name', ['ACME LTD', 'BAHO'])
+        filters.between('Claim Created Date', '2023-03-01', '2024-06-30')
+        return filters
+
+    expected = chain().rollup(by, measure, how)
+    monkeypatch.setattr(filter_cache, 'SQL_ROLLUPS', True)
+    filters = chain()
+    assert len(expected) and filters.query is not None
+    pd.testing.assert_series_equal(filters.rollup(by, measure, how), expected, check_dtype=False, check_index_type=False)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+
+# Time series are bucketed on datetime64 values, with no per-row strings, and at a
+# grain coarse enough that a chart of the selected range keeps at most MAX_POINTS
+# points.
+
+# Grains from finest to coarsest, with their approximate length in days
+GRAINS = {'D': 1, 'W': 7, 'M': 365.25 / 12, 'Q': 365.25 / 4}
+GRAIN_NAMES = {'D': 'Day', 'W': 'Week', 'M': 'Month', 'Q': 'Quarter'}
+
+MAX_POINTS = 400
+
+
+# Function to pick the finest grain at which the range [start, end] fits in max_points
+def pick_grain(start, end, max_points=MAX_POINTS):
+    if pd.isna(start) or pd.isna(end):
+        return 'D'
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for grain, length in GRAINS.items():
+        if days / length <= max_points:
+            return grain
+    return 'Q'
+
+
+# Function to map dates to the start of their day, week (from Monday), month or quarter;
+# missing dates stay missing
+def period_starts(dates, grain):
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]')
+    if grain == 'D':
+        starts = days
+    elif grain == 'W':
+        # Day 0, 1970-01-01, was a Thursday
+        starts = days - (days.view('int64') + 3) % 7
+    else:
+        starts = days.astype('datetime64[M]')
+        if grain == 'Q':
+            starts = starts - starts.view('int64') % 3
+    return starts.astype('datetime64[ns]')
+
+
+# Function to total values per period, sorted by period start. values is a DataFrame
+# whose columns are summed (missing values count as 0), or None to count rows. With by,
+# the totals are split by its values into one column each, as pivot would lay them out:
+# values is then one column of numbers, or None. Rows with a missing date or by value
+# are left out. The index holds the period starts, named after dates.
+def resample(dates, grain, values=None, by=None):
+    starts = period_starts(dates, grain)
+    valid = ~np.isnat(starts)
+    if by is not None:
+        codes, labels = pd.factorize(by, sort=True)
+        valid &= codes >= 0
+    periods, inverse = np.unique(starts[valid], return_inverse=True)
+    index = pd.DatetimeIndex(periods, name=getattr(dates, 'name', None))
+
+    if by is not None:
+        slots = inverse * len(labels) + codes[valid]
+        weights = None if values is None else np.nan_to_num(np.asarray(values, dtype=float)[valid])
+        totals = np.bincount(slots, weights, minlength=len(periods) * len(labels))
+        return pd.DataFrame(totals.reshape(len(periods), len(labels)).astype(float), index=index, columns=pd.Index(labels, name=getattr(by, 'name', None)))
+
+    if values is None:
+        return pd.Series(np.bincount(inverse, minlength=len(periods)), index=index, name='Count')
+    return pd.DataFrame({
+        name: np.bincount(inverse, np.nan_to_num(column.to_numpy(dtype=float)[valid]), minlength=len(periods))
+        for name, column in values.items()
+    }, index=index)
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+import streamlit as st
+
+from claim_analysis import display_analysis
+from claim_type import display_claim_type
+from data_loader import load_claims, load_cube, load_icd_rollups, load_premiums
+from filter_cache import FILTER_CACHE
+from fraud import display_fraud
+from loss_ratio import display_loss_ratio
+from product import display_product
+
+
+# Views run at warm-up, in tab order
+VIEWS = [
+    ("Claims Analysis", display_analysis),
+    ("Product View", display_product),
+    ("Claim Type View", display_claim_type),
+    ("Fraud Detection", display_fraud),
+    ("Loss Ratio View", display_loss_ratio),
+]
+
+WARM_UP_THREAD = "dashboard-warm-up"
+
+# Seconds a session waits for a running warm-up before computing on its own
+WAIT_SECONDS = 600
+
+
+# Outside a session Streamlit warns on every element a view draws; the warm-up thread
+# runs the views outside any session on purpose
+class _QuietWarmUp(logging.Filter):
+    def filter(self, record):
+        return threading.current_thread().name != WARM_UP_THREAD
+
+
+# Progress of the warm-up: state is 'running', 'ready' or 'failed', seconds holds the
+# time spent per step and error the reason of a failure
+class WarmUp:
+    def __init__(self):
+        self.state = 'running'
+        self.seconds = {}
+        self.error = None
+        self.done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    # Function to block until the warm-up has finished or timeout seconds have passed
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _step(self, name, run):
+        start = time.perf_counter()
+        run()
+        self.seconds[name] = time.perf_counter() - start
+
+    # Function to load the data and run every view once with its default filters. No
+    # session exists here, so widgets return their defaults and nothing is drawn, while
+    # the filters, aggregates and figures of the default view state land in the shared
+    # cache, under the same keys the first session will ask for.
+    def run(self):
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_QuietWarmUp())
+        try:
+            self._step("data", lambda: (load_claims(), load_cube(), load_icd_rollups(), load_premiums()))
+            for name, display in VIEWS:
+                self._step(name, display)
+            self.state = 'ready'
+        except Exception as error:
+            self.state, self.error = 'failed', error
+            logging.getLogger(__name__).exception("Dashboard warm-up failed")
+        finally:
+            self.done.set()
+        logging.getLogger(__name__).info(
+            "Dashboard warm-up %s in %.1fs, cache %s", self.state, sum(self.seconds.values()), FILTER_CACHE.stats(),
+        )
+
+
+# Function to start the warm-up once per server process, on the first script run
+# (usually the login page, so it runs while the first user signs in)
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    warm_up = WarmUp()
+    threading.Thread(target=warm_up.run, name=WARM_UP_THREAD, daemon=True).start()
+    return warm_up
@@ -0,0 +1,94 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+
+
+# Kept free of Streamlit imports: spawned workers import this module to parse sheets
+
+# Below this size, starting worker processes costs more than parsing the sheets in turn
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Rows held as Python objects at a time when streaming a sheet
+CHUNK_ROWS = 50_000
+
+# Cell texts pd.read_excel reads as missing: Excel error values plus its default NA strings
+NA_VALUES = set(ERROR_CODES) | {
+    '', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+
+# Function to list a workbook's year sheets in year order
+def discover_sheets(path, pattern):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        names = workbook.sheetnames
+    finally:
+        workbook.close()
+    years = {name: int(match.group(1)) for name in names if (match := pattern.match(name))}
+    return sorted(years, key=years.get)
+
+
+def _parse_sheet(path, sheet):
+    return pd.read_excel(path, sheet_name=sheet)
+
+
+# Function to parse the year sheets side by side in worker processes and concatenate
+# them once. Workers are spawned rather than forked from the Streamlit server's threads.
+def read_year_sheets(path, pattern):
+    sheets = discover_sheets(path, pattern)
+    if not sheets:
+        raise ValueError(f"No sheets in {path} match {pattern.pattern}")
+    if len(sheets) == 1 or os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        frames = [_parse_sheet(path, sheet) for sheet in sheets]
+    else:
+        workers = min(len(sheets), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            frames = list(pool.map(_parse_sheet, [path] * len(sheets), sheets))
+    return pd.concat(frames, ignore_index=True)
+
+
+# Function to name header cells the way pd.read_excel does: blanks become
+# "Unnamed: <i>" and repeated names get ".1", ".2", ... suffixes
+def _header_names(cells):
+    names, seen = [], {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None else str(cell)
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(name if count == 0 else f"{name}.{count}")
+    return names
+
+
+# Function to stream one sheet as DataFrames of at most chunk_rows rows. The workbook
+# is opened read-only, so openpyxl parses rows as they are consumed instead of
+# building the whole sheet in memory; fully empty rows are skipped.
+def iter_sheet_chunks(path, sheet, chunk_rows=CHUNK_ROWS):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header_names(header)
+        rows = (row for row in rows if any(value is not None for value in row))
+        while chunk := list(itertools.islice(rows, chunk_rows)):
+            df = pd.DataFrame.from_records(chunk, columns=columns)
+            yield df.mask(df.isna() | df.isin(NA_VALUES), np.nan)
+    finally:
+        workbook.close()
+
+
+# Function to stream every year sheet in year order, one chunk at a time
+def stream_year_sheets(path, pattern, chunk_rows=CHUNK_ROWS):
+    sheets = discover_sheets(path, pattern)
+    if not sheets:
+        raise ValueError(f"No sheets in {path} match {pattern.pattern}")
+    for sheet in sheets:
+        yield from iter_sheet_chunks(path, sheet, chunk_rows)